@@ -19,9 +19,28 @@ More info in README.md file
 #define __status__      "Development"
 
 #include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
 #include "pico/stdlib.h"
 #include "pico/binary_info.h"
+#include "pico/i2c_slave.h"
 #include "hardware/i2c.h"
+#include "hardware/adc.h"
+#include "hardware/pwm.h"
+
+// Arduino compatibility (this code is ported from the Arduino controller)
+typedef bool boolean;
+typedef uint8_t byte;
+#ifndef max
+#define max(a,b) ((a) > (b) ? (a) : (b))
+#endif
+#ifndef min
+#define min(a,b) ((a) < (b) ? (a) : (b))
+#endif
+#define PI 3.1415926535897932384626433832795
+static inline unsigned long millis() { return to_ms_since_boot(get_absolute_time()); }
+static inline unsigned long micros() { return (unsigned long)to_us_since_boot(get_absolute_time()); }
 
 
 // ######### Variable section ##########
@@ -160,6 +179,7 @@ int MinFrameStepsR8 = R8_HEIGHT/((PI*CapstanDiameter)/(360/(NEMA_STEP_DEGREES/NE
 int MinFrameStepsS8 = S8_HEIGHT/((PI*CapstanDiameter)/(360/(NEMA_STEP_DEGREES/NEMA_MICROSTEPS_IN_STEP)));; // Default value for S8 (286 aprox)
 int MinFrameSteps = MinFrameStepsS8;        // Minimum number of steps to allow frame detection
 int FrameExtraSteps = 0;              // Allow framing adjustment on the fly (manual, automatic would require using CV2 pattern matching, maybe to be checked)
+int FrameDeductSteps = 0;               // Manually force reduction of MinFrameSteps when ExtraFrameSteps is negative
 int DecreaseSpeedFrameStepsBefore = 0;  // 20 - No need to anticipate slow down, the default MinFrameStep should be always less
 int DecreaseSpeedFrameSteps = MinFrameSteps - DecreaseSpeedFrameStepsBefore;    // Steps at which the scanning speed starts to slow down to improve detection
 // ------------------------------------------------------------------------------------------
@@ -211,11 +231,39 @@ typedef struct Queue {
     int Param2[QUEUE_SIZE];
     int in;
     int out;
-};
+} Queue;
 
 volatile Queue CommandQueue;
 volatile Queue ResponseQueue;
 
+uint GreenLedSliceNum;
+
+// ######### Function prototypes ##########
+boolean RewindFilm(int UI_Command);
+boolean FastForwardFilm(int UI_Command);
+void CollectOutgoingFilm(bool force = false);
+int GetLevelPT();
+void ReportPlotterInfo();
+void SlowForward();
+boolean FilmInFilmgate();
+void adjust_framesteps(int frame_steps);
+boolean IsHoleDetected();
+void capstan_advance(int steps);
+ScanResult scan(int UI_Command);
+void receiveEvent(i2c_inst_t *i2c, i2c_slave_event_t event);
+void sendEvent(i2c_inst_t *i2c);
+boolean push_cmd(int cmd, int param);
+int pop_cmd(int * param);
+boolean push_rsp(int rsp, int param, int param2);
+int pop_rsp(int * param, int * param2);
+boolean dataInCmdQueue(void);
+boolean dataInRspQueue(void);
+void DebugPrintStr(const char * str);
+void DebugPrint(const char * str, unsigned long i);
+void SerialPrintStr(const char * str);
+void SerialPrintInt(int i);
+void scan_i2c();
+
 void SendToRPi(byte rsp, int param1, int param2)
 {
     push_rsp(rsp, param1, param2);
@@ -253,7 +301,7 @@ void setup() {
     ResponseQueue.in = 0;
     ResponseQueue.out = 0;
 
-    i2c_slave_init (i2c0, 0x33, receiveEvent);    // Init pico as I2C slave, set callback for receive events
+    i2c_slave_init (i2c_RPi, 16, receiveEvent);    // Init pico as I2C slave (same address as Arduino), set callback for I2C events
 
     // Assign function to pins
     adc_init(); // Initialize ADC HW
@@ -329,7 +377,7 @@ void setup() {
 }
 
 void loop() {
-    int param;
+    int param = 0;
 
     SendToRPi(RSP_FORCE_INIT, 0, 0);  // Request UI to resend init sequence, in case controller reloaded while UI active
 
@@ -380,9 +428,17 @@ void loop() {
                     PerforationThresholdAutoLevelRatio = param;
                 break;
             case CMD_SET_EXTRA_STEPS:
+                param = (int16_t)param;     // Negative values sent as 16 bit two's complement
                 DebugPrint(">BoostPT", param);
-                if (param >= 1 && param <= 20)  // Also to move up we add extra steps
+                // Absolute value (can be set on the fly by UI framing correction): Only one of both is active
+                if (param >= 0 && param <= 30) {  // Also to move up we add extra steps (zero to reset)
                     FrameExtraSteps = param;
+                    FrameDeductSteps = 0;
+                }
+                else if (param >= -30 && param <= -1) {  // Manually force reduction of MinFrameSteps
+                    FrameDeductSteps = param;
+                    FrameExtraSteps = 0;
+                }
                 break;
             case CMD_SET_SCAN_SPEED:
                 DebugPrint(">Speed", param);
@@ -413,7 +469,7 @@ void loop() {
                         // analogWrite(11, UVLedBrightness); // Turn on UV LED
                         UVLedOn = true;
                         sleep_ms(200);
-                        StartFrameTime = get_absolute_time();
+                        StartFrameTime = micros();
                         FilmDetectedTime = millis();
                         NoFilmDetected = false;
                         ScanSpeed = OriginalScanSpeed;
@@ -429,14 +485,14 @@ void loop() {
                         break;
                     case CMD_GET_NEXT_FRAME:  // Continue scan to next frame
                         ScanState = Sts_Scan;
-                        StartFrameTime = get_absolute_time();
+                        StartFrameTime = micros();
                         ScanSpeed = OriginalScanSpeed;
                         DebugPrint("Save t.",StartFrameTime-StartPictureSaveTime);
                         DebugPrintStr(">Next fr.");
                         // Also send, if required, to RPi autocalculated threshold level every frame
                         // Alternate reports for each value, otherwise I2C has I/O errors
                         if (PT_Level_Auto || Frame_Steps_Auto)
-                            SendToRPi(RSP_REPORT_AUTO_LEVELS, PerforationThresholdLevel, MinFrameSteps);
+                            SendToRPi(RSP_REPORT_AUTO_LEVELS, PerforationThresholdLevel, MinFrameSteps+FrameDeductSteps);
                         break;
                     case CMD_SET_REGULAR_8:  // Select R8 film
                         DebugPrintStr(">R8");
@@ -478,6 +534,7 @@ void loop() {
                         if (FilmInFilmgate() and UI_Command == CMD_REWIND) { // JRE 13 Aug 22: Cannot rewind, there is film loaded
                             DebugPrintStr("Rwnd err");
                             SendToRPi(RSP_REWIND_ERROR, 0, 0);
+                            /*
                             tone(A2, 2000, 100);
                             sleep_ms(150);
                             tone(A2, 1000, 100);
@@ -632,7 +689,7 @@ boolean RewindFilm(int UI_Command) {
             gpio_put(PIN_MOTOR_B_NEUTRAL,0);
             gpio_put(PIN_MOTOR_C_NEUTRAL,0);
             sleep_ms(100);
-            SendToRPi(RSP_REWIND_ENDED, 0, 0, 0, 0);
+            SendToRPi(RSP_REWIND_ENDED, 0, 0);
         }
     }
     else {
@@ -668,7 +725,7 @@ boolean FastForwardFilm(int UI_Command) {
             gpio_put(PIN_MOTOR_B_NEUTRAL,0);
             gpio_put(PIN_MOTOR_C_NEUTRAL,0);
             sleep_ms(100);
-            SendToRPi(RSP_FAST_FORWARD_ENDED, 0, 0, 0, 0);
+            SendToRPi(RSP_FAST_FORWARD_ENDED, 0, 0);
         }
     }
     else {
@@ -687,7 +744,7 @@ boolean FastForwardFilm(int UI_Command) {
 // Still, pinch roller (https://www.thingiverse.com/thing:5583753) and microswitch
 // (https://www.thingiverse.com/thing:5541340) are required. Without them (specially without pinch roller)
 // tension might not be enough for the capstan to pull the film.
-void CollectOutgoingFilm(bool force = false) {
+void CollectOutgoingFilm(bool force) {
     static int loop_counter = 0;
     static boolean CollectOngoing = true;
 
@@ -696,12 +753,12 @@ void CollectOutgoingFilm(bool force = false) {
 
     if (loop_counter % collect_modulo == 0) {
         if (CurrentTime > TimeToCollect) {
-            TractionSwitchActive = digitalRead(TractionStopPin);
+            TractionSwitchActive = !gpio_get(PIN_TRACTION_STOP);
             if (!TractionSwitchActive) {  //Motor allowed to turn
-                digitalWrite(MotorC_Stepper, LOW);
-                digitalWrite(MotorC_Stepper, HIGH);
-                digitalWrite(MotorC_Stepper, LOW);
-                TractionSwitchActive = digitalRead(TractionStopPin);
+                gpio_put(PIN_MOTOR_C_STEP,0);
+                gpio_put(PIN_MOTOR_C_STEP,1);
+                gpio_put(PIN_MOTOR_C_STEP,0);
+                TractionSwitchActive = !gpio_get(PIN_TRACTION_STOP);
             }
             if (TractionSwitchActive)
                 TimeToCollect = CurrentTime + collect_timer;
@@ -724,7 +781,7 @@ int GetLevelPT() {
     //if (MinPT_Dynamic < MaxPT_Dynamic) MinPT_Dynamic+=int((MaxPT_Dynamic-MinPT_Dynamic)/10);  // need to catch up quickly for overexposed frames (proportional to MaxPT to adapt to any scanner)
     if (MinPT_Dynamic < MaxPT_Dynamic) MinPT_Dynamic+=2;  // need to catch up quickly for overexposed frames (proportional to MaxPT to adapt to any scanner)
     if (PT_Level_Auto) {
-        ratio = (float)PerforationThresholdAutoLevelRatio/100;
+        float ratio = (float)PerforationThresholdAutoLevelRatio/100;
         PerforationThresholdLevel = int(((MinPT_Dynamic + (MaxPT_Dynamic-MinPT_Dynamic) * (ratio)))/10);
     }
 
@@ -743,10 +800,10 @@ void ReportPlotterInfo() {
     static int Previous_PT_Signal = 0, PreviousFrameSteps = 0;
     static char out[100];
 
-    if (get_absolute_time() > NextReport) {
+    if (micros() > NextReport) {
         if (Previous_PT_Signal != PT_SignalLevelRead || PreviousFrameSteps != LastFrameSteps) {
-            NextReport = delayed_by_ms(get_absolute_time(),20);
-            if (DebugState == PlotterInfo {  // Plotter info to Arduino IDE
+            NextReport = micros() + 20000;  // 20 ms
+            if (DebugState == PlotterInfo) {  // Plotter info to Arduino IDE
                     sprintf(out,"PT:%i,MaxPT:%i,MinPT:%i,Threshold:%i", PT_SignalLevelRead,int(MaxPT_Dynamic/10),int(MinPT_Dynamic/10),PerforationThresholdLevel);
                     SerialPrintStr(out);
             }
@@ -760,7 +817,7 @@ void ReportPlotterInfo() {
 
 void SlowForward(){
     static unsigned long LastMove = 0;
-    unsigned long CurrentTime = get_absolute_time();
+    unsigned long CurrentTime = micros();
     if (CurrentTime > LastMove || LastMove-CurrentTime > 700) { // If timer expired (or wrapped over) ...
         GetLevelPT();   // No need to know PT level here, but used to update plotter data
         CollectOutgoingFilm(true);
@@ -804,7 +861,7 @@ void adjust_framesteps(int frame_steps) {
     static int steps_per_frame_list[32];
     static int idx = 0;
     static int items_in_list = 0;
-    int total;
+    int total = 0;
 
     // Check if steps per frame are going beyond reasonable limits
     if (frame_steps > int(OriginalMinFrameSteps*1.05) || frame_steps < int(OriginalMinFrameSteps*0.95)) {   // Allow 5% deviation
@@ -841,7 +898,7 @@ boolean IsHoleDetected() {
     // To consider a frame is detected. After changing the condition to allow 20% less in the number of steps, I can see a better precision
     // In the captured frames. So for the moment it stays like this. Also added a fuse to also give a frame as detected in case of reaching
     // 150% of the required steps, even of the PT level does no tmatch the required threshold. We'll see...
-    if (PT_Level >= PerforationThresholdLevel && FrameStepsDone >= int(MinFrameSteps*0.7) || FrameStepsDone > int(MinFrameSteps * 1.5)) {
+    if (PT_Level >= PerforationThresholdLevel && FrameStepsDone >= int((MinFrameSteps+FrameDeductSteps)*0.7) || FrameStepsDone > int(MinFrameSteps * 1.5)) {
         hole_detected = true;
         GreenLedOn = true;
         // Green led already handled during scan process (proportional to frame steps)
@@ -855,7 +912,7 @@ void capstan_advance(int steps) {
         gpio_put(PIN_MOTOR_B_STEP,0);
         gpio_put(PIN_MOTOR_B_STEP,1);
         if (steps > 1)
-            delayMicroseconds(1000);
+            sleep_us(1000);
     }
     gpio_put(PIN_MOTOR_B_STEP,0);
 }
@@ -865,7 +922,7 @@ void capstan_advance(int steps) {
 ScanResult scan(int UI_Command) {
     ScanResult retvalue = SCAN_NO_FRAME_DETECTED;
     static unsigned long TimeToScan = 0;
-    unsigned long CurrentTime = get_absolute_time();
+    unsigned long CurrentTime = micros();
 
     if (CurrentTime < TimeToScan && TimeToScan - CurrentTime < ScanSpeed) {
         return (retvalue);
@@ -915,19 +972,19 @@ ScanResult scan(int UI_Command) {
 
         if (FrameDetected) {
             DebugPrintStr("Frame!");
-            if (FrameFineTune > 0)  // If positive, aditional steps after detection
-                capstan_advance(FrameFineTune);
+            if (FrameExtraSteps > 0)  // If positive, aditional steps after detection
+                capstan_advance(FrameExtraSteps);
             LastFrameSteps = FrameStepsDone;
             adjust_framesteps(LastFrameSteps);
             FrameStepsDone = 0;
 
-            StartPictureSaveTime = get_absolute_time();
+            StartPictureSaveTime = micros();
             // Tell UI (Raspberry PI) a new frame is available for processing
             if (ScanState == Sts_SingleStep) {  // Do not send event to RPi for single step
                 //tone(A2, 2000, 35);
             }
             else {
-                SendToRPi(RSP_FRAME_AVAILABLE, 0, 0, 0, 0);
+                SendToRPi(RSP_FRAME_AVAILABLE, LastFrameSteps, PT_SignalLevelRead);
             }
       
             FrameDetected = false;
@@ -947,31 +1004,62 @@ ScanResult scan(int UI_Command) {
     }
 }
 
-// ---- Receive I2C command from Raspberry PI, ScanFilm... and more ------------
+// ---- I2C events from Raspberry PI: Commands (ScanFilm... and more), and requests for responses ------------
+// RPi writes 3 bytes per command (command, param LSB, param MSB). To read responses it writes a single byte
+// (CMD_GET_CNT_STATUS) followed by a read of 5 bytes. The handler is called once per byte, in interrupt context.
 void receiveEvent(i2c_inst_t *i2c, i2c_slave_event_t event) {
-    int BytesToRead, IncomingIc, param = 0;
-
-    if (gpio == i2c0 && event == I2C_SLAVE_RECEIVE) {
-        BytesToRead = i2c_get_read_available();
-        if (BytesToRead >= 3) {   // Read at least three, otherwise wait for next
-            IncomingIc = i2c_read_byte_raw();
-            param = i2c_read_byte_raw();
-            param +=  256*i2c_read_byte_raw();
-            if (IncomingIc > 0) {
-                push(IncomingIc, param); // No error treatment for now
+    static uint8_t IncomingBytes[3];
+    static int BytesReceived = 0;
+    static int BytesSent = 0;
+
+    if (i2c != i2c_RPi)
+        return;
+
+    switch (event) {
+        case I2C_SLAVE_RECEIVE:
+            while (i2c_get_read_available(i2c) > 0) {
+                if (BytesReceived < 3)
+                    IncomingBytes[BytesReceived++] = i2c_read_byte_raw(i2c);
+                else
+                    i2c_read_byte_raw(i2c); // Discard extra bytes
             }
-        }
+            break;
+        case I2C_SLAVE_REQUEST:
+            if (BytesSent == 0)
+                sendEvent(i2c);     // Prepare next response
+            i2c_write_byte_raw(i2c, BufferForRPi[BytesSent < 5 ? BytesSent : 4]);
+            BytesSent++;
+            break;
+        case I2C_SLAVE_FINISH:  // Stop or restart
+            if (BytesReceived >= 3 && IncomingBytes[0] > 0)   // Less than 3 bytes: Register selection before a read
+                push_cmd(IncomingBytes[0], IncomingBytes[1] + 256*IncomingBytes[2]); // No error treatment for now
+            BytesReceived = 0;
+            BytesSent = 0;
+            break;
     }
 }
 
-// To be defined
-// -- Sending I2C command to Raspberry PI, take picture now -------
-// -- Sending I2C command to Raspberry PI, take picture now -------
-void sendEvent() {
-  Wire.write(BufferForRPi,9);
+// -- Prepare response for Raspberry PI (frame available, errors, etc), empty one (all zeroes) if none pending -------
+void sendEvent(i2c_inst_t *i2c) {
+    int cmd, p1, p2;
+    cmd = pop_rsp(&p1, &p2);
+    if (cmd != -1) {
+        BufferForRPi[0] = cmd;
+        BufferForRPi[1] = p1/256;
+        BufferForRPi[2] = p1%256;
+        BufferForRPi[3] = p2/256;
+        BufferForRPi[4] = p2%256;
+    }
+    else {
+        BufferForRPi[0] = 0;
+        BufferForRPi[1] = 0;
+        BufferForRPi[2] = 0;
+        BufferForRPi[3] = 0;
+        BufferForRPi[4] = 0;
+    }
 }
 
-boolean push(Queue * queue, int IncomingIc, int param, int param2) {
+boolean push(volatile Queue * queue, int IncomingIc, int param, int param2) {
     boolean retvalue = false;
     if ((queue -> in+1) % QUEUE_SIZE != queue -> out) {
         queue -> Data[queue -> in] = IncomingIc;
@@ -985,7 +1073,7 @@ boolean push(Queue * queue, int IncomingIc, int param, int param2) {
     return(retvalue);
 }
 
-int pop(Queue * queue, int * param, int * param2) {
+int pop(volatile Queue * queue, int * param, int * param2) {
     int retvalue = -1;  // default return value: -1 (error)
     if (queue -> out != queue -> in) {
         retvalue = queue -> Data[queue -> out];
@@ -1001,13 +1089,13 @@ int pop(Queue * queue, int * param, int * param2) {
 }
 
 boolean push_cmd(int cmd, int param) {
-    push(&CommandQueue, cmd, param, 0);
+    return(push(&CommandQueue, cmd, param, 0));
 }
 int pop_cmd(int * param) {
     return(pop(&CommandQueue, param, NULL));
 }
 boolean push_rsp(int rsp, int param, int param2) {
-    push(&ResponseQueue, rsp, param, param2);
+    return(push(&ResponseQueue, rsp, param, param2));
 }
 int pop_rsp(int * param, int * param2) {
     return(pop(&ResponseQueue, param, param2));
@@ -1036,7 +1124,7 @@ void DebugPrintAux(const char * str, unsigned long i) {
     }
 
     if (i != -1)
-        sprintf(PrintLine,"%s=%u",str,i);
+        sprintf(PrintLine,"%s=%lu",str,i);
     else
         strcpy(PrintLine,str);
   
@@ -1077,7 +1165,13 @@ void SerialPrintStr(const char * str) {
 }
 
 void SerialPrintInt(int i) {
-    if (DebugState != DebugInfo) printf(i);
+    if (DebugState != DebugInfo) printf("%i", i);
+}
+
+// I2C reserves some addresses for special purposes. We exclude these from the scan.
+// These are any addresses of the form 000 0xxx or 111 1xxx
+bool reserved_addr(uint8_t addr) {
+    return (addr & 0x78) == 0 || (addr & 0x78) == 0x78;
 }
 
 void scan_i2c() {
@@ -1101,7 +1195,7 @@ void scan_i2c() {
             if (reserved_addr(addr))
                 ret = PICO_ERROR_GENERIC;
             else
-                ret = i2c_read_blocking(i2c_instance, addr, &rxdata, 1, false);
+                ret = i2c_read_blocking(i2c_instance == 0 ? i2c0 : i2c1, addr, &rxdata, 1, false);
 
             printf(ret < 0 ? "." : "@");
             printf(addr % 16 == 15 ? "\n" : "  ");
@@ -456,11 +456,17 @@ void loop() {
                     PerforationThresholdAutoLevelRatio = param;
                 break;
             case CMD_SET_EXTRA_STEPS:
+                param = (int16_t)param;     // Negative values sent as 16 bit two's complement
                 DebugPrint(">BoostPT", param);
-                if (param >= 1 && param <= 30)  // Also to move up we add extra steps
+                // Absolute value (can be set on the fly by UI framing correction): Only one of both is active
+                if (param >= 0 && param <= 30) {  // Also to move up we add extra steps
                     FrameExtraSteps = param;
-                else if (param >= -30 && param <= -1)  // Manually force reduction of MinFrameSteps
+                    FrameDeductSteps = 0;
+                }
+                else if (param >= -30 && param <= -1) {  // Manually force reduction of MinFrameSteps
                     FrameDeductSteps = param;
+                    FrameExtraSteps = 0;
+                }
                 break;
             case CMD_SET_SCAN_SPEED:
                 DebugPrint(">Speed", param);
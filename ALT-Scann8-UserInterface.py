@@ -39,6 +39,7 @@ from tkinter import Label, Button, Frame, LabelFrame, Canvas, OptionMenu
 from PIL import ImageTk, Image, __version__ as PIL_Version
 
 import os
+import io
 import time
 import locale
 import json
@@ -50,15 +51,9 @@ import getopt
 
 import numpy as np
 
-try:
-    import psutil
-    check_disk_space = True
-except ImportError:
-    check_disk_space = False
-
 try:
     import smbus
-    from picamera2 import Picamera2, Preview
+    from picamera2 import Picamera2, Preview, MappedArray
     from libcamera import Transform
     from libcamera import controls
 
@@ -88,12 +83,29 @@ hw_panel_installed = False
 import threading
 import queue
 import cv2
-import re
 
 from camera_resolutions import CameraResolutions
 from dynamic_spinbox import DynamicSpinbox
 from tooltip import Tooltips
 from rolling_average import RollingAverage
+from frame_writer import FrameWriter
+from frame_container import FrameContainer, available_codecs
+from integrated_plotter import IntegratedPlotter
+from pt_recorder import PtRecorder
+from frame_registration import FrameRegistration
+from jpeg_encoder import create_encoder, available_encoders, benchmark_encoders, SUBSAMPLING_MODES
+from reel_manifest import ReelManifest
+from frame_scanner import FrameScanner
+from frame_layout import FrameLayout
+from storage_monitor import StorageMonitor
+from request_scheduler import RequestScheduler
+from hdr_engine import HdrEngine
+from tiled_fusion import TiledFusion
+from negative_processor import NegativeProcessor
+from color_pipeline import ColorPipeline
+from framing_controller import FramingController, offset_to_steps
+from scan_session import ScanSession, ControllerLink, FpmCounter
+from metrics_server import MetricsServer
 
 try:
     import rawpy
@@ -140,8 +152,6 @@ FastForwardErrorOutstanding = False
 FastForwardEndOutstanding = False
 ScanOngoing = False  # PlayState in original code from Torulf (opposite meaning)
 ScanStopRequested = False  # To handle stopping scan process asynchronously, with same button as start scan
-NewFrameAvailable = False  # To be set to true upon reception of Arduino event
-ScanProcessError = False  # To be set to true upon reception of Arduino event
 ScanProcessError_LastTime = 0
 # Directory where python scrips run, to store the json file with persistent data
 ScriptDir = os.path.dirname(os.path.realpath(__file__))
@@ -150,8 +160,30 @@ ConfigurationDataLoaded = False
 # Variables to deal with remaining disk space
 available_space_mb = 0
 disk_space_error_to_notify = False
+storage_monitor = None  # Tracks bytes written per frame, forecasts frames left in disk
+# PiCamera2 requests held while saving (DNG/PNG), capped below number of camera buffers
+request_scheduler = None
+CameraBufferCount = 4
+# Frame writer (atomic write of frame files, with fsync done in batches of FsyncInterval frames)
+frame_writer = None
+FsyncInterval = 10
+# Frame container, for file type 'raw' (uncompressed or LZ4/Zstandard compressed arrays, exported afterwards)
+frame_container = None
+RawCodec = 'none'
+# JPEG encoder used to save JPG frames ('auto' selects the fastest one available, by running a quick benchmark)
+jpeg_encoder = None
+JpegEncoderName = 'auto'
+JpegQuality = 95
+JpegSubsampling = '4:2:0'
+JpegOptimize = False
+# Frame layout: All frames in reel folder (default) or in subfolders of FrameShardSize frames
+frame_layout = FrameLayout()
+FrameShardSize = 0
+# Per-reel manifest (capture settings, size and CRC of each frame file)
+reel_manifest = None
+LastFrameSteps = 0  # Steps/PT level of frame being captured, reported by controller with RSP_FRAME_AVAILABLE,
+LastPtLevel = 0     # stored in manifest (0 if not reported)
 
-ArduinoTrigger = 0
 last_frame_time = 0
 reference_inactivity_delay = 6  # Max time (in sec) we wait for next frame. If expired, we force next frame again
 max_inactivity_delay = reference_inactivity_delay
@@ -169,8 +201,16 @@ num_threads = 0
 END_TOKEN = "TERMINATE_PROCESS"  # Sent on program closure, to allow threads to shut down cleanly
 IMAGE_TOKEN = "IMAGE_TOKEN"  # Queue element is an image
 REQUEST_TOKEN = "REQUEST_TOKEN"  # Queue element is a PiCamera2 request
+UI_UPDATE_TOKEN = "UI_UPDATE_TOKEN"  # Queue element is a UI update (function and arguments) to run in Tk thread
 MaxQueueSize = 16
 DisableThreads = False
+# Scan engine: Controller events polled by controller link thread, frames captured by scan session thread
+controller_link = None
+scan_session = None
+controller_event_queue = queue.Queue()  # All controller events, (event, param1, param2), to Tk thread
+# Frames captured by scan session, UI updates requested by it (UI_UPDATE_TOKEN) and END_TOKEN once stopped, to Tk thread
+scan_progress_queue = queue.Queue()
+scan_progress_after = 0
 FrameArrivalTime = 0
 # Ids to allow cancelling afters on exit
 onesec_after = 0
@@ -265,6 +305,23 @@ SimplifiedMode = False
 UIScrollbars = False
 DetectMisalignedFrames = True
 MisalignedFrameTolerance = 8
+# Closed-loop framing correction: Extra steps adjusted from the hole offset measured on captured frames
+framing_controller = FramingController()
+ClosedLoopFramingEnabled = False
+# Re-capture of misaligned frames: Checked on a strip of the frame before saving, film advanced and frame captured again
+RecaptureMisalignedFrames = False
+RecaptureSteps = 0      # Steps to advance before capturing current frame again (0: No re-capture required)
+RecaptureAttempts = 0   # Re-captures done for current frame
+MaxRecaptureAttempts = 2
+MaxRecaptureSteps = 40  # Max value accepted by controller for CMD_ADVANCE_FRAME_FRACTION
+recapture_counter = 0
+# Early frame advance: Next frame requested as soon as current one is exposed, instead of after it is processed
+EarlyFrameAdvance = False
+# Remote monitoring: Embedded HTTP server with scan metrics and latest preview, served from a snapshot
+metrics_server = None
+MetricsServerEnabled = False
+MetricsServerLan = False    # Accept connections from LAN (localhost only otherwise)
+MetricsServerPort = 8088
 FontSize = 0
 LoggingMode = "INFO"
 LogLevel = 20
@@ -286,6 +343,14 @@ AutoFrameStepsEnabled = True
 AutoPtLevelEnabled = True
 HdrBracketAuto = False
 HdrMergeInPlace = False
+HdrExposureCycling = False
+HdrAdaptiveBracket = False
+# Negative to positive conversion (lookup table), with optional orange mask removal for color negatives
+negative_processor = NegativeProcessor()
+OrangeMaskRemoval = False
+# Color correction (curves + matrix) applied at save time, settings read from reel folder or base folder
+color_pipeline = ColorPipeline()
+ColorPipelineActive = False
 MatchWaitMarginValue = 50
 StepsPerFrame = 250
 PtLevelValue = 200
@@ -316,13 +381,14 @@ id_AutoFrameStepsEnabled = 10
 id_ExposureWbAdaptPause = 11
 
 plotter_canvas = None
+integrated_plotter = None
+# PT signal recorded during scan (per reel), for offline analysis with PtSignalAnalyzer
+pt_recorder = PtRecorder()
+PtRecorderEnabled = False
+frame_registration = FrameRegistration()
+FrameRegistrationEnabled = False
 plotter_width = 20
 plotter_height = 10
-PrevPTValue = 0
-PrevThresholdLevel = 0
-PlotterWindowPos = 0
-MaxPT = 100
-MinPT = 800
 Tolerance_AE = 8000
 Tolerance_AWB = 1
 manual_exposure_value = 55
@@ -403,12 +469,11 @@ last_click_time = 0
 
 ALT_Scann8_controller_detected = False
 
-FPM_LastMinuteFrameTimes = list()
-FPM_StartTime = time.ctime()
+fpm_counter = FpmCounter()     # Simulated scan (scan session has its own)
 FPM_CalculatedValue = -1
 
 # *** HDR variables
-MergeMertens = None
+hdr_fusion = None   # Tiled Mertens fusion (HDR merge in place)
 images_to_merge = []
 # 4 iterations seem to be enough for exposure to catch up (started with 9, 4 gives same results, 3 is not enough)
 dry_run_iterations = 4
@@ -422,6 +487,7 @@ recalculate_hdr_exp_list = False
 force_adjust_hdr_bracket = False
 hdr_auto_bracket_frames = 8  # Every n frames, bracket is recalculated
 hdr_view_4_image = None
+hdr_engine = None   # Exposure changes without dry runs (waits for metadata with the requested exposure)
 # HDR Constants
 HDR_MIN_EXP = 1
 HDR_MAX_EXP = 1000
@@ -484,6 +550,8 @@ ConfigData = {
     "HdrBracketShift": 0,
     "HdrBracketAuto": HdrBracketAuto,
     "HdrMergeInPlace": HdrMergeInPlace,
+    "HdrExposureCycling": HdrExposureCycling,
+    "HdrAdaptiveBracket": HdrAdaptiveBracket,
     "FramesToGo": FramesToGo
 }
 
@@ -516,6 +584,8 @@ def exit_app(do_save):  # Exit Application
         win.after_cancel(onesec_after)
     if arduino_after != 0:
         win.after_cancel(arduino_after)
+    if scan_progress_after != 0:
+        win.after_cancel(scan_progress_after)
     # Terminate threads
     if not SimulatedRun and not CameraDisabled:
         capture_display_event.set()
@@ -529,6 +599,23 @@ def exit_app(do_save):  # Exit Application
             win.update()
             logging.debug(f"Waiting for threads to exit, {active_threads} pending")
             time.sleep(0.2)
+    # Make sure all frames written so far are synced to disk
+    if frame_writer is not None:
+        frame_writer.close()
+    if frame_container is not None:
+        frame_container.close()
+    pt_recorder.close()
+    frame_registration.close()
+    if metrics_server is not None:
+        metrics_server.stop()
+    if storage_monitor is not None:
+        storage_monitor.stop()
+    if hdr_engine is not None:
+        hdr_engine.stop()
+    if hdr_fusion is not None:
+        hdr_fusion.close()
+    if reel_manifest is not None:
+        reel_manifest.close()
 
     # Uncomment next two lines when running on RPi
     if not SimulatedRun:
@@ -787,6 +874,10 @@ def cmd_settings_popup_accept():
     global qr_code_frame
     global CapstanDiameter, capstan_diameter_float
     global ConfigData, BaseFolder
+    global FsyncInterval, FrameShardSize, OrangeMaskRemoval, ColorPipelineActive, RawCodec
+    global JpegEncoderName, JpegQuality, JpegSubsampling, JpegOptimize, PtRecorderEnabled, FrameRegistrationEnabled
+    global ClosedLoopFramingEnabled, RecaptureMisalignedFrames, EarlyFrameAdvance
+    global MetricsServerEnabled, MetricsServerLan
 
     ConfigData["PopupPos"] = options_dlg.geometry()
 
@@ -823,7 +914,7 @@ def cmd_settings_popup_accept():
             send_arduino_command(CMD_SET_MIN_FRAME_STEPS, 0)
             send_arduino_command(CMD_SET_FRAME_FINE_TUNE, FrameFineTuneValue)
             send_arduino_command(CMD_SET_SCAN_SPEED, ScanSpeedValue)
-            send_arduino_command(CMD_REPORT_PLOTTER_INFO, PlotterEnabled)
+            send_arduino_command(CMD_REPORT_PLOTTER_INFO, PlotterEnabled or PtRecorderEnabled)
     if UIScrollbars != ui_scrollbars.get():
         refresh_ui = True
         UIScrollbars = ui_scrollbars.get()
@@ -831,6 +922,56 @@ def cmd_settings_popup_accept():
     if MisalignedFrameTolerance != misaligned_tolerance_int.get():
         MisalignedFrameTolerance = misaligned_tolerance_int.get()
         ConfigData["MisalignedFrameTolerance"] = MisalignedFrameTolerance
+    if ClosedLoopFramingEnabled != closed_loop_framing_enabled.get():
+        ClosedLoopFramingEnabled = closed_loop_framing_enabled.get()
+        ConfigData["ClosedLoopFramingEnabled"] = ClosedLoopFramingEnabled
+        framing_controller.reset(FrameExtraStepsValue)
+    if RecaptureMisalignedFrames != recapture_misaligned_frames.get():
+        RecaptureMisalignedFrames = recapture_misaligned_frames.get()
+        ConfigData["RecaptureMisalignedFrames"] = RecaptureMisalignedFrames
+    if EarlyFrameAdvance != early_frame_advance.get():
+        EarlyFrameAdvance = early_frame_advance.get()
+        ConfigData["EarlyFrameAdvance"] = EarlyFrameAdvance
+    if MetricsServerEnabled != metrics_server_enabled.get() or MetricsServerLan != metrics_server_lan.get():
+        MetricsServerEnabled = metrics_server_enabled.get()
+        ConfigData["MetricsServerEnabled"] = MetricsServerEnabled
+        MetricsServerLan = metrics_server_lan.get()
+        ConfigData["MetricsServerLan"] = MetricsServerLan
+        setup_metrics_server()
+    if FsyncInterval != fsync_interval_int.get():
+        FsyncInterval = fsync_interval_int.get()
+        ConfigData["FsyncInterval"] = FsyncInterval
+        if frame_writer is not None:
+            frame_writer.set_fsync_interval(FsyncInterval)
+        if frame_container is not None:
+            frame_container.set_fsync_interval(FsyncInterval)
+    if OrangeMaskRemoval != orange_mask_removal.get():
+        OrangeMaskRemoval = orange_mask_removal.get()
+        ConfigData["OrangeMaskRemoval"] = OrangeMaskRemoval
+        negative_processor.set_orange_mask_removal(OrangeMaskRemoval)
+    if PtRecorderEnabled != pt_recorder_enabled.get():
+        PtRecorderEnabled = pt_recorder_enabled.get()
+        ConfigData["PtRecorderEnabled"] = PtRecorderEnabled
+        if not PtRecorderEnabled:
+            pt_recorder.close()
+        elif frame_writer.folder is not None:
+            pt_recorder.set_folder(frame_writer.folder)
+        if not SimulatedRun:
+            send_arduino_command(CMD_REPORT_PLOTTER_INFO, PlotterEnabled or PtRecorderEnabled)
+    if FrameRegistrationEnabled != frame_registration_enabled.get():
+        FrameRegistrationEnabled = frame_registration_enabled.get()
+        ConfigData["FrameRegistrationEnabled"] = FrameRegistrationEnabled
+        if not FrameRegistrationEnabled:
+            frame_registration.close()
+        elif frame_writer.folder is not None:
+            frame_registration.set_folder(frame_writer.folder)
+    if ColorPipelineActive != color_pipeline_active.get():
+        ColorPipelineActive = color_pipeline_active.get()
+        ConfigData["ColorPipelineActive"] = ColorPipelineActive
+        load_color_pipeline(frame_writer.folder)
+    if FrameShardSize != frame_shard_size_int.get():
+        FrameShardSize = frame_shard_size_int.get()
+        ConfigData["FrameShardSize"] = FrameShardSize
     if DisableToolTips != disable_tooltips.get():
         DisableToolTips = disable_tooltips.get()
         ConfigData["DisableToolTips"] = DisableToolTips
@@ -880,6 +1021,22 @@ def cmd_settings_popup_accept():
     if FileType != file_type_dropdown_selected.get():
         FileType = file_type_dropdown_selected.get()
         ConfigData["FileType"] = FileType
+    if (JpegEncoderName != jpeg_encoder_dropdown_selected.get() or JpegQuality != jpeg_quality_int.get() or
+            JpegSubsampling != jpeg_subsampling_dropdown_selected.get() or JpegOptimize != jpeg_optimize.get()):
+        JpegEncoderName = jpeg_encoder_dropdown_selected.get()
+        ConfigData["JpegEncoder"] = JpegEncoderName
+        JpegQuality = jpeg_quality_int.get()
+        ConfigData["JpegQuality"] = JpegQuality
+        JpegSubsampling = jpeg_subsampling_dropdown_selected.get()
+        ConfigData["JpegSubsampling"] = JpegSubsampling
+        JpegOptimize = jpeg_optimize.get()
+        ConfigData["JpegOptimize"] = JpegOptimize
+        setup_jpeg_encoder()
+    if RawCodec != raw_codec_dropdown_selected.get():
+        RawCodec = raw_codec_dropdown_selected.get()
+        ConfigData["RawCodec"] = RawCodec
+        if frame_container is not None:
+            frame_container.set_codec(RawCodec)
     if NewBaseFolder != BaseFolder:
         BaseFolder = NewBaseFolder
         ConfigData["BaseFolder"] = str(BaseFolder)
@@ -919,6 +1076,10 @@ def cmd_settings_popup():
     global NewBaseFolder
     global CapstanDiameter, capstan_diameter_float
     global misaligned_tolerance_label, misaligned_tolerance_spinbox, detect_misaligned_frames_btn
+    global fsync_interval_int, frame_shard_size_int, orange_mask_removal, color_pipeline_active
+    global raw_codec_dropdown_selected, pt_recorder_enabled, closed_loop_framing_enabled, recapture_misaligned_frames
+    global frame_registration_enabled, early_frame_advance, metrics_server_enabled, metrics_server_lan
+    global jpeg_encoder_dropdown_selected, jpeg_quality_int, jpeg_subsampling_dropdown_selected, jpeg_optimize
 
     # Make working copy of base folder
     NewBaseFolder = BaseFolder
@@ -975,6 +1136,49 @@ def cmd_settings_popup():
     as_tooltips.add(temp_in_fahrenheit_checkbox, "Display Raspberry Pi Temperature in Fahrenheit.")
     options_row += 1
 
+    # Orange mask removal for color negatives
+    orange_mask_removal = tk.BooleanVar(value=OrangeMaskRemoval)
+    orange_mask_removal_btn = tk.Checkbutton(options_dlg, variable=orange_mask_removal, onvalue=True, offvalue=False,
+                                             font=("Arial", FontSize - 1), text="Remove orange mask")
+    orange_mask_removal_btn.grid(row=options_row, column=0, columnspan=3, sticky="W")
+    as_tooltips.add(orange_mask_removal_btn, "When scanning color negatives, remove the orange mask of the film "
+                                             "base (measured on the first frame captured in each reel)")
+    options_row += 1
+
+    # Record PT signal during scan
+    pt_recorder_enabled = tk.BooleanVar(value=PtRecorderEnabled)
+    pt_recorder_enabled_btn = tk.Checkbutton(options_dlg, variable=pt_recorder_enabled, onvalue=True,
+                                             offvalue=False, font=("Arial", FontSize - 1),
+                                             text="Record PT signal")
+    pt_recorder_enabled_btn.grid(row=options_row, column=0, columnspan=3, sticky="W")
+    as_tooltips.add(pt_recorder_enabled_btn, "Record the phototransistor signal while scanning (file ALT-Scann8.pt.log "
+                                             "in reel folder), to tune perforation detection offline with "
+                                             "PtSignalAnalyzer")
+    options_row += 1
+
+    # Record sprocket hole position of each frame
+    frame_registration_enabled = tk.BooleanVar(value=FrameRegistrationEnabled)
+    frame_registration_enabled_btn = tk.Checkbutton(options_dlg, variable=frame_registration_enabled, onvalue=True,
+                                                    offvalue=False, font=("Arial", FontSize - 1),
+                                                    text="Record frame registration")
+    frame_registration_enabled_btn.grid(row=options_row, column=0, columnspan=3, sticky="W")
+    as_tooltips.add(frame_registration_enabled_btn, "Measure the position of the sprocket hole in each frame (sub-pixel, "
+                                                    "vertical and horizontal) and record it (file "
+                                                    "ALT-Scann8.registration.csv in reel folder), to stabilize frames "
+                                                    "offline with FrameStabilizer")
+    options_row += 1
+
+    # Color correction at save time
+    color_pipeline_active = tk.BooleanVar(value=ColorPipelineActive)
+    color_pipeline_active_btn = tk.Checkbutton(options_dlg, variable=color_pipeline_active, onvalue=True,
+                                               offvalue=False, font=("Arial", FontSize - 1),
+                                               text="Color correction at save time")
+    color_pipeline_active_btn.grid(row=options_row, column=0, columnspan=3, sticky="W")
+    as_tooltips.add(color_pipeline_active_btn, "Apply color correction (curves and color matrix from file "
+                                               "ALT-Scann8.color, in reel folder or base folder) to JPG and PNG "
+                                               "frames when saving them. DNG files are not modified")
+    options_row += 1
+
     # Display scrollbars
     ui_scrollbars = tk.BooleanVar(value=UIScrollbars)
     ui_scrollbars_btn = tk.Checkbutton(options_dlg, variable=ui_scrollbars, onvalue=True, offvalue=False,
@@ -993,6 +1197,87 @@ def cmd_settings_popup():
     misaligned_tolerance_spinbox.grid(row=options_row, column=1, sticky='W')
     options_row += 1
 
+    # Closed-loop framing correction
+    closed_loop_framing_enabled = tk.BooleanVar(value=ClosedLoopFramingEnabled)
+    closed_loop_framing_enabled_btn = tk.Checkbutton(options_dlg, variable=closed_loop_framing_enabled, onvalue=True,
+                                                     offvalue=False, font=("Arial", FontSize - 1),
+                                                     text="Automatic framing correction")
+    closed_loop_framing_enabled_btn.grid(row=options_row, column=0, columnspan=3, sticky="W")
+    as_tooltips.add(closed_loop_framing_enabled_btn, "Adjust extra steps automatically while scanning, using the "
+                                                     "position of the sprocket hole in captured frames, to correct "
+                                                     "framing drift along the reel (requires misaligned frame "
+                                                     "detection and automatic frame steps). Extra steps are kept "
+                                                     "between 0 and 30 (controller does not move the film back with "
+                                                     "negative values), so only drift requiring more steps per "
+                                                     "frame can be corrected")
+    options_row += 1
+
+    # Re-capture misaligned frames
+    recapture_misaligned_frames = tk.BooleanVar(value=RecaptureMisalignedFrames)
+    recapture_misaligned_frames_btn = tk.Checkbutton(options_dlg, variable=recapture_misaligned_frames, onvalue=True,
+                                                     offvalue=False, font=("Arial", FontSize - 1),
+                                                     text="Re-capture misaligned frames")
+    recapture_misaligned_frames_btn.grid(row=options_row, column=0, columnspan=3, sticky="W")
+    as_tooltips.add(recapture_misaligned_frames_btn, "Check frame alignment right after capture (before saving it). "
+                                                     "If the frame stopped short, advance the film the missing steps "
+                                                     "and capture it again (frames gone too far cannot be corrected, "
+                                                     "as the film cannot move backwards)")
+    options_row += 1
+
+    # Early frame advance
+    early_frame_advance = tk.BooleanVar(value=EarlyFrameAdvance)
+    early_frame_advance_btn = tk.Checkbutton(options_dlg, variable=early_frame_advance, onvalue=True,
+                                             offvalue=False, font=("Arial", FontSize - 1),
+                                             text="Advance film as soon as frame is exposed")
+    early_frame_advance_btn.grid(row=options_row, column=0, columnspan=3, sticky="W")
+    as_tooltips.add(early_frame_advance_btn, "Request the next frame as soon as the camera has delivered the current "
+                                             "one (last exposure for HDR), instead of after it has been displayed and "
+                                             "queued (or saved, if threads are disabled). Processing of each frame "
+                                             "then overlaps with film movement, increasing scan speed")
+    options_row += 1
+
+    # Remote monitoring
+    metrics_server_enabled = tk.BooleanVar(value=MetricsServerEnabled)
+    metrics_server_enabled_btn = tk.Checkbutton(options_dlg, variable=metrics_server_enabled, onvalue=True,
+                                                offvalue=False, font=("Arial", FontSize - 1),
+                                                text=f"Remote monitoring (HTTP port {MetricsServerPort})")
+    metrics_server_enabled_btn.grid(row=options_row, column=0, columnspan=3, sticky="W")
+    as_tooltips.add(metrics_server_enabled_btn, "Serve scan metrics (frames, speed, errors, queues, temperature, "
+                                                "disk space) in Prometheus format at /metrics and as JSON at "
+                                                "/metrics.json, and the latest preview frame at /preview.jpg")
+    options_row += 1
+    metrics_server_lan = tk.BooleanVar(value=MetricsServerLan)
+    metrics_server_lan_btn = tk.Checkbutton(options_dlg, variable=metrics_server_lan, onvalue=True,
+                                            offvalue=False, font=("Arial", FontSize - 1),
+                                            text="Allow remote monitoring from local network")
+    metrics_server_lan_btn.grid(row=options_row, column=0, columnspan=3, sticky="W", padx=(2*FontSize,0))
+    as_tooltips.add(metrics_server_lan_btn, "Accept monitoring connections from other computers in the local network "
+                                            "(only from this computer otherwise). No authentication is required")
+    options_row += 1
+
+    # Frames written between two disk syncs (10 by default)
+    fsync_interval_label = tk.Label(options_dlg, text="Frames per disk sync:", font=("Arial", FontSize-1))
+    fsync_interval_label.grid(row=options_row, column=0, columnspan=1, sticky='W', padx=(2*FontSize,0))
+    as_tooltips.add(fsync_interval_label, "Number of frames written to disk before forcing a sync (10 default). "
+                                          "Higher values reduce overhead with slow cards, 0 disables sync")
+    fsync_interval_int = tk.IntVar(value=FsyncInterval)
+    fsync_interval_spinbox = DynamicSpinbox(options_dlg, width=2, from_=0, to=100,
+                                      textvariable=fsync_interval_int, increment=1, font=("Arial", FontSize - 1))
+    fsync_interval_spinbox.grid(row=options_row, column=1, sticky='W')
+    options_row += 1
+
+    # Frames per subfolder (0 by default, all frames in reel folder)
+    frame_shard_size_label = tk.Label(options_dlg, text="Frames per subfolder:", font=("Arial", FontSize-1))
+    frame_shard_size_label.grid(row=options_row, column=0, columnspan=1, sticky='W', padx=(2*FontSize,0))
+    as_tooltips.add(frame_shard_size_label, "Store frames in subfolders of this many frames, with 6 digit numbering "
+                                            "(useful for very long reels). 0 stores all frames in the reel folder. "
+                                            "Applies to new reel folders only")
+    frame_shard_size_int = tk.IntVar(value=FrameShardSize)
+    frame_shard_size_spinbox = DynamicSpinbox(options_dlg, width=6, from_=0, to=100000,
+                                      textvariable=frame_shard_size_int, increment=1000, font=("Arial", FontSize - 1))
+    frame_shard_size_spinbox.grid(row=options_row, column=1, sticky='W')
+    options_row += 1
+
     # Font Size
     font_size_label = tk.Label(options_dlg, text="Main UI font size:", font=("Arial", FontSize-1))
     font_size_label.grid(row=options_row, column=0, columnspan=1, sticky='W', padx=(2*FontSize,0))
@@ -1037,7 +1322,7 @@ def cmd_settings_popup():
     # File format (JPG or PNG)
     # Drop down to select file type
     # Dropdown menu options
-    file_type_list = ["jpg", "png", "dng"]
+    file_type_list = ["jpg", "png", "dng", "raw"]
     file_type_dropdown_selected = tk.StringVar()
 
     # Target file type
@@ -1048,7 +1333,55 @@ def cmd_settings_popup():
     file_type_dropdown_selected.set(FileType)  # Set the initial value
     file_type_dropdown.grid(row=options_row, column=1, sticky='W')
     # file_type_dropdown.config(state=DISABLED)
-    as_tooltips.add(file_type_label, "Select format to safe film frames (JPG, PNG, DNG)")
+    as_tooltips.add(file_type_label, "Select format to safe film frames (JPG, PNG, DNG, or RAW to store uncompressed "
+                                     "frames in a container, to be exported later with RawFrameExporter)")
+
+    options_row += 1
+
+    # JPEG encoder (only encoders whose module is installed), and its settings
+    jpeg_encoder_dropdown_selected = tk.StringVar()
+    jpeg_encoder_label = Label(options_dlg, text='JPG encoder:', font=("Arial", FontSize-1))
+    jpeg_encoder_label.grid(row=options_row, column=0, sticky="W", padx=(2*FontSize,0))
+    jpeg_encoder_dropdown = OptionMenu(options_dlg, jpeg_encoder_dropdown_selected, *(['auto'] + available_encoders()))
+    jpeg_encoder_dropdown.config(takefocus=1, font=("Arial", FontSize-1))
+    jpeg_encoder_dropdown_selected.set(JpegEncoderName)
+    jpeg_encoder_dropdown.grid(row=options_row, column=1, sticky='W')
+    as_tooltips.add(jpeg_encoder_label, "Library used to encode JPG frames. 'auto' runs a quick benchmark at "
+                                        "startup and uses the fastest one available")
+    jpeg_subsampling_dropdown_selected = tk.StringVar()
+    jpeg_subsampling_dropdown = OptionMenu(options_dlg, jpeg_subsampling_dropdown_selected, *SUBSAMPLING_MODES)
+    jpeg_subsampling_dropdown.config(takefocus=1, font=("Arial", FontSize-1))
+    jpeg_subsampling_dropdown_selected.set(JpegSubsampling)
+    jpeg_subsampling_dropdown.grid(row=options_row, column=2, sticky='W')
+    as_tooltips.add(jpeg_subsampling_dropdown, "Chroma subsampling of JPG frames (4:4:4 keeps full color "
+                                               "resolution, 4:2:0 gives smaller and faster to encode files)")
+    options_row += 1
+
+    jpeg_quality_label = tk.Label(options_dlg, text="JPG quality:", font=("Arial", FontSize-1))
+    jpeg_quality_label.grid(row=options_row, column=0, columnspan=1, sticky='W', padx=(2*FontSize,0))
+    as_tooltips.add(jpeg_quality_label, "Quality of JPG frames (95 default)")
+    jpeg_quality_int = tk.IntVar(value=JpegQuality)
+    jpeg_quality_spinbox = DynamicSpinbox(options_dlg, width=3, from_=50, to=100,
+                                      textvariable=jpeg_quality_int, increment=1, font=("Arial", FontSize - 1))
+    jpeg_quality_spinbox.grid(row=options_row, column=1, sticky='W')
+    jpeg_optimize = tk.BooleanVar(value=JpegOptimize)
+    jpeg_optimize_btn = tk.Checkbutton(options_dlg, variable=jpeg_optimize, onvalue=True, offvalue=False,
+                                       font=("Arial", FontSize - 1), text="Optimize")
+    jpeg_optimize_btn.grid(row=options_row, column=2, sticky="W")
+    as_tooltips.add(jpeg_optimize_btn, "Optimized Huffman tables: Slightly smaller JPG files, slower to encode "
+                                       "(not supported by all encoders)")
+    options_row += 1
+
+    # Compression of frames stored as 'raw' (only codecs whose module is installed)
+    raw_codec_dropdown_selected = tk.StringVar()
+    raw_codec_label = Label(options_dlg, text='Raw compression:', font=("Arial", FontSize-1))
+    raw_codec_label.grid(row=options_row, column=0, sticky="W", padx=(2*FontSize,0))
+    raw_codec_dropdown = OptionMenu(options_dlg, raw_codec_dropdown_selected, *available_codecs())
+    raw_codec_dropdown.config(takefocus=1, font=("Arial", FontSize-1))
+    raw_codec_dropdown_selected.set(RawCodec if RawCodec in available_codecs() else 'none')
+    raw_codec_dropdown.grid(row=options_row, column=1, sticky='W')
+    as_tooltips.add(raw_codec_label, "Compression of frames saved as RAW (LZ4 and Zstandard available only if "
+                                     "the corresponding python module is installed)")
 
     options_row += 1
 
@@ -1274,18 +1607,30 @@ def cmd_set_existing_folder():
     if not NewDir:
         return
 
-    # Get number of files and highest frame number in selected folder
-    filecount = 0
-    last_frame = 0
-    for name in os.listdir(NewDir):
-        if os.path.isfile(os.path.join(NewDir, name)):
-            # Extract frame number using regular expression
-            frame_number = re.findall(r'\d+', name)
-            if len(frame_number) > 0:
-                last_frame = max(last_frame, int(frame_number[0]))  # Only one number in the filename, so we take the first
-                filecount += 1
-
-    NewCurrentFrame = get_last_frame_popup(last_frame)
+    # Get number of files, highest frame number and gaps in selected folder
+    curtime = time.time()
+    # With adaptive bracket, HDR frames are captured with a variable number of exposures
+    scan_result = FrameScanner(NewDir).scan(HdrAdaptiveBracket)
+    filecount = scan_result.filecount
+    last_frame = scan_result.last_frame
+    logging.debug(f"Existing folder scanned in {round((time.time() - curtime) * 1000, 1)} ms: {filecount} files, "
+                  f"last frame {last_frame}, last contiguous frame {scan_result.last_contiguous}")
+    if len(scan_result.gaps) > 0 or len(scan_result.unconfirmed) > 0 or len(scan_result.incomplete_hdr) > 0:
+        message = ""
+        if len(scan_result.gaps) > 0:
+            message += (f"{scan_result.gap_count()} frames missing before frame {last_frame} "
+                        f"({scan_result.gaps_str()}).\r\n")
+        if len(scan_result.incomplete_hdr) > 0:
+            message += f"{len(scan_result.incomplete_hdr)} HDR frames with missing sub-frames.\r\n"
+        if len(scan_result.unconfirmed) > 0:
+            message += (f"{len(scan_result.unconfirmed)} frames not confirmed as fully written "
+                        f"(first one is {scan_result.unconfirmed[0]}).\r\n")
+        message += f"Last frame with no gaps before is {scan_result.last_contiguous}."
+        logging.warning(message)
+        tk.messagebox.showwarning("Incomplete frame sequence", message)
+
+    # Propose last contiguous frame, user can still set a different one
+    NewCurrentFrame = get_last_frame_popup(scan_result.last_contiguous)
 
     if filecount > 0 and NewCurrentFrame < last_frame:
         confirm = tk.messagebox.askyesno(title='Files exist in target folder',
@@ -1414,6 +1759,20 @@ def cmd_frame_extra_steps_selection():
     send_arduino_command(CMD_SET_EXTRA_STEPS, FrameExtraStepsValue)
 
 
+def apply_framing_correction():
+    # Send extra steps calculated by closed-loop framing correction (if changed), before requesting next frame
+    global FrameExtraStepsValue
+    extra_steps = framing_controller.get_update(CurrentFrame)
+    if extra_steps is None:
+        return
+    logging.debug(f"Framing correction: Extra steps set to {extra_steps} (frame {CurrentFrame})")
+    FrameExtraStepsValue = extra_steps
+    ConfigData["FrameExtraSteps"] = FrameExtraStepsValue
+    if ExpertMode:
+        ui_update(frame_extra_steps_value.set, FrameExtraStepsValue)
+    send_arduino_command(CMD_SET_EXTRA_STEPS, FrameExtraStepsValue)
+
+
 def cmd_advance_movie(from_arduino=False):
     global AdvanceMovieActive
 
@@ -1573,7 +1932,8 @@ def fast_forward_loop():
 # *******************************************************************
 # ********************** Capture functions **************************
 # *******************************************************************
-def is_frame_centered(img, film_type ='S8', threshold=10, slice_width=10):
+def find_hole_offset(img, film_type='S8', slice_width=10):
+    # Returns vertical offset (pixels) of the sprocket hole center from the middle of the frame, None if not found
     # Get dimensions of the binary image
     height, width = img.shape
 
@@ -1589,9 +1949,6 @@ def is_frame_centered(img, film_type ='S8', threshold=10, slice_width=10):
     # Calculate the middle horizontal line
     middle = height // 2
 
-    # Calculate margin
-    margin = height*threshold//100
-
     # Sum along the width to get a 1D array representing white pixels at each height
     height_profile = np.sum(binary_img, axis=1)
     
@@ -1627,14 +1984,21 @@ def is_frame_centered(img, film_type ='S8', threshold=10, slice_width=10):
             bigger = end-start
             center = (start + end) // 2
             result = center
-    if result != 0:
-        if result >= middle - margin and result <= middle + margin:
-            return True, 0
-        elif result < middle - margin:
-            return False, -(middle - result)
-        elif result > middle + margin:
-            return False, result - middle
-    return False, -1
+    return int(result - middle) if result != 0 else None
+
+
+def is_offset_centered(offset, height, threshold=10):
+    # Returns (centered, align_offset) for a hole offset: align_offset is 0 if centered, -1 if hole not found
+    if offset is None:
+        return False, -1
+    margin = height*threshold//100
+    if abs(offset) <= margin:
+        return True, 0
+    return False, offset
+
+
+def is_frame_centered(img, film_type ='S8', threshold=10, slice_width=10):
+    return is_offset_centered(find_hole_offset(img, film_type, slice_width), img.shape[0], threshold)
 
 
 def is_frame_in_file_centered(image_path, film_type ='S8', threshold=10, slice_width=10):
@@ -1654,10 +2018,149 @@ def is_frame_in_file_centered(image_path, film_type ='S8', threshold=10, slice_w
     return is_frame_centered(img, film_type, threshold, slice_width)
 
 
-def reverse_image(image):
-    image_array = np.asarray(image)
-    image_array = np.negative(image_array)
-    return Image.fromarray(image_array)
+def frame_filename(frame_idx, hdr_idx):
+    return frame_layout.frame_filename(frame_idx, hdr_idx, FileType)
+
+
+def set_frame_folder(folder):
+    # Called for each capture, only does something when target folder changes
+    global frame_layout
+    if FileType == 'raw':
+        frame_container.set_folder(folder)  # Also when file type changed to 'raw' while in the same folder
+    if frame_writer.folder == folder:
+        return
+    layout = FrameLayout.load(folder)
+    if layout is None:
+        # Folder with frames captured using default layout (any file type): Keep it, do not mix layouts in the reel
+        if FrameShardSize > 0 and not FrameScanner(folder).has_frames():
+            layout = FrameLayout(FrameShardSize)
+            layout.save(folder)
+        else:
+            layout = FrameLayout()
+    frame_layout = layout
+    logging.debug(f"Frame layout for {folder}: {frame_layout.shard_size} frames per subfolder")
+    frame_writer.set_folder(folder)
+    set_reel_manifest_folder(folder)
+    hdr_engine.reset_stats()    # HDR statistics are per reel
+    negative_processor.reset()  # Film base measured again for each reel
+    load_color_pipeline(folder)
+    if PtRecorderEnabled:
+        pt_recorder.set_folder(folder)
+    if FrameRegistrationEnabled:
+        frame_registration.set_folder(folder)
+
+
+def load_color_pipeline(folder):
+    # Color settings specific to the reel take precedence over those in base folder
+    if ColorPipelineActive and folder is not None:
+        color_pipeline.load(folder, BaseFolder)
+    else:
+        color_pipeline.set_settings(None)
+
+
+def save_frame(frame_idx, hdr_idx, save_function, frame_info=None):
+    # save_function receives the path of a temporary file, renamed to the frame name once fully written
+    fullpath = frame_writer.write(frame_filename(frame_idx, hdr_idx), frame_idx, hdr_idx, save_function)
+    storage_monitor.add_file(hdr_idx, os.path.getsize(fullpath))
+    if reel_manifest is not None:
+        if frame_info is None:
+            frame_info = {}
+        reel_manifest.add_frame(frame_idx, hdr_idx, fullpath, frame_info.get('metadata'),
+                                frame_steps=frame_info.get('frame_steps'), pt_level=frame_info.get('pt_level'))
+    return fullpath
+
+
+def save_frame_image(frame_idx, hdr_idx, image, frame_info=None):
+    # PIL image: Color correction (if enabled), then saved as a file or, for file type 'raw', in the frame container
+    image = color_pipeline.process(image)
+    if FileType == 'jpg':
+        encoder = jpeg_encoder  # Might be replaced by startup benchmark in the meantime
+        return save_frame(frame_idx, hdr_idx, lambda path: encoder.save(image, path), frame_info)
+    elif FileType != 'raw':
+        return save_frame(frame_idx, hdr_idx, lambda path: image.save(path), frame_info)
+    chunk_path, size, crc = frame_container.write(frame_idx, hdr_idx, np.asarray(image))
+    storage_monitor.add_file(hdr_idx, size)
+    if reel_manifest is not None:
+        if frame_info is None:
+            frame_info = {}
+        reel_manifest.add_frame(frame_idx, hdr_idx, chunk_path, frame_info.get('metadata'),
+                                frame_steps=frame_info.get('frame_steps'), pt_level=frame_info.get('pt_level'),
+                                size=size, crc=crc)
+    return chunk_path
+
+
+def save_frame_request(frame_idx, hdr_idx, request, frame_info=None, image=None):
+    # Request saved from the main loop (threads disabled): DNG saved directly, PNG converted to a PIL image so that
+    # negative and color correction are applied as in the save threads
+    # image: Request already converted to a PIL image (and reversed if negative), if available
+    if FileType == 'dng':
+        return save_frame(frame_idx, hdr_idx, lambda path: request.save_dng(path), frame_info)
+    if image is None:
+        image = request.make_image('main')
+        if NegativeImage:
+            image = reverse_image(image, hdr_idx)
+    return save_frame_image(frame_idx, hdr_idx, image, frame_info)
+
+
+def setup_jpeg_encoder():
+    global jpeg_encoder
+    if JpegEncoderName == 'auto':
+        # PIL until benchmark completes, run in background to not delay startup
+        jpeg_encoder = create_encoder('pil', JpegQuality, JpegSubsampling, JpegOptimize)
+        threading.Thread(target=select_fastest_jpeg_encoder, daemon=True).start()
+    else:
+        jpeg_encoder = create_encoder(JpegEncoderName, JpegQuality, JpegSubsampling, JpegOptimize)
+        logging.info(f"JPEG encoder: {jpeg_encoder.name}")
+
+
+def select_fastest_jpeg_encoder():
+    global jpeg_encoder
+    fastest, results = benchmark_encoders(JpegQuality, JpegSubsampling, JpegOptimize)
+    logging.info(f"JPEG encoder benchmark (ms per frame): {results}, fastest is {fastest}")
+    if JpegEncoderName == 'auto':  # Settings might have changed while running the benchmark
+        jpeg_encoder = create_encoder(fastest, JpegQuality, JpegSubsampling, JpegOptimize)
+
+
+def frame_capture_info(metadata):
+    # Information stored in the reel manifest, collected when the frame is captured (not when saved)
+    return {'metadata': metadata,
+            'frame_steps': LastFrameSteps if LastFrameSteps > 0 else StepsPerFrame,
+            'pt_level': LastPtLevel if LastPtLevel > 0 else PtLevelValue}
+
+
+def capture_image_and_metadata(on_exposed=None):
+    """
+    Same as camera.capture_image("main"), also returning the metadata of the captured frame.
+    on_exposed(request) is called before converting the frame, (None, None) returned if it returns False.
+    """
+    request = request_scheduler.capture_request()
+    try:
+        if on_exposed is not None and not on_exposed(request):
+            return None, None
+        return request.make_image('main'), request.get_metadata()
+    finally:
+        request_scheduler.release(request)
+
+
+def set_reel_manifest_folder(folder):
+    global reel_manifest
+    if reel_manifest is not None:
+        if reel_manifest.folder == folder:
+            return
+        reel_manifest.close()
+    try:
+        reel_manifest = ReelManifest(folder)
+    except Exception as e:
+        logging.error(f"Cannot open reel manifest in {folder}: {e}")
+        reel_manifest = None
+
+
+def reverse_image(image, hdr_idx=0):
+    # Single lookup table pass (255 - x, plus orange mask removal if enabled). Film base measured on a normal frame
+    # or on the middle exposure of an HDR one
+    if hdr_idx == 0 or hdr_idx == hdr_middle_index():
+        negative_processor.calibrate(image)
+    return negative_processor.process(image)
 
 
 def capture_display_thread(queue, event, id):
@@ -1678,6 +2181,10 @@ def capture_display_thread(queue, event, id):
         curframe = message[2]
         hdr_idx = message[3]
 
+        server = metrics_server
+        if server is not None and hdr_idx <= 1 and server.preview_due():
+            server.set_preview(preview_jpeg(image))
+
         # If too many items in queue the skip display
         if (MaxQueueSize - queue.qsize() <= 5):
             logging.warning("Display queue almost full: Skipping frame display")
@@ -1688,6 +2195,23 @@ def capture_display_thread(queue, event, id):
     logging.debug("Exiting capture_display_thread")
 
 
+def check_frame_alignment(captured_image, frame_idx):
+    # Misaligned frame check (grayscale array), also feeding closed-loop framing correction. Returns align offset
+    global scan_error_counter
+
+    hole_offset = find_hole_offset(captured_image, FilmType)
+    centered, align_offset = is_offset_centered(hole_offset, captured_image.shape[0], MisalignedFrameTolerance)
+    if not centered:
+        scan_error_counter += 1
+        scan_error_counter_value.set(f"{scan_error_counter} ({scan_error_counter*100/scan_error_total_frames_counter:.1f}%)")
+        with open(scan_error_log_fullpath, 'a') as f:
+            f.write(f"Misaligned frame, {CurrentFrame}\n")
+    if ClosedLoopFramingEnabled and AutoFrameStepsEnabled:
+        framing_controller.add_offset(frame_idx, hole_offset, captured_image.shape[0],
+                                      LastFrameSteps if LastFrameSteps > 0 else StepsPerFrame)
+    return align_offset
+
+
 def capture_save_thread(queue, event, id):
     global ScanStopRequested
     global active_threads
@@ -1708,6 +2232,7 @@ def capture_save_thread(queue, event, id):
         is_dng = FileType == 'dng'
         # Extract info from message
         type = message[0]
+        request = None
         if type == REQUEST_TOKEN:
             request = message[1]
         elif type == IMAGE_TOKEN:
@@ -1720,54 +2245,60 @@ def capture_save_thread(queue, event, id):
             logging.error(f"Invalid message type received: {type}")
         frame_idx = message[2]
         hdr_idx = message[3]
-        if is_dng:
-            # Saving DNG implies passing a request, not an image, therefore no additional checks (no negative allowed)
-            if hdr_idx > 1:  # Hdr frame 1 has standard filename
-                request.save_dng(HdrFrameFilenamePattern % (frame_idx, hdr_idx, FileType))
-            else:  # Non HDR
-                request.save_dng(FrameFilenamePattern % (frame_idx, FileType))
-                if DetectMisalignedFrames and can_check_dng_frames_for_misalignment:
-                    captured_image = request.make_array('main')[:,:,0]
-            request.release()   # Release request ASAP (delay frame alignment check)
-            if DetectMisalignedFrames and can_check_dng_frames_for_misalignment and hdr_idx <= 1:
-                if not is_frame_centered(captured_image, FilmType, MisalignedFrameTolerance)[0]:
-                    scan_error_counter += 1
-                    scan_error_counter_value.set(f"{scan_error_counter} ({scan_error_counter*100/scan_error_total_frames_counter:.1f}%)")
-                    with open(scan_error_log_fullpath, 'a') as f:
-                        f.write(f"Misaligned frame, {CurrentFrame}\n")
-            logging.debug("Thread %i saved request DNG image: %s ms", id,
-                          str(round((time.time() - curtime) * 1000, 1)))
-        else:
-            # If not is_dng AND negative_image AND request: Convert to image now, and do a PIL save
-            if not NegativeImage and type == REQUEST_TOKEN:
-                if hdr_idx > 1:  # Hdr frame 1 has standard filename
-                    request.save('main',
-                                 HdrFrameFilenamePattern % (frame_idx, hdr_idx, FileType))
-                else:  # Non HDR
-                    request.save('main', FrameFilenamePattern % (frame_idx, FileType))
-                    if DetectMisalignedFrames:
-                        captured_image = request.make_array('main')[:,:,0]
-                request.release()
-                logging.debug("Thread %i saved request image: %s ms", id,
+        frame_info = message[4] if len(message) > 4 else None
+        align_offset = None
+        gray_image = None   # Grayscale array of non-HDR frames, for alignment check and registration
+        need_gray_image = hdr_idx <= 1 and (DetectMisalignedFrames or FrameRegistrationEnabled)
+        try:
+            if is_dng:
+                # Saving DNG implies passing a request, not an image, therefore no additional checks
+                # (no negative allowed)
+                save_frame(frame_idx, hdr_idx, lambda path: request.save_dng(path), frame_info)
+                if need_gray_image and can_check_dng_frames_for_misalignment:
+                    gray_image = request.make_array('main')[:,:,0]
+                request_scheduler.release(request)   # Release request ASAP (delay frame alignment check)
+                request = None
+                if DetectMisalignedFrames and gray_image is not None:
+                    align_offset = check_frame_alignment(gray_image, frame_idx)
+                logging.debug("Thread %i saved request DNG image: %s ms", id,
                               str(round((time.time() - curtime) * 1000, 1)))
             else:
-                if hdr_idx > 1:  # Hdr frame 1 has standard filename
-                    logging.debug("Saving HDR frame n.%i", hdr_idx)
-                    captured_image.save(
-                        HdrFrameFilenamePattern % (frame_idx, hdr_idx, FileType), quality=95)
+                # If not is_dng AND (negative_image OR color correction) AND request: Convert to image now,
+                # and do a PIL save
+                if not NegativeImage and not color_pipeline.is_active() and type == REQUEST_TOKEN:
+                    save_frame(frame_idx, hdr_idx, lambda path: request.save('main', path), frame_info)
+                    if need_gray_image:
+                        gray_image = request.make_array('main')[:,:,0]
+                    request_scheduler.release(request)
+                    request = None
+                    logging.debug("Thread %i saved request image: %s ms", id,
+                                  str(round((time.time() - curtime) * 1000, 1)))
                 else:
-                    captured_image.save(FrameFilenamePattern % (frame_idx, FileType),
-                                        quality=95)
-                    # Once the PIL Image has been saved, convert it to an array, as expected by is_frame_centered
-                    captured_image = np.array(captured_image.convert('L'))
-                logging.debug("Thread %i saved image: %s ms", id,
-                              str(round((time.time() - curtime) * 1000, 1)))
-            if DetectMisalignedFrames and hdr_idx <= 1 and not is_frame_centered(captured_image, FilmType, MisalignedFrameTolerance)[0]:
-                scan_error_counter += 1
-                scan_error_counter_value.set(f"{scan_error_counter} ({scan_error_counter*100/scan_error_total_frames_counter:.1f}%)")
-                with open(scan_error_log_fullpath, 'a') as f:
-                    f.write(f"Misaligned frame, {CurrentFrame}\n")
-            logging.debug("Thread %i after checking misaligned frames", id)
+                    if type == REQUEST_TOKEN:
+                        # Negative or color correction (PNG): Conversion done here, out of the capture loop
+                        captured_image = request.make_image('main')
+                        if NegativeImage:
+                            captured_image = reverse_image(captured_image, hdr_idx)
+                        request_scheduler.release(request)
+                        request = None
+                    if hdr_idx > 1:  # Hdr frame 1 has standard filename
+                        logging.debug("Saving HDR frame n.%i", hdr_idx)
+                    save_frame_image(frame_idx, hdr_idx, captured_image, frame_info)
+                    if need_gray_image:
+                        # Once the PIL Image has been saved, convert it to an array, as expected by is_frame_centered
+                        gray_image = np.array(captured_image.convert('L'))
+                    logging.debug("Thread %i saved image: %s ms", id,
+                                  str(round((time.time() - curtime) * 1000, 1)))
+                if DetectMisalignedFrames and gray_image is not None:
+                    align_offset = check_frame_alignment(gray_image, frame_idx)
+                logging.debug("Thread %i after checking misaligned frames", id)
+        finally:
+            if request is not None:    # Not released yet (save failed): Free its slot, or capture would block
+                request_scheduler.release(request)
+        if FrameRegistrationEnabled and gray_image is not None:
+            frame_registration.add_frame(frame_idx, gray_image, FilmType)
+        if align_offset is not None and reel_manifest is not None:
+            reel_manifest.set_align_offset(frame_idx, hdr_idx, align_offset)
         aux = time.time() - curtime
         total_wait_time_save_image += aux
         time_save_image.add_value(aux)
@@ -1852,12 +2383,9 @@ def update_rpi_temp():
 def disk_space_available():
     global available_space_mb, disk_space_error_to_notify
 
-    if not check_disk_space:
-        return True
-    disk_usage = psutil.disk_usage(CurrentDir)
-    available_space_mb = disk_usage.free / (1024 ** 2)
-
-    if available_space_mb < 500:
+    # Free space is checked by storage monitor thread, here we only read the result
+    if storage_monitor.space_exhausted():
+        available_space_mb = storage_monitor.free_mb()
         logging.debug(f"Disk space running out, only {available_space_mb} MB available")
         disk_space_error_to_notify = True
         return False
@@ -1865,6 +2393,74 @@ def disk_space_available():
         return True
 
 
+def pending_save_files():
+    # Save queue only exists when running with camera
+    if SimulatedRun or CameraDisabled:
+        return 0
+    return capture_save_queue.qsize()
+
+
+def setup_metrics_server():
+    # Starts, stops or restarts (address changed) remote monitoring server as per current settings
+    global metrics_server
+    if metrics_server is not None:
+        metrics_server.stop()
+        metrics_server = None
+    if MetricsServerEnabled:
+        server = MetricsServer('0.0.0.0' if MetricsServerLan else '127.0.0.1', MetricsServerPort)
+        if server.start():
+            server.update(metrics_snapshot())
+            metrics_server = server
+
+
+def rolling_average_ms(average):
+    value = average.get_average() if average is not None else None
+    return round(value * 1000, 1) if value is not None else 0
+
+
+def metrics_snapshot():
+    # Scan metrics for remote monitoring. Called from scan session thread as well, so no Tk access here
+    session = scan_session
+    scanning = ScanOngoing and session is not None
+    has_queues = not SimulatedRun and not CameraDisabled
+    return {'scan_ongoing': ScanOngoing,
+            'current_frame': session.state.current_frame if scanning else CurrentFrame,
+            'session_frames': session.state.session_frames if scanning else session_frames,
+            'frames_per_minute': session.state.fpm if scanning else FPM_CalculatedValue,
+            'scan_errors': session.state.scan_errors if session is not None else 0,
+            'misaligned_frames': scan_error_counter,
+            'save_queue_depth': pending_save_files(),
+            'display_queue_depth': capture_display_queue.qsize() if has_queues else 0,
+            'time_save_image_ms': rolling_average_ms(time_save_image),
+            'time_preview_display_ms': rolling_average_ms(time_preview_display),
+            'time_awb_ms': rolling_average_ms(time_awb),
+            'time_autoexp_ms': rolling_average_ms(time_autoexp),
+            'rpi_temperature_celsius': RPiTemp,
+            'free_disk_mb': round(storage_monitor.free_mb()) if storage_monitor is not None else 0}
+
+
+def preview_jpeg(image, width=640):
+    # Reduced JPEG copy of a preview image (PIL), for remote monitoring
+    thumbnail = image.resize((width, int(image.height * width / image.width)))
+    data = io.BytesIO()
+    thumbnail.convert('RGB').save(data, format='JPEG', quality=80)
+    return data.getvalue()
+
+
+def refresh_storage_forecast():
+    frames_left = storage_monitor.get_frames_left()
+    if frames_left is None:
+        disk_frames_left_str.set('')
+        disk_time_left_str.set('')
+        return
+    disk_frames_left_str.set(f"{frames_left}" if frames_left < 100000 else f"{frames_left // 1000}k")
+    minutes_left = storage_monitor.get_minutes_left(FramesPerMinute)
+    if minutes_left is None:
+        disk_time_left_str.set('')
+    else:
+        disk_time_left_str.set(f"{(minutes_left // 60):02}h {(minutes_left % 60):02}m")
+
+
 def cmd_switch_hdr_capture():
     global HdrCaptureActive
     global max_inactivity_delay
@@ -2003,27 +2599,8 @@ def cmd_set_r8():
 
 
 def register_frame():
-    global FPM_StartTime
     global FPM_CalculatedValue
-
-    # Get current time
-    frame_time = time.time()
-    # Determine if we should start new count (last capture older than 5 seconds)
-    if len(FPM_LastMinuteFrameTimes) == 0 or FPM_LastMinuteFrameTimes[-1] < frame_time - 5:
-        FPM_StartTime = frame_time
-        FPM_LastMinuteFrameTimes.clear()
-        FPM_CalculatedValue = -1
-    # Add current time to list
-    FPM_LastMinuteFrameTimes.append(frame_time)
-    # Remove entries older than one minute
-    FPM_LastMinuteFrameTimes.sort()
-    while FPM_LastMinuteFrameTimes[0] <= frame_time - 60:
-        FPM_LastMinuteFrameTimes.remove(FPM_LastMinuteFrameTimes[0])
-    # Calculate current value, only if current count has been going for more than 10 seconds
-    if frame_time - FPM_StartTime > 60:  # no calculations needed, frames in list are all in the last 60 seconds
-        FPM_CalculatedValue = len(FPM_LastMinuteFrameTimes)
-    elif frame_time - FPM_StartTime > 10:  # some  calculations needed if less than 60 sec
-        FPM_CalculatedValue = int((len(FPM_LastMinuteFrameTimes) * 60) / (frame_time - FPM_StartTime))
+    FPM_CalculatedValue = fpm_counter.add_frame()
 
 
 def cmd_adjust_hdr_bracket_auto():
@@ -2047,6 +2624,26 @@ def cmd_adjust_merge_in_place():
     ConfigData["HdrMergeInPlace"] = HdrMergeInPlace
 
 
+def cmd_adjust_exposure_cycling():
+    global HdrExposureCycling
+
+    if not HdrCaptureActive:
+        return
+
+    HdrExposureCycling = hdr_exposure_cycling.get()
+    ConfigData["HdrExposureCycling"] = HdrExposureCycling
+
+
+def cmd_adjust_adaptive_bracket():
+    global HdrAdaptiveBracket
+
+    if not HdrCaptureActive:
+        return
+
+    HdrAdaptiveBracket = hdr_adaptive_bracket.get()
+    ConfigData["HdrAdaptiveBracket"] = HdrAdaptiveBracket
+
+
 def adjust_hdr_bracket():
     global recalculate_hdr_exp_list
     global hdr_best_exp, HdrMinExp
@@ -2059,13 +2656,14 @@ def adjust_hdr_bracket():
 
     if SimulatedRun or CameraDisabled:
         aux_current_exposure = 20
+    elif hdr_engine.calibrated_exposure is not None:
+        # Calculated in background from the middle exposure of the frames already captured, no capture needed
+        aux_current_exposure = int(hdr_engine.calibrated_exposure / 1000)
     else:
+        # No frame captured yet to calibrate from: Use camera auto exposure
         camera.set_controls({"AeEnable": True})
-        for i in range(1, dry_run_iterations * 2):
-            camera.capture_image("main")
-
-        # Since we are in auto exposure mode, retrieve current value to start from there
-        metadata = camera.capture_metadata()
+        # Since we are in auto exposure mode, retrieve current value (once stable) to start from there
+        metadata = hdr_engine.wait_ae_settled()
         aux_current_exposure = int(metadata["ExposureTime"] / 1000)
         camera.set_controls({"AeEnable": AutoExpEnabled})
 
@@ -2076,8 +2674,8 @@ def adjust_hdr_bracket():
         PreviousCurrentExposure = aux_current_exposure
         hdr_best_exp = aux_current_exposure
         HdrMinExp = max(hdr_best_exp - int(HdrBracketWidth / 2), HdrMinExp)
-        hdr_min_exp_value.set(HdrMinExp)
-        hdr_max_exp_value.set(HdrMinExp + HdrBracketWidth)
+        ui_update(hdr_min_exp_value.set, HdrMinExp)
+        ui_update(hdr_max_exp_value.set, HdrMinExp + HdrBracketWidth)
         ConfigData["HdrMinExp"] = HdrMinExp
         ConfigData["HdrMaxExp"] = HdrMaxExp
         recalculate_hdr_exp_list = True
@@ -2115,81 +2713,244 @@ def capture_hdr(mode):
         idx_inc = -1
     is_dng = FileType == 'dng'
     is_png = FileType == 'png'
-    for exp in work_list:
-        exp = max(1, exp + HdrBracketShift)  # Apply bracket shift
-        logging.debug("capture_hdr: exp %.2f", exp)
-        if perform_dry_run:
-            camera.set_controls({"ExposureTime": int(exp * 1000)})
-        else:
-            time.sleep(StabilizationDelayValue/1000)  # Allow time to stabilize image only if no dry run
-        if perform_dry_run:
-            for i in range(1, dry_run_iterations):  # Perform a few dummy captures to allow exposure stabilization
-                camera.capture_image("main")
-        # We skip dry run only for the first capture of each frame,
-        # as it is the same exposure as the last capture of the previous one
-        perform_dry_run = True
-        # For PiCamera2, preview and save to file are handled in asynchronous threads
-        if HdrMergeInPlace and not is_dng:  # For now we do not even try to merge DNG images in place
-            captured_image = camera.capture_image("main")  # If merge in place, Capture snapshot (no DNG allowed)
-            # Convert Pillow image to NumPy array
-            img_np = np.array(captured_image)
-            # Convert the NumPy array to a format suitable for MergeMertens (e.g., float32)
-            img_np_float32 = img_np.astype(np.float32)
-            images_to_merge.append(img_np_float32)  # Add frame
-        else:
-            if is_dng or is_png:  # If not using DNG we can still use multithread (if not disabled)
-                # DNG + HDR, save threads not possible due to request conflicting with retrieve metadata
-                request = camera.capture_request(capture_config)
-                if CurrentFrame % PreviewModuleValue == 0:
-                    captured_image = request.make_image('main')
-                    # Display preview using thread, not directly
-                    queue_item = tuple((IMAGE_TOKEN, captured_image, CurrentFrame, idx))
-                    capture_display_queue.put(queue_item)
-                curtime = time.time()
-                if idx > 1:  # Hdr frame 1 has standard filename
-                    request.save_dng(HdrFrameFilenamePattern % (CurrentFrame, idx, FileType))
-                else:  # Non HDR
-                    request.save_dng(FrameFilenamePattern % (CurrentFrame, FileType))
-                request.release()
-                logging.debug(f"Capture hdr, saved request image ({CurrentFrame}, {idx}: "
-                              f"{round((time.time() - curtime) * 1000, 1)}")
+    # List of (exposure, hdr index), hdr index being the position of the exposure in the ascending list (1 based)
+    hdr_items = [(exp, idx + i * idx_inc) for i, exp in enumerate(work_list)]
+    if HdrAdaptiveBracket:
+        # Skip exposures not needed according to the middle exposure of the previous frame
+        selected = hdr_engine.select_exposures(hdr_num_exposures)
+        hdr_items = [(exp, idx) for exp, idx in hdr_items if idx - 1 in selected]
+    if HdrExposureCycling:
+        capture_hdr_cycle(mode, hdr_items)
+    else:
+        for position, (exp, idx) in enumerate(hdr_items):
+            last_exposure = position == len(hdr_items) - 1
+            base_exp = exp  # Exposure without bracket shift, bracket calibration is relative to it
+            exp = max(1, exp + HdrBracketShift)  # Apply bracket shift
+            logging.debug("capture_hdr: exp %.2f", exp)
+            # Wait also if exposure differs from last one set (adaptive bracket might have skipped it)
+            if perform_dry_run or int(exp * 1000) != hdr_engine.last_exposure:
+                # Instead of dummy captures, wait for a frame with the requested exposure (checking metadata only)
+                hdr_engine.set_exposure(int(exp * 1000))
             else:
-                captured_image = camera.capture_image("main")
-                if NegativeImage:
-                    captured_image = reverse_image(captured_image)
-                if DisableThreads:  # Save image in main loop
-                    curtime = time.time()
-                    draw_preview_image(captured_image, CurrentFrame, idx)
-                    if idx > 1:  # Hdr frame 1 has standard filename
-                        captured_image.save(
-                            HdrFrameFilenamePattern % (CurrentFrame, idx, FileType))
-                    else:
-                        captured_image.save(FrameFilenamePattern % (CurrentFrame, FileType))
-                    logging.debug(f"Capture hdr, saved image ({CurrentFrame}, {idx}): "
-                                  f"{round((time.time() - curtime) * 1000, 1)} ms")
-                else:  # send image to threads
-                    if mode == 'normal' or mode == 'manual':  # Do not save in preview mode, only display
-                        # In HDR we cannot really pass a request to the thread since it will interfere with the
-                        # dry run captures done in the main capture loop. Maybe with synchronization it could be
-                        # made to work, but then the small advantage offered by threads would be lost
+                time.sleep(StabilizationDelayValue/1000)  # Allow time to stabilize image only if no dry run
+            # We skip dry run only for the first capture of each frame,
+            # as it is the same exposure as the last capture of the previous one
+            perform_dry_run = True
+            # For PiCamera2, preview and save to file are handled in asynchronous threads
+            if HdrMergeInPlace and not is_dng:  # For now we do not even try to merge DNG images in place
+                captured_image = camera.capture_image("main")  # If merge in place, Capture snapshot (no DNG allowed)
+                if last_exposure:
+                    frame_exposed(mode)     # Merge done while film moves to next frame
+                if hdr_reference_required(idx):
+                    hdr_engine.submit_reference(captured_image, int(exp * 1000), int(base_exp * 1000))
+                # Convert Pillow image to NumPy array
+                img_np = np.array(captured_image)
+                # Convert the NumPy array to a format suitable for MergeMertens (e.g., float32)
+                img_np_float32 = img_np.astype(np.float32)
+                images_to_merge.append(img_np_float32)  # Add frame
+            else:
+                if is_dng or is_png:  # If not using DNG we can still use multithread (if not disabled)
+                    # DNG + HDR: Request scheduler keeps enough camera buffers free for the next exposures, so
+                    # requests can be saved by the save threads while capture continues
+                    request = request_scheduler.capture_request()
+                    if last_exposure:
+                        frame_exposed(mode)
+                    if hdr_reference_required(idx):
+                        hdr_engine.submit_reference(request.make_array('main'), int(exp * 1000), int(base_exp * 1000))
+                    if CurrentFrame % PreviewModuleValue == 0:
+                        captured_image = request.make_image('main')
+                        if NegativeImage:   # PNG only (negative not allowed with DNG)
+                            captured_image = reverse_image(captured_image, idx)
+                        # Display preview using thread, not directly
                         queue_item = tuple((IMAGE_TOKEN, captured_image, CurrentFrame, idx))
-                        if CurrentFrame % PreviewModuleValue == 0:
-                            # Display preview using thread, not directly
-                            capture_display_queue.put(queue_item)
-                        capture_save_queue.put(queue_item)
-                        logging.debug(f"Queueing hdr image ({CurrentFrame}, {idx})")
-        idx += idx_inc
+                        capture_display_queue.put(queue_item)
+                    if DisableThreads:  # Save request in main loop
+                        curtime = time.time()
+                        save_frame_request(CurrentFrame, idx, request, frame_capture_info(request.get_metadata()))
+                        request_scheduler.release(request)
+                        logging.debug(f"Capture hdr, saved request image ({CurrentFrame}, {idx}: "
+                                      f"{round((time.time() - curtime) * 1000, 1)}")
+                    elif mode == 'normal' or mode == 'manual':  # Do not save in preview mode, only display
+                        save_queue_item = tuple((REQUEST_TOKEN, request, CurrentFrame, idx,
+                                                 frame_capture_info(request.get_metadata())))
+                        capture_save_queue.put(save_queue_item)
+                        logging.debug(f"Queueing hdr request ({CurrentFrame}, {idx})")
+                    else:
+                        request_scheduler.release(request)
+                else:
+                    captured_image, metadata = capture_image_and_metadata(
+                        lambda request: frame_exposed(mode) if last_exposure else True)
+                    if hdr_reference_required(idx):
+                        hdr_engine.submit_reference(captured_image, int(exp * 1000), int(base_exp * 1000))
+                    if NegativeImage:
+                        captured_image = reverse_image(captured_image, idx)
+                    if DisableThreads:  # Save image in main loop
+                        curtime = time.time()
+                        ui_update(draw_preview_image, captured_image, CurrentFrame, idx)
+                        save_frame_image(CurrentFrame, idx, captured_image, frame_capture_info(metadata))
+                        logging.debug(f"Capture hdr, saved image ({CurrentFrame}, {idx}): "
+                                      f"{round((time.time() - curtime) * 1000, 1)} ms")
+                    else:  # send image to threads
+                        if mode == 'normal' or mode == 'manual':  # Do not save in preview mode, only display
+                            # In HDR we cannot really pass a request to the thread since it will interfere with the
+                            # dry run captures done in the main capture loop. Maybe with synchronization it could be
+                            # made to work, but then the small advantage offered by threads would be lost
+                            queue_item = tuple((IMAGE_TOKEN, captured_image, CurrentFrame, idx,
+                                                frame_capture_info(metadata)))
+                            if CurrentFrame % PreviewModuleValue == 0:
+                                # Display preview using thread, not directly
+                                capture_display_queue.put(queue_item)
+                            capture_save_queue.put(queue_item)
+                            logging.debug(f"Queueing hdr image ({CurrentFrame}, {idx})")
     if HdrMergeInPlace and not is_dng:
         # Perform merge of the HDR image list
-        img = MergeMertens.process(images_to_merge)
+        img = hdr_fusion.process(images_to_merge)
         # Convert the result back to PIL
         img = cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+        if NegativeImage:
+            negative_processor.calibrate(img)   # Merged frame, film base measured on it
+            negative_processor.process_array(img)     # In place, on the merged array
         img = Image.fromarray(img)
         if CurrentFrame % PreviewModuleValue == 0:
             # Display preview using thread, not directly
             queue_item = tuple((IMAGE_TOKEN, img, CurrentFrame, 0))
             capture_display_queue.put(queue_item)
-        img.save(FrameFilenamePattern % (CurrentFrame, FileType), quality=95)
+        save_frame_image(CurrentFrame, 0, img, frame_capture_info(None))
+
+
+def hdr_middle_index():
+    # HDR index of the middle exposure, used as reference for adaptive bracket and auto bracket calibration
+    return hdr_num_exposures // 2 + 1
+
+
+def hdr_reference_required(idx):
+    return (HdrAdaptiveBracket or HdrBracketAuto) and idx == hdr_middle_index()
+
+
+def capture_hdr_cycle(mode, hdr_items):
+    # Exposure cycling: Exposures are fed to the camera without waiting, frames harvested by matching their exposure
+    is_dng = FileType == 'dng'
+    is_png = FileType == 'png'
+    merge_in_place = HdrMergeInPlace and not is_dng
+    exposures = [int(max(1, exp + HdrBracketShift) * 1000) for exp, idx in hdr_items]
+    merge_images = [None] * len(exposures)
+    harvested = []
+
+    def on_frame(position, request, metadata):
+        harvested.append(position)
+        if len(harvested) == len(exposures):
+            frame_exposed(mode)     # All exposures captured
+        idx = hdr_items[position][1]
+        if hdr_reference_required(idx):
+            hdr_engine.submit_reference(request.make_array('main'), exposures[position],
+                                        int(hdr_items[position][0] * 1000))
+        if merge_in_place:
+            merge_images[position] = np.array(request.make_image('main')).astype(np.float32)
+            request_scheduler.release(request)
+        elif is_dng or is_png:
+            if CurrentFrame % PreviewModuleValue == 0:
+                # Display preview using thread, not directly
+                preview_image = request.make_image('main')
+                if NegativeImage:   # PNG only (negative not allowed with DNG)
+                    preview_image = reverse_image(preview_image, idx)
+                capture_display_queue.put(tuple((IMAGE_TOKEN, preview_image, CurrentFrame, idx)))
+            if DisableThreads:  # Save request in main loop
+                save_frame_request(CurrentFrame, idx, request, frame_capture_info(metadata))
+                request_scheduler.release(request)
+            elif mode == 'normal' or mode == 'manual':  # Do not save in preview mode, only display
+                capture_save_queue.put(tuple((REQUEST_TOKEN, request, CurrentFrame, idx,
+                                              frame_capture_info(metadata))))
+            else:
+                request_scheduler.release(request)
+        else:
+            captured_image = request.make_image('main')
+            request_scheduler.release(request)
+            if NegativeImage:
+                captured_image = reverse_image(captured_image, idx)
+            if DisableThreads:  # Save image in main loop
+                ui_update(draw_preview_image, captured_image, CurrentFrame, idx)
+                save_frame_image(CurrentFrame, idx, captured_image, frame_capture_info(metadata))
+            elif mode == 'normal' or mode == 'manual':  # Do not save in preview mode, only display
+                queue_item = tuple((IMAGE_TOKEN, captured_image, CurrentFrame, idx, frame_capture_info(metadata)))
+                if CurrentFrame % PreviewModuleValue == 0:
+                    # Display preview using thread, not directly
+                    capture_display_queue.put(queue_item)
+                capture_save_queue.put(queue_item)
+        logging.debug(f"Capture hdr cycle, harvested exposure {metadata['ExposureTime']} ({CurrentFrame}, {idx})")
+
+    hdr_engine.capture_exposure_cycle(exposures, request_scheduler, on_frame, StabilizationDelayValue / 1000)
+    if merge_in_place:
+        images_to_merge.extend(merge_images)
+
+
+def frame_strip(source, slice_width=10):
+    # Grayscale left strip of a captured frame (PIL image or request), for the early misalignment check
+    if isinstance(source, Image.Image):
+        return np.asarray(source.crop((0, 0, slice_width, source.height)).convert('L'))
+    # Request: Strip read in place from the main buffer, without converting the full frame
+    with MappedArray(source, 'main') as m:
+        return m.array[:, :slice_width, :3].mean(axis=2).astype(np.uint8)
+
+
+def recapture_required(source):
+    """
+    Early misalignment check, done right after capture and before queuing the frame to be saved. If the frame
+    stopped short (hole below tolerance margin), sets RecaptureSteps to the steps to advance and returns True.
+    """
+    global RecaptureSteps, RecaptureAttempts, recapture_counter
+
+    if not RecaptureMisalignedFrames or RecaptureAttempts >= MaxRecaptureAttempts:
+        return False
+    strip = frame_strip(source)
+    height = strip.shape[0]
+    hole_offset = find_hole_offset(strip, FilmType)
+    centered, align_offset = is_offset_centered(hole_offset, height, MisalignedFrameTolerance)
+    if centered or hole_offset is None or hole_offset < 0:    # Film cannot move backwards
+        return False
+    steps = round(offset_to_steps(hole_offset, height, LastFrameSteps if LastFrameSteps > 0 else StepsPerFrame))
+    RecaptureSteps = max(1, min(MaxRecaptureSteps, steps))
+    RecaptureAttempts += 1
+    recapture_counter += 1
+    logging.debug(f"Frame {CurrentFrame} misaligned ({hole_offset} px), advancing {RecaptureSteps} steps to "
+                  f"capture it again")
+    with open(scan_error_log_fullpath, 'a') as f:
+        f.write(f"Re-captured misaligned frame, {CurrentFrame}, {hole_offset}, {RecaptureSteps}\n")
+    return True
+
+
+def before_next_frame():
+    # Called by scan session before requesting each frame to the controller
+    if ClosedLoopFramingEnabled and AutoFrameStepsEnabled:  # Extra steps only applied with auto frame steps
+        apply_framing_correction()
+
+
+def frame_exposed(mode, request=None):
+    """
+    Called as soon as the current frame has been exposed (capture request completed), before any processing of it.
+    Returns False if the frame is misaligned and has to be captured again (request given). Otherwise, with early
+    frame advance, next frame is requested right away, so that preview, queuing and saving of this frame overlap
+    with film movement.
+    """
+    if mode != 'normal':
+        return True
+    if request is not None and recapture_required(request):
+        return False
+    if EarlyFrameAdvance and scan_session is not None and scan_session.advance_pending:
+        try:
+            scan_session.request_next_frame()
+        except IOError:
+            logging.warning("Error while telling Arduino to move to next Frame, retrying after capture.")
+    return True
+
+
+def recapture_frame():
+    # Advance film the steps calculated by the early misalignment check, then capture current frame again
+    global RecaptureSteps
+    steps = RecaptureSteps
+    RecaptureSteps = 0
+    send_arduino_command(CMD_ADVANCE_FRAME_FRACTION, steps)
+    time.sleep(steps * 0.001)  # Approximate time taken by capstan to advance (stabilization delay added by capture)
+    capture('normal')
 
 
 def capture_single(mode):
@@ -2205,24 +2966,34 @@ def capture_single(mode):
     curtime = time.time()
     if not DisableThreads:
         if is_dng or is_png:  # Save as request only for DNG captures
-            request = camera.capture_request(capture_config)
+            request = request_scheduler.capture_request()
+            if not frame_exposed(mode, request):
+                request_scheduler.release(request)
+                return
             # For PiCamera2, preview and save to file are handled in asynchronous threads
             if CurrentFrame % PreviewModuleValue == 0:
                 captured_image = request.make_image('main')
+                if NegativeImage:   # PNG only (negative not allowed with DNG)
+                    captured_image = reverse_image(captured_image)
                 # Display preview using thread, not directly
                 queue_item = tuple((IMAGE_TOKEN, captured_image, CurrentFrame, 0))
                 capture_display_queue.put(queue_item)
             else:
                 time_preview_display.add_value(0)
             if mode == 'normal' or mode == 'manual':  # Do not save in preview mode, only display
-                save_queue_item = tuple((REQUEST_TOKEN, request, CurrentFrame, 0))
+                save_queue_item = tuple((REQUEST_TOKEN, request, CurrentFrame, 0,
+                                         frame_capture_info(request.get_metadata())))
                 capture_save_queue.put(save_queue_item)
                 logging.debug(f"Queueing frame ({CurrentFrame}")
+            else:
+                request_scheduler.release(request)
         else:
-            captured_image = camera.capture_image("main")
+            captured_image, metadata = capture_image_and_metadata(lambda request: frame_exposed(mode, request))
+            if captured_image is None:
+                return
             if NegativeImage:
                 captured_image = reverse_image(captured_image)
-            queue_item = tuple((IMAGE_TOKEN, captured_image, CurrentFrame, 0))
+            queue_item = tuple((IMAGE_TOKEN, captured_image, CurrentFrame, 0, frame_capture_info(metadata)))
             # For PiCamera2, preview and save to file are handled in asynchronous threads
             if CurrentFrame % PreviewModuleValue == 0:
                 # Display preview using thread, not directly
@@ -2238,22 +3009,31 @@ def capture_single(mode):
             Scanned_Images_number.set(CurrentFrame)
     else:
         if is_dng or is_png:
-            request = camera.capture_request(capture_config)
-            if CurrentFrame % PreviewModuleValue == 0:
+            request = request_scheduler.capture_request()
+            if not frame_exposed(mode, request):
+                request_scheduler.release(request)
+                return
+            if NegativeImage:   # PNG only (negative not allowed with DNG)
+                captured_image = reverse_image(request.make_image('main'))
+            elif CurrentFrame % PreviewModuleValue == 0:
                 captured_image = request.make_image('main')
             else:
                 captured_image = None
-            draw_preview_image(captured_image, CurrentFrame, 0)
+            ui_update(draw_preview_image, captured_image, CurrentFrame, 0)
             if mode == 'normal' or mode == 'manual':  # Do not save in preview mode, only display
-                request.save_dng(FrameFilenamePattern % (CurrentFrame, FileType))
-                logging.debug(f"Saving DNG frame ({CurrentFrame}: {round((time.time() - curtime) * 1000, 1)}")
-            request.release()
+                save_frame_request(CurrentFrame, 0, request, frame_capture_info(request.get_metadata()),
+                                   captured_image)
+                logging.debug(f"Saving {FileType.upper()} frame ({CurrentFrame}: "
+                              f"{round((time.time() - curtime) * 1000, 1)}")
+            request_scheduler.release(request)
         else:
-            captured_image = camera.capture_image("main")
+            captured_image, metadata = capture_image_and_metadata(lambda request: frame_exposed(mode, request))
+            if captured_image is None:
+                return
             if NegativeImage:
                 captured_image = reverse_image(captured_image)
-            draw_preview_image(captured_image, CurrentFrame, 0)
-            captured_image.save(FrameFilenamePattern % (CurrentFrame, FileType), quality=95)
+            ui_update(draw_preview_image, captured_image, CurrentFrame, 0)
+            save_frame_image(CurrentFrame, 0, captured_image, frame_capture_info(metadata))
             logging.debug(
                 f"Saving image ({CurrentFrame}: {round((time.time() - curtime) * 1000, 1)}")
         aux = time.time() - curtime
@@ -2280,6 +3060,7 @@ def capture(mode):
         return
 
     os.chdir(CurrentDir)
+    set_frame_folder(CurrentDir)
 
     # Wait for auto exposure to adapt only if allowed (and if not using HDR)
     # If AE disabled, only enter as per preview_module to refresh values
@@ -2310,7 +3091,7 @@ def capture(mode):
                 break
         if wait_loop_count >= 0:
             if ExpertMode:
-                exposure_value.set(aux_current_exposure / 1000)
+                ui_update(exposure_value.set, aux_current_exposure / 1000)
             aux = time.time() - curtime
             total_wait_time_autoexp += aux
             time_autoexp.add_value(aux)
@@ -2347,8 +3128,8 @@ def capture(mode):
                 break
         if wait_loop_count >= 0:
             if ExpertMode:
-                wb_red_value.set(round(aux_gain_red, 1))
-                wb_blue_value.set(round(aux_gain_blue, 1))
+                ui_update(wb_red_value.set, round(aux_gain_red, 1))
+                ui_update(wb_blue_value.set, round(aux_gain_blue, 1))
             aux = time.time() - curtime
             total_wait_time_awb += aux
             time_awb.add_value(aux)
@@ -2435,8 +3216,11 @@ def cmd_start_scan_simulated():
             ScanOngoing = False
         else:
             refresh_qr_code()
-            simulated_captured_frame_list = os.listdir(CurrentDir)
-            simulated_captured_frame_list.sort()
+            # Use captured frames only (HDR sub-frames excluded), fall back to any file in folder
+            simulated_captured_frame_list = [name for frame, hdr_idx, name in FrameScanner(CurrentDir).frame_files()
+                                             if hdr_idx == 0]
+            if len(simulated_captured_frame_list) == 0:
+                simulated_captured_frame_list = sorted(os.listdir(CurrentDir))
             simulated_images_in_list = len(simulated_captured_frame_list)
             if simulated_images_in_list == 0:
                 logging.error("No frames exist in folder, cannot simulate scan.")
@@ -2550,7 +3334,8 @@ def capture_loop_simulated():
             time_awb_value.set(int(time_awb.get_average() * 1000) if time_awb.get_average() is not None else 0)
             time_autoexp_value.set(int(time_autoexp.get_average() * 1000) if time_autoexp.get_average() is not None else 0)
 
-        if session_frames % 50 == 0 and not disk_space_available():  # Only every 50 frames (500MB buffer exist)
+        refresh_storage_forecast()
+        if not disk_space_available():  # Checked by storage monitor in background, no cost here
             logging.error("No disk space available, stopping scan process.")
             if ScanOngoing:
                 ScanStopRequested = True  # Stop in next capture loop
@@ -2561,11 +3346,10 @@ def start_scan():
     global ScanOngoing
     global CurrentScanStartFrame, CurrentScanStartTime
     global ScanStopRequested
-    global NewFrameAvailable
     global total_wait_time_autoexp, total_wait_time_awb, total_wait_time_preview_display, session_start_time
     global total_wait_time_save_image
+    global scan_session
     global session_frames
-    global last_frame_time
     global AutoExpEnabled, AutoWbEnabled
 
     if film_type.get() == '':
@@ -2588,21 +3372,19 @@ def start_scan():
         CurrentScanStartFrame = CurrentFrame
 
         is_dng = FileType == 'dng'
-        is_png = FileType == 'png'
-        if (is_dng or is_png) and NegativeImage:  # Incompatible choices, display error and quit
+        if is_dng and NegativeImage:  # Incompatible choices, display error and quit
             tk.messagebox.showerror("Error!",
-                                    "Cannot scan negative images to DNG or PNG files. "
+                                    "Cannot scan negative images to DNG files. "
                                     "Please correct and retry.")
             logging.debug("Cannot scan negative images to DNG file. Please correct and retry.")
             return
 
         ScanOngoing = True
         custom_spinboxes_kbd_lock(win)
-        last_frame_time = time.time() + 3
 
-        # Set new frame indicator to false, in case this is the cause of the strange
+        # Discard progress left from a previous scan, in case this is the cause of the strange
         # behaviour after stopping/restarting the scan process
-        NewFrameAvailable = False
+        drain_queue(scan_progress_queue)
 
         # Enable/Disable related buttons
         except_widget_global_enable(start_btn, not ScanOngoing)
@@ -2615,19 +3397,28 @@ def start_scan():
         session_start_time = time.time()
         session_frames = 0
 
-        # Send command to Arduino to start scan (as applicable, Arduino keeps its own status)
+        # Frames per file: HDR frames merged in place are saved as a single file
+        storage_monitor.set_target(CurrentDir, FileType,
+                                   hdr_num_exposures if HdrCaptureActive and not HdrMergeInPlace else 1)
+
+        framing_controller.reset(FrameExtraStepsValue)
+
         if not SimulatedRun and not CameraDisabled:
             camera.set_controls({"AeEnable": AutoExpEnabled})
             camera.set_controls({"AwbEnable": AutoWbEnabled})
             if not AutoExpEnabled:
                 camera.set_controls({"ExposureTime": int(int(exposure_value.get() * 1000))})
-            logging.debug("Sending CMD_START_SCAN")
-            send_arduino_command(CMD_START_SCAN)
 
         refresh_qr_code()
 
-        # Invoke capture_loop a first time when scan starts
-        win.after(5, capture_loop)
+        # Scan session sends command to Arduino to start scan (Arduino keeps its own status), and captures frames
+        # in its own thread. Tk thread only displays progress
+        scan_session = ScanSession(controller_link, capture_scan_frame, CurrentFrame,
+                                   inactivity_delay=max_inactivity_delay, before_next_frame=before_next_frame)
+        scan_session.add_listener(scan_session_event)
+        logging.debug("Sending CMD_START_SCAN")
+        scan_session.start()
+        scan_progress_loop()
 
 
 def stop_scan():
@@ -2640,27 +3431,151 @@ def stop_scan():
     ScanOngoing = False
     custom_spinboxes_kbd_lock(win)
 
-    # Send command to Arduino to stop scan (as applicable, Arduino keeps its own status)
-    if not SimulatedRun:
-        logging.debug("Sending CMD_STOP_SCAN")
-        send_arduino_command(CMD_STOP_SCAN)
+    # Command to stop scan already sent to Arduino by scan session
+
+    # Frames still in the save queue are synced by the writer as they complete, flush what is already written
+    if frame_writer is not None:
+        frame_writer.sync()
+    if frame_container is not None:
+        frame_container.sync()
+    pt_recorder.flush()
+    frame_registration.flush()
+    if reel_manifest is not None:
+        reel_manifest.flush()
+    if hdr_engine is not None and hdr_engine.exposure_changes > 0:
+        logging.info(f"HDR exposure changes for {CurrentDir}: {hdr_engine.stats_str()}")
 
     # Enable/Disable related buttons
     except_widget_global_enable(start_btn, not ScanOngoing)
 
 
-def capture_loop():
-    global win
-    global CurrentFrame
+def drain_queue(q):
+    while True:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            return
+
+
+def ui_update(function, *args):
+    # Widgets are only updated from Tk thread: Updates requested by scan session thread are queued to it
+    if threading.current_thread() is threading.main_thread():
+        function(*args)
+    else:
+        scan_progress_queue.put((UI_UPDATE_TOKEN, function, args))
+
+
+def capture_scan_frame(session):
+    # Capture function of the scan session (scan session thread)
+    global CurrentFrame, session_frames, CurrentStill
+    global RecaptureAttempts
+    global LastFrameSteps, LastPtLevel
+
+    CurrentFrame = session.state.current_frame
+    session_frames = session.state.session_frames
+    LastFrameSteps = session.state.frame_steps     # Per frame values for reel manifest and framing correction
+    LastPtLevel = session.state.pt_level
+    CurrentStill = 1
+    RecaptureAttempts = 0
+    capture('normal')
+    while RecaptureSteps > 0:  # Misaligned frame, advance film and capture again
+        recapture_frame()
+    logging.debug("Frame %i captured.", CurrentFrame)
+    if not disk_space_available():  # Checked by storage monitor in background, no cost here
+        logging.error("No disk space available, stopping scan process.")
+        session.request_stop("No disk space available")
+
+
+def scan_session_event(event, session):
+    # Scan session events (scan session thread), passed to Tk thread
+    if event == 'frame':
+        scan_progress_queue.put(session.state.current_frame)
+    elif event == 'stopped':
+        scan_progress_queue.put(END_TOKEN)
+    server = metrics_server
+    if server is not None and (event != 'frame' or server.update_due()):
+        server.update(metrics_snapshot())
+
+
+def scan_progress_loop():
+    """
+    Tk side of the scan: Updates UI with the frames reported by the scan session (and applies the UI updates requested
+    by it), and completes the scan once the session has stopped.
+    """
     global FramesPerMinute, FramesToGo
-    global NewFrameAvailable
-    global ScanProcessError, ScanProcessError_LastTime
     global ScanStopRequested
-    global session_frames, CurrentStill
     global disk_space_error_to_notify
-    global AutoStopEnabled
+    global scan_progress_after
+    global FPM_CalculatedValue
 
-    if ScanStopRequested:
+    if ScanStopRequested:   # Requested by UI, save threads, or frames to go counter
+        scan_session.request_stop()
+    engine_stopped = False
+    frames_captured = 0
+    while True:
+        try:
+            item = scan_progress_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item == END_TOKEN:
+            engine_stopped = True
+            break
+        if isinstance(item, tuple) and item[0] == UI_UPDATE_TOKEN:
+            item[1](*item[2])
+            continue
+        frames_captured += 1
+        # Update remaining time
+        aux = frames_to_go_str.get()
+        if aux.isdigit() and time.time() > frames_to_go_key_press_time:
+            FramesToGo = int(aux)
+            if FramesToGo > 0:
+                FramesToGo -= 1
+                frames_to_go_str.set(str(FramesToGo))
+                ConfigData["FramesToGo"] = FramesToGo
+                if FramesPerMinute != 0:
+                    minutes_pending = FramesToGo // FramesPerMinute
+                    frames_to_go_time_str.set(f"{(minutes_pending // 60):02}h {(minutes_pending % 60):02}m")
+            else:
+                if AutoStopEnabled and autostop_type.get() == "counter_to_zero":
+                    scan_session.request_stop("Frames to go counter reached zero")
+                ConfigData["FramesToGo"] = -1
+                frames_to_go_str.set('')  # clear frames to go box to prevent it stops again in next scan
+
+    if frames_captured > 0:
+        ConfigData["CurrentDate"] = str(datetime.now())
+        ConfigData["CurrentDir"] = CurrentDir
+        ConfigData["CurrentFrame"] = str(CurrentFrame)
+        # with open(ConfigurationDataFilename, 'w') as f:
+        #     json.dump(ConfigData, f)
+
+        # Update number of captured frames
+        Scanned_Images_number.set(CurrentFrame)
+        # Update film time
+        fps = 18 if ConfigData["FilmType"] == "S8" else 16
+        film_time = f"{(CurrentFrame // fps) // 60:02}:{(CurrentFrame // fps) % 60:02}"
+        scanned_Images_time_value.set(film_time)
+        # Update Frames per Minute
+        FPM_CalculatedValue = scan_session.state.fpm
+        scan_period_frames = CurrentFrame - CurrentScanStartFrame
+        if FPM_CalculatedValue == -1:  # FPM not calculated yet, display some indication
+            aux_str = ''.join([char * int(min(5, scan_period_frames)) for char in '.'])
+            scanned_Images_fps_value.set(aux_str)
+        else:
+            FramesPerMinute = FPM_CalculatedValue
+            scanned_Images_fps_value.set(f"{FPM_CalculatedValue / 60:.2f}")
+        refresh_storage_forecast()
+
+        # display rolling averages
+        if ExpertMode:
+            time_save_image_value.set(
+                int(time_save_image.get_average() * 1000) if time_save_image.get_average() is not None else 0)
+            time_preview_display_value.set(
+                int(time_preview_display.get_average() * 1000) if time_preview_display.get_average() is not None else 0)
+            time_awb_value.set(int(time_awb.get_average() * 1000) if time_awb.get_average() is not None else 0)
+            time_autoexp_value.set(
+                int(time_autoexp.get_average() * 1000) if time_autoexp.get_average() is not None else 0)
+
+    if engine_stopped:
         stop_scan()
         ScanStopRequested = False
         curtime = time.time()
@@ -2681,100 +3596,17 @@ def capture_loop():
             logging.debug("Total time waiting for AE adjustment: %s seg, (%i ms per frame)",
                           str(round((total_wait_time_autoexp), 1)),
                           round((total_wait_time_autoexp * 1000 / session_frames), 1))
+            if EarlyFrameAdvance:
+                logging.debug("Total time overlapped with film advance: %s seg, (%i ms per frame)",
+                              str(round((scan_session.state.advance_overlap_time), 1)),
+                              round((scan_session.state.advance_overlap_time * 1000 / session_frames), 1))
         if disk_space_error_to_notify:
             tk.messagebox.showwarning("Disk space low",
                                       f"Running out of disk space, only {int(available_space_mb)} MB remain. "
                                       "Please delete some files before continuing current scan.")
             disk_space_error_to_notify = False
-    elif ScanOngoing:
-        if NewFrameAvailable:
-            # Update remaining time
-            aux = frames_to_go_str.get()
-            if aux.isdigit() and time.time() > frames_to_go_key_press_time:
-                FramesToGo = int(aux)
-                if FramesToGo > 0:
-                    FramesToGo -= 1
-                    frames_to_go_str.set(str(FramesToGo))
-                    ConfigData["FramesToGo"] = FramesToGo
-                    if FramesPerMinute != 0:
-                        minutes_pending = FramesToGo // FramesPerMinute
-                        frames_to_go_time_str.set(f"{(minutes_pending // 60):02}h {(minutes_pending % 60):02}m")
-                else:
-                    if AutoStopEnabled and autostop_type.get() == "counter_to_zero":
-                        ScanStopRequested = True  # Stop in next capture loop
-                    ConfigData["FramesToGo"] = -1
-                    frames_to_go_str.set('')  # clear frames to go box to prevent it stops again in next scan
-            CurrentFrame += 1
-            session_frames += 1
-            register_frame()
-            CurrentStill = 1
-            capture('normal')
-            if not SimulatedRun:
-                try:
-                    # Set NewFrameAvailable to False here, to avoid overwriting new frame from arduino
-                    NewFrameAvailable = False
-                    logging.debug("Frame %i captured.", CurrentFrame)
-                    send_arduino_command(CMD_GET_NEXT_FRAME)  # Tell Arduino to move to next frame
-                except IOError:
-                    CurrentFrame -= 1
-                    NewFrameAvailable = True  # Set NewFrameAvailable to True to repeat next time
-                    # Log error to console
-                    logging.warning("Error while telling Arduino to move to next Frame.")
-                    logging.warning("Frame %i capture to be tried again.", CurrentFrame)
-                    win.after(5, capture_loop)
-                    return
-
-            ConfigData["CurrentDate"] = str(datetime.now())
-            ConfigData["CurrentDir"] = CurrentDir
-            ConfigData["CurrentFrame"] = str(CurrentFrame)
-            # with open(ConfigurationDataFilename, 'w') as f:
-            #     json.dump(ConfigData, f)
-
-            # Update number of captured frames
-            Scanned_Images_number.set(CurrentFrame)
-            # Update film time
-            fps = 18 if ConfigData["FilmType"] == "S8" else 16
-            film_time = f"{(CurrentFrame // fps) // 60:02}:{(CurrentFrame // fps) % 60:02}"
-            scanned_Images_time_value.set(film_time)
-            # Update Frames per Minute
-            scan_period_frames = CurrentFrame - CurrentScanStartFrame
-            if FPM_CalculatedValue == -1:  # FPM not calculated yet, display some indication
-                aux_str = ''.join([char * int(min(5, scan_period_frames)) for char in '.'])
-                scanned_Images_fps_value.set(aux_str)
-            else:
-                FramesPerMinute = FPM_CalculatedValue
-                scanned_Images_fps_value.set(f"{FPM_CalculatedValue / 60:.2f}")
-            if session_frames % 50 == 0 and not disk_space_available():  # Only every 50 frames (500MB buffer exist)
-                logging.error("No disk space available, stopping scan process.")
-                if ScanOngoing:
-                    ScanStopRequested = True  # Stop in next capture loop
-        elif ScanProcessError:
-            if ScanProcessError_LastTime != 0:
-                if time.time() - ScanProcessError_LastTime <= 5:  # Second error in less than 5 seconds: Stop
-                    curtime = time.ctime()
-                    logging.error("Too many errors during scan process, stopping.")
-                    ScanProcessError = False
-                    if ScanOngoing:
-                        ScanStopRequested = True  # Stop in next capture loop
-            ScanProcessError_LastTime = time.time()
-            ScanProcessError = False
-            if not ScanStopRequested:
-                NewFrameAvailable = True  # Simulate new frame to continue scan
-                logging.warning(
-                    f"Error during scan process, frame {CurrentFrame}, simulating new frame. Maybe misaligned.")
-
-        # display rolling averages
-        if ExpertMode:
-            time_save_image_value.set(
-                int(time_save_image.get_average() * 1000) if time_save_image.get_average() is not None else 0)
-            time_preview_display_value.set(
-                int(time_preview_display.get_average() * 1000) if time_preview_display.get_average() is not None else 0)
-            time_awb_value.set(int(time_awb.get_average() * 1000) if time_awb.get_average() is not None else 0)
-            time_autoexp_value.set(
-                int(time_autoexp.get_average() * 1000) if time_autoexp.get_average() is not None else 0)
-
-        # Invoke capture_loop one more time, as long as scan is ongoing
-        win.after(5, capture_loop)
+    elif not ExitingApp:
+        scan_progress_after = win.after(20, scan_progress_loop)
 
 
 def temperature_check():
@@ -2821,6 +3653,10 @@ def onesec_periodic_checks():  # Update RPi temperature every 10 seconds
 
     temperature_check()
     preview_check()
+    # Snapshot updated by scan session while scanning, here otherwise (idle, simulated scan)
+    server = metrics_server
+    if server is not None and (scan_session is None or not scan_session.state.running) and server.update_due():
+        server.update(metrics_snapshot())
 
     if not ExitingApp:
         onesec_after = win.after(1000, onesec_periodic_checks)
@@ -2828,132 +3664,50 @@ def onesec_periodic_checks():  # Update RPi temperature every 10 seconds
 
 
 def UpdatePlotterWindow(PTValue, ThresholdLevel):
-    global MaxPT, MinPT, PrevPTValue, PrevThresholdLevel, PlotterScroll, PlotterWindowPos
-
-    if plotter_canvas == None:
+    if integrated_plotter is None:
         logging.error("Plotter canvas does not exist, exiting...")
         return
-
-    if PTValue > MaxPT * 10:
-        logging.warning("PT level too high, ignoring it")
-        return
-
-    MaxPT = max(MaxPT, PTValue)
-    MinPT = min(MinPT, PTValue)
-    top_label = plotter_canvas.create_text(10, 5, text=str(MaxPT), anchor='nw', font=f"Helvetica {12}")
-    bottom_label = plotter_canvas.create_text(10, plotter_height - 15, text=str(MinPT), anchor='nw', font=f"Helvetica {12}")
-    
-    if not PlotterScroll:
-        bg_top_label = plotter_canvas.create_rectangle(plotter_canvas.bbox(top_label),fill="white", outline="white")
-        plotter_canvas.tag_lower(bg_top_label,top_label)
-        bg_bottom_label = plotter_canvas.create_rectangle(plotter_canvas.bbox(bottom_label),fill="white", outline="white")
-        plotter_canvas.tag_lower(bg_bottom_label,bottom_label)
-
-    if PlotterScroll:
-        # Shift the graph to the left
-        for item in plotter_canvas.find_all():
-            plotter_canvas.move(item, -5, 0)
-
-    usable_height = plotter_height - 15
-    if PlotterScroll:
-        # Delete lines moving out of the canvas
-        for item in plotter_canvas.find_overlapping(-10, 0, 0, usable_height):
-            plotter_canvas.delete(item)
-    else:
-        # Delete lines we are about to overwrite
-        for item in plotter_canvas.find_overlapping(PlotterWindowPos+1, 0, PlotterWindowPos+6, plotter_height-1):
-            plotter_canvas.delete(item)
-
-    if PlotterScroll:
-        # Draw the new line segment for PT Level
-        plotter_canvas.create_line(plotter_width - 6, 15 + usable_height - (PrevPTValue / (MaxPT / usable_height)),
-                                   plotter_width - 1, 15 + usable_height - (PTValue / (MaxPT / usable_height)), width=1,
-                                   fill="blue")
-    else:
-        plotter_canvas.create_line(PlotterWindowPos, 15 + usable_height - (PrevPTValue / (MaxPT / usable_height)),
-                                PlotterWindowPos + 5, 15 + usable_height - (PTValue / (MaxPT / usable_height)), width=1,
-                                fill="blue")
-        plotter_canvas.create_line(PlotterWindowPos+6, 0,
-                                PlotterWindowPos + 6, 15 + usable_height,
-                                fill="black")
-
-    # Draw the new line segment for threshold
-    if (ThresholdLevel > MaxPT):
-        logging.debug(f"ThresholdLevel value is wrong ({ThresholdLevel}), replacing by previous ({PrevThresholdLevel})")
-        # Swap by previous if bigger than MaxPT, sometimes I2C losses second parameter, no idea why
-        ThresholdLevel = PrevThresholdLevel
-
-    if PlotterScroll:
-        plotter_canvas.create_line(plotter_width - 6, 15 + usable_height - (PrevThresholdLevel / (MaxPT / usable_height)),
-                                   plotter_width - 1, 15 + usable_height - (ThresholdLevel / (MaxPT / usable_height)),
-                                   width=1, fill="red")
-    else:
-        plotter_canvas.create_line(PlotterWindowPos, 15 + usable_height - (PrevThresholdLevel / (MaxPT / usable_height)),
-                                PlotterWindowPos + 5, 15 + usable_height - (ThresholdLevel / (MaxPT / usable_height)),
-                                width=1, fill="red")
-    PrevPTValue = PTValue
-    PrevThresholdLevel = ThresholdLevel
-    if not PlotterScroll:
-        PlotterWindowPos = (PlotterWindowPos + 5) % plotter_width
+    integrated_plotter.add_sample(PTValue, ThresholdLevel)
 
 
 # send_arduino_command: No response expected
 def send_arduino_command(cmd, param=0):
     if not SimulatedRun:
-        time.sleep(0.0001)  # wait 100 µs, to avoid I/O errors
-        try:
-            i2c.write_i2c_block_data(16, cmd, [int(param % 256), int(param >> 8)])  # Send command to Arduino
-        except IOError:
-            logging.warning(
-                f"Error while sending command {cmd} (param {param}) to Arduino while handling frame {CurrentFrame}. "
-                f"Retrying...")
-            time.sleep(0.2)  # wait 100 µs, to avoid I/O errors
-            i2c.write_i2c_block_data(16, cmd, [int(param % 256), int(param >> 8)])  # Send command to Arduino
+        controller_link.send(cmd, param)
+
 
-        time.sleep(0.0001)  # wait 100 µs, same
+def controller_event(event, param1, param2):
+    # Called by controller link for each controller event (controller listener thread)
+    if PtRecorderEnabled and ScanOngoing:
+        pt_recorder.record(event, CurrentFrame, param1, param2)
+    if ScanOngoing and scan_session is not None:
+        scan_session.handle_controller_event(event, param1, param2)
+    controller_event_queue.put((event, param1, param2))
 
 
-def arduino_listen_loop():  # Waits for Arduino communicated events and dispatches accordingly
+def arduino_listen_loop():  # Dispatches Arduino events received by the controller listener thread
     global win
-    global NewFrameAvailable
+    global arduino_after
+
+    while True:
+        try:
+            ArduinoTrigger, ArduinoParam1, ArduinoParam2 = controller_event_queue.get_nowait()
+        except queue.Empty:
+            break
+        dispatch_controller_event(ArduinoTrigger, ArduinoParam1, ArduinoParam2)
+
+    if not ExitingApp:
+        arduino_after = win.after(10, arduino_listen_loop)
+
+
+def dispatch_controller_event(ArduinoTrigger, ArduinoParam1, ArduinoParam2):
     global RewindErrorOutstanding, RewindEndOutstanding
     global FastForwardErrorOutstanding, FastForwardEndOutstanding
-    global ArduinoTrigger
-    global ScanProcessError
-    global last_frame_time
     global Controller_Id, Controller_version
     global ScanStopRequested
-    global arduino_after
     global PtLevelValue, StepsPerFrame
     global scan_error_counter, scan_error_total_frames_counter, scan_error_counter_value
 
-
-    if not SimulatedRun:
-        try:
-            ArduinoData = i2c.read_i2c_block_data(16, CMD_GET_CNT_STATUS, 5)
-            ArduinoTrigger = ArduinoData[0]
-            ArduinoParam1 = ArduinoData[1] * 256 + ArduinoData[2]
-            ArduinoParam2 = ArduinoData[3] * 256 + ArduinoData[
-                4]  # Sometimes this part arrives as 255, 255, no idea why
-        except IOError as e:
-            ArduinoTrigger = 0
-            # Log error to console
-            # When error is 121, not really an error, means Arduino has nothing to data available for us
-            if e.errno != 121:
-                logging.warning(
-                    f"Non-critical IOError ({e}) while checking incoming event from Arduino. Will check again.")
-
-    if ScanOngoing and time.time() > last_frame_time:
-        # If scan is ongoing, and more than 3 seconds have passed since last command, maybe one
-        # command from/to Arduino (frame received/go to next frame) has been lost.
-        # In such case, we force a 'fake' new frame command to allow process to continue
-        # This means a duplicate frame might be generated.
-        last_frame_time = time.time() + int(
-            max_inactivity_delay * 0.34)  # Delay shared with arduino, 1/3rd less to avoid conflict with end reel
-        NewFrameAvailable = True
-        logging.warning("More than %i sec. since last command: Forcing new "
-                        "frame event (frame %i).", int(max_inactivity_delay * 0.34), CurrentFrame)
-
     if ArduinoTrigger == 0:  # Do nothing
         pass
     elif ArduinoTrigger == RSP_VERSION_ID:  # New Frame available
@@ -2970,16 +3724,12 @@ def arduino_listen_loop():  # Waits for Arduino communicated events and dispatch
     elif ArduinoTrigger == RSP_FORCE_INIT:  # Controller reloaded, sent init sequence again
         logging.debug("Controller requested to reinit")
         reinit_controller()
-    elif ArduinoTrigger == RSP_FRAME_AVAILABLE:  # New Frame available
-        # Delay shared with arduino, 2 seconds less to avoid conflict with end reel
-        last_frame_time = time.time() + max_inactivity_delay - 2
-        NewFrameAvailable = True
+    elif ArduinoTrigger == RSP_FRAME_AVAILABLE:  # New Frame available (captured by scan engine)
         scan_error_total_frames_counter += 1
         scan_error_counter_value.set(f"{scan_error_counter} ({scan_error_counter*100/scan_error_total_frames_counter:.1f}%)")
 
     elif ArduinoTrigger == RSP_SCAN_ERROR:  # Error during scan
         logging.warning("Received scan error from Arduino (%i, %i)", ArduinoParam1, ArduinoParam2)
-        ScanProcessError = True
         scan_error_counter += 1
         scan_error_counter_value.set(f"{scan_error_counter} ({scan_error_counter*100/scan_error_total_frames_counter:.1f}%)")
         with open(scan_error_log_fullpath, 'a') as f:
@@ -3016,12 +3766,6 @@ def arduino_listen_loop():  # Waits for Arduino communicated events and dispatch
     else:
         logging.warning("Unrecognized incoming event (%i) from Arduino.", ArduinoTrigger)
 
-    if ArduinoTrigger != 0:
-        ArduinoTrigger = 0
-
-    if not ExitingApp:
-        arduino_after = win.after(10, arduino_listen_loop)
-
 
 # Base function for widget enable/disable/refresh
 def widget_update(cmd, widget, enabled, inc):
@@ -3095,7 +3839,8 @@ def widget_list_update(cmd, category_list):
                                                        hdr_min_exp_spinbox, hdr_max_exp_label, hdr_max_exp_spinbox,
                                                        hdr_bracket_width_label, hdr_bracket_width_spinbox,
                                                        hdr_bracket_shift_label, hdr_bracket_shift_spinbox,
-                                                       hdr_bracket_width_auto_checkbox, hdr_merge_in_place_checkbox],
+                                                       hdr_bracket_width_auto_checkbox, hdr_merge_in_place_checkbox,
+                                                       hdr_exposure_cycling_checkbox, hdr_adaptive_bracket_checkbox],
                                                       []]
         dependent_widget_dict[id_HdrBracketAuto] = [[],
                                                     [hdr_max_exp_spinbox, hdr_min_exp_spinbox, hdr_max_exp_label,
@@ -3225,6 +3970,10 @@ def validate_config_folders():
 
 def load_config_data_pre_init():
     global ExpertMode, ExperimentalMode, PlotterEnabled, SimplifiedMode, UIScrollbars, DetectMisalignedFrames, MisalignedFrameTolerance, FontSize, DisableToolTips, BaseFolder
+    global FsyncInterval, FrameShardSize, OrangeMaskRemoval, ColorPipelineActive, RawCodec
+    global JpegEncoderName, JpegQuality, JpegSubsampling, JpegOptimize, PtRecorderEnabled, ClosedLoopFramingEnabled
+    global RecaptureMisalignedFrames, FrameRegistrationEnabled, EarlyFrameAdvance
+    global MetricsServerEnabled, MetricsServerLan, MetricsServerPort
     global WidgetsEnabledWhileScanning, LogLevel, LoggingMode, ColorCodedButtons, TempInFahrenheit, LogLevel
 
     for item in ConfigData:
@@ -3252,6 +4001,41 @@ def load_config_data_pre_init():
             DetectMisalignedFrames = ConfigData["DetectMisalignedFrames"]
         if 'MisalignedFrameTolerance' in ConfigData:
             MisalignedFrameTolerance = ConfigData["MisalignedFrameTolerance"]
+        if 'ClosedLoopFramingEnabled' in ConfigData:
+            ClosedLoopFramingEnabled = ConfigData["ClosedLoopFramingEnabled"]
+        if 'RecaptureMisalignedFrames' in ConfigData:
+            RecaptureMisalignedFrames = ConfigData["RecaptureMisalignedFrames"]
+        if 'FsyncInterval' in ConfigData:
+            FsyncInterval = ConfigData["FsyncInterval"]
+        if 'FrameShardSize' in ConfigData:
+            FrameShardSize = ConfigData["FrameShardSize"]
+        if 'JpegEncoder' in ConfigData:
+            JpegEncoderName = ConfigData["JpegEncoder"]
+        if 'JpegQuality' in ConfigData:
+            JpegQuality = ConfigData["JpegQuality"]
+        if 'JpegSubsampling' in ConfigData:
+            JpegSubsampling = ConfigData["JpegSubsampling"]
+        if 'JpegOptimize' in ConfigData:
+            JpegOptimize = ConfigData["JpegOptimize"]
+        if 'RawCodec' in ConfigData:
+            RawCodec = ConfigData["RawCodec"]
+        if 'PtRecorderEnabled' in ConfigData:
+            PtRecorderEnabled = ConfigData["PtRecorderEnabled"]
+        if 'FrameRegistrationEnabled' in ConfigData:
+            FrameRegistrationEnabled = ConfigData["FrameRegistrationEnabled"]
+        if 'EarlyFrameAdvance' in ConfigData:
+            EarlyFrameAdvance = ConfigData["EarlyFrameAdvance"]
+        if 'MetricsServerEnabled' in ConfigData:
+            MetricsServerEnabled = ConfigData["MetricsServerEnabled"]
+        if 'MetricsServerLan' in ConfigData:
+            MetricsServerLan = ConfigData["MetricsServerLan"]
+        if 'MetricsServerPort' in ConfigData:
+            MetricsServerPort = int(ConfigData["MetricsServerPort"])
+        if 'ColorPipelineActive' in ConfigData:
+            ColorPipelineActive = ConfigData["ColorPipelineActive"]
+        if 'OrangeMaskRemoval' in ConfigData:
+            OrangeMaskRemoval = ConfigData["OrangeMaskRemoval"]
+            negative_processor.set_orange_mask_removal(OrangeMaskRemoval)
         if 'DisableToolTips' in ConfigData:
             DisableToolTips = ConfigData["DisableToolTips"]
         if 'WidgetsEnabledWhileScanning' in ConfigData:
@@ -3292,7 +4076,8 @@ def load_session_data_post_init():
     global MatchWaitMarginValue
     global StepsPerFrame, PtLevelValue, FrameFineTuneValue, FrameExtraStepsValue, ScanSpeedValue
     global StabilizationDelayValue
-    global HdrMinExp, HdrMaxExp, HdrBracketWidth, HdrBracketShift, HdrMergeInPlace
+    global HdrMinExp, HdrMaxExp, HdrBracketWidth, HdrBracketShift, HdrMergeInPlace, HdrExposureCycling
+    global HdrAdaptiveBracket
     global ExposureWbAdaptPause
     global FileType, FilmType, CapstanDiameter
     global CaptureResolution
@@ -3372,6 +4157,12 @@ def load_session_data_post_init():
                 if 'HdrMergeInPlace' in ConfigData:
                     HdrMergeInPlace = ConfigData["HdrMergeInPlace"]
                     hdr_merge_in_place.set(HdrMergeInPlace)
+                if 'HdrExposureCycling' in ConfigData:
+                    HdrExposureCycling = ConfigData["HdrExposureCycling"]
+                    hdr_exposure_cycling.set(HdrExposureCycling)
+                if 'HdrAdaptiveBracket' in ConfigData:
+                    HdrAdaptiveBracket = ConfigData["HdrAdaptiveBracket"]
+                    hdr_adaptive_bracket.set(HdrAdaptiveBracket)
                 if 'HdrBracketWidth' in ConfigData:
                     HdrBracketWidth = int(ConfigData["HdrBracketWidth"])
                     hdr_bracket_width_value.set(HdrBracketWidth)
@@ -3392,6 +4183,8 @@ def load_session_data_post_init():
             ConfigData["HdrMaxExp"] = HdrMaxExp
             ConfigData["HdrBracketAuto"] = HdrBracketAuto
             ConfigData["HdrMergeInPlace"] = HdrMergeInPlace
+            ConfigData["HdrExposureCycling"] = HdrExposureCycling
+            ConfigData["HdrAdaptiveBracket"] = HdrAdaptiveBracket
             ConfigData["HdrBracketWidth"] = HdrBracketWidth
             ConfigData["HdrBracketShift"] = HdrBracketShift
 
@@ -3619,7 +4412,7 @@ def load_session_data_post_init():
                 send_arduino_command(CMD_SET_SCAN_SPEED, ScanSpeedValue)
 
         # Refresh plotter mode in Arduino here since when reading from config I2C has not been enabled yet
-        send_arduino_command(CMD_REPORT_PLOTTER_INFO, PlotterEnabled)
+        send_arduino_command(CMD_REPORT_PLOTTER_INFO, PlotterEnabled or PtRecorderEnabled)
 
         widget_list_enable([id_ManualScanEnabled, id_AutoStopEnabled, id_ExposureWbAdaptPause, 
                             id_HdrCaptureActive, id_HdrBracketAuto])
@@ -3681,7 +4474,8 @@ def PiCam2_configure():
     capture_config = camera.create_still_configuration(main={"size": camera_resolutions.get_sensor_resolution()},
                                                        raw={"size": camera_resolutions.get_sensor_resolution(),
                                                             "format": camera_resolutions.get_format()},
-                                                       transform=Transform(hflip=True))
+                                                       transform=Transform(hflip=True),
+                                                       buffer_count=CameraBufferCount)
 
     preview_config = camera.create_preview_configuration({"size": (2028, 1520)}, transform=Transform(hflip=True))
     # Camera preview window is not saved in configuration, so always off on start up (we start in capture mode)
@@ -3887,10 +4681,11 @@ def tscann8_init():
     global ZoomSize
     global capture_display_queue, capture_display_event
     global capture_save_queue, capture_save_event
-    global MergeMertens, camera_resolutions
+    global hdr_fusion, camera_resolutions
     global active_threads
     global time_save_image, time_preview_display, time_awb, time_autoexp
     global hw_panel, hw_panel_installed
+    global frame_writer, frame_container, storage_monitor, request_scheduler, hdr_engine, controller_link
 
     if SimulatedRun:
         logging.info("Not running on Raspberry Pi, simulated run for UI debugging purposes only")
@@ -3907,12 +4702,16 @@ def tscann8_init():
         # Set the I2C clock frequency to 400 kHz
         i2c.write_byte_data(16, 0x0F, 0x46)  # I2C_SCLL register
         i2c.write_byte_data(16, 0x10, 0x47)  # I2C_SCLH register
+        controller_link = ControllerLink(i2c)
 
     if not SimulatedRun and not CameraDisabled:  # Init PiCamera2 here, need resolution list for drop down
         camera = Picamera2()
         camera_resolutions = CameraResolutions(camera.sensor_modes)
         logging.info(f"Camera Sensor modes: {camera.sensor_modes}")
         PiCam2_configure()
+        request_scheduler = RequestScheduler(camera, CameraBufferCount)
+        hdr_engine = HdrEngine(camera, dry_run_iterations)
+        hdr_engine.start()
         ZoomSize = camera.capture_metadata()['ScalerCrop']
         logging.debug(f"ScalerCrop: {ZoomSize}")
     if SimulatedRun:
@@ -3925,6 +4724,15 @@ def tscann8_init():
     time_awb = RollingAverage(50)
     time_autoexp = RollingAverage(50)
 
+    # Frame writer: Atomic write of frames, fsync in batches
+    frame_writer = FrameWriter(fsync_interval=FsyncInterval)
+    frame_container = FrameContainer(codec=RawCodec, fsync_interval=FsyncInterval)
+    setup_jpeg_encoder()
+
+    # Storage monitor: Checks free disk space in background, reserving space for frames in save queue
+    storage_monitor = StorageMonitor(min_free_mb=500, queue_size_function=pending_save_files)
+    storage_monitor.start()
+
     create_main_window()
 
     # Check if hw panel module available
@@ -3938,14 +4746,14 @@ def tscann8_init():
 
     # Init HDR variables
     hdr_init()
-    # Create MergeMertens Object for HDR
-    MergeMertens = cv2.createMergeMertens()
+    # Create fusion object for HDR merge in place (Mertens, in tiles processed in parallel)
+    hdr_fusion = TiledFusion()
 
     reset_controller()
 
     get_controller_version()
 
-    send_arduino_command(CMD_REPORT_PLOTTER_INFO, PlotterEnabled)
+    send_arduino_command(CMD_REPORT_PLOTTER_INFO, PlotterEnabled or PtRecorderEnabled)
 
     win.update_idletasks()
 
@@ -3969,6 +4777,9 @@ def tscann8_init():
         save_thread_3.start()
         logging.debug("Threads initialized")
 
+    # Remote monitoring server, once all data in its snapshot is available
+    setup_metrics_server()
+
     logging.debug("ALT-Scann 8 initialized")
 
 
@@ -4409,20 +5220,20 @@ def update_target_dir_wraplength(event):
 
 
 def cmd_plotter_canvas_click(event):
-    global PlotterEnabled, PlotterScroll, PlotterWindowPos
+    global PlotterEnabled, PlotterScroll
     if PlotterEnabled:
         if not PlotterScroll:
             PlotterScroll = True
             logging.debug("Enable Plotter Scroll")
         else:
             PlotterEnabled = False
-            PlotterWindowPos = 0
             logging.debug("Disable Plotter")
     else:
         PlotterEnabled = True
         PlotterScroll = False
-        PlotterWindowPos = 0
         logging.debug("Enable Plotter, without scroll")
+    if integrated_plotter is not None:
+        integrated_plotter.set_scroll(PlotterScroll)
         
 
 # ***************
@@ -4472,7 +5283,7 @@ def create_widgets():
     global rwnd_speed_control_spinbox, rwnd_speed_control_value
     global Manual_scan_activated, ManualScanEnabled, manual_scan_take_snap_btn
     global manual_scan_advance_fraction_5_btn, manual_scan_advance_fraction_20_btn
-    global plotter_canvas
+    global plotter_canvas, integrated_plotter
     global hdr_capture_active_checkbox, hdr_capture_active, hdr_viewx4_active
     global hdr_viewx4_active_checkbox, hdr_min_exp_label, hdr_min_exp_spinbox, hdr_max_exp_label, hdr_max_exp_spinbox
     global hdr_max_exp_value, hdr_min_exp_value
@@ -4481,7 +5292,9 @@ def create_widgets():
     global hdr_bracket_width_spinbox, hdr_bracket_shift_spinbox, hdr_bracket_width_label, hdr_bracket_shift_label
     global hdr_bracket_width_value, hdr_bracket_shift_value
     global hdr_bracket_auto, hdr_merge_in_place, hdr_bracket_width_auto_checkbox, hdr_merge_in_place_checkbox
+    global hdr_exposure_cycling, hdr_exposure_cycling_checkbox, hdr_adaptive_bracket, hdr_adaptive_bracket_checkbox
     global frames_to_go_str, FramesToGo, frames_to_go_time_str
+    global disk_frames_left_str, disk_time_left_str
     global retreat_movie_btn, manual_scan_checkbox
     global file_type_dropdown, file_type_dropdown_selected
     global resolution_dropdown
@@ -4919,6 +5732,25 @@ def create_widgets():
                               font=("Arial", FontSize - 2), name='frames_to_go_time')
     frames_to_go_time.grid(row=1, column=1, sticky="E")
 
+    # Frames that still fit in target disk, and scan time until full
+    disk_frames_left_label = Label(frames_to_go_frame, text="Disk:", font=("Arial", FontSize-2),
+                                   name='disk_frames_left_label')
+    disk_frames_left_label.grid(row=2, column=0, sticky="W")
+    disk_frames_left_str = tk.StringVar(value='')
+    disk_frames_left = Label(frames_to_go_frame, textvariable=disk_frames_left_str, width=8,
+                             font=("Arial", FontSize - 2), name='disk_frames_left')
+    disk_frames_left.grid(row=2, column=1, sticky="E")
+    as_tooltips.add(disk_frames_left, "Estimated number of frames that still fit in the target disk, based on "
+                                      "the actual size of the frames captured so far.")
+    disk_time_left_label = Label(frames_to_go_frame, text="Full in:", font=("Arial", FontSize-2),
+                                 name='disk_time_left_label')
+    disk_time_left_label.grid(row=3, column=0, sticky="W")
+    disk_time_left_str = tk.StringVar(value='')
+    disk_time_left = Label(frames_to_go_frame, textvariable=disk_time_left_str, width=8,
+                           font=("Arial", FontSize - 2), name='disk_time_left')
+    disk_time_left.grid(row=3, column=1, sticky="E")
+    as_tooltips.add(disk_time_left, "Estimated scan time until target disk is full, at current scan speed.")
+
     # Create frame to select S8/R8 film
     film_type_frame = LabelFrame(top_right_area_frame, text='Film type', height=1, font=("Arial", FontSize - 2),
                                  name='film_type_frame')
@@ -4956,6 +5788,9 @@ def create_widgets():
     top_right_area_row += 1
 
     # Integrated plotter
+    if integrated_plotter is not None:
+        integrated_plotter.close()  # Canvas is about to be recreated (or removed)
+        integrated_plotter = None
     if PlotterEnabled:
         integrated_plotter_frame = LabelFrame(top_right_area_frame, text='Plotter Area', font=("Arial", FontSize - 1),
                                               name='integrated_plotter_frame')
@@ -4967,6 +5802,8 @@ def create_widgets():
         as_tooltips.add(plotter_canvas, "Plotter canvas, click to disable/enable/scroll.")
         # Bind the mouse click event to the canvas widget
         plotter_canvas.bind("<Button-1>", cmd_plotter_canvas_click)
+        integrated_plotter = IntegratedPlotter(plotter_canvas, plotter_width, plotter_height)
+        integrated_plotter.set_scroll(PlotterScroll)
     top_right_area_row += 1
 
     # Create extended frame for expert and experimental areas
@@ -5579,6 +6416,34 @@ def create_widgets():
         as_tooltips.add(hdr_merge_in_place_checkbox, "Enable to perform Mertens merge on the Raspberry Pi, while "
                                                      "encoding. Allow to make some use of the time spent waiting for "
                                                      "the camera to adapt the exposure.")
+        hdr_row += 1
+
+        hdr_exposure_cycling = tk.BooleanVar(value=HdrExposureCycling)
+        hdr_exposure_cycling_checkbox = tk.Checkbutton(hdr_frame, text='Exposure cycling', height=1,
+                                                       variable=hdr_exposure_cycling, onvalue=True, offvalue=False,
+                                                       command=cmd_adjust_exposure_cycling,
+                                                       font=("Arial", FontSize - 1),
+                                                       name='hdr_exposure_cycling_checkbox')
+        hdr_exposure_cycling_checkbox.widget_type = "hdr"
+        hdr_exposure_cycling_checkbox.grid(row=hdr_row, column=0, columnspan=3, sticky=W)
+        as_tooltips.add(hdr_exposure_cycling_checkbox, "Enable to feed all exposures of a frame to the camera without "
+                                                       "waiting for each one to be applied. Captured images are "
+                                                       "matched to the requested exposures as they arrive.")
+        hdr_row += 1
+
+        hdr_adaptive_bracket = tk.BooleanVar(value=HdrAdaptiveBracket)
+        hdr_adaptive_bracket_checkbox = tk.Checkbutton(hdr_frame, text='Adaptive bracket', height=1,
+                                                       variable=hdr_adaptive_bracket, onvalue=True, offvalue=False,
+                                                       command=cmd_adjust_adaptive_bracket,
+                                                       font=("Arial", FontSize - 1),
+                                                       name='hdr_adaptive_bracket_checkbox')
+        hdr_adaptive_bracket_checkbox.widget_type = "hdr"
+        hdr_adaptive_bracket_checkbox.grid(row=hdr_row, column=0, columnspan=3, sticky=W)
+        as_tooltips.add(hdr_adaptive_bracket_checkbox, "Enable to capture, for each frame, only the exposures needed "
+                                                       "according to the middle exposure of the previous frame "
+                                                       "(shorter ones for clipped highlights, longer ones for dark "
+                                                       "shadows). The shortest exposure is always captured. Skipped "
+                                                       "exposures leave no file.")
 
         # Damaged film helpers, to help handling damaged film (broken perforations)
         damaged_film_frame = LabelFrame(experimental_frame, text='Damaged film',
@@ -5718,6 +6583,7 @@ def create_widgets():
         plotter_width = integrated_plotter_frame.winfo_width() - 10
         plotter_height = int(plotter_width / 2)
         plotter_canvas.config(width=plotter_width, height=plotter_height)
+        integrated_plotter.resize(plotter_width, plotter_height)
     # Adjust canvas size based on height of lateral frames
     win.update_idletasks()
     PreviewHeight = max(top_left_area_frame.winfo_height(), top_right_area_frame.winfo_height()) - 20  # Compensate pady
@@ -5849,6 +6715,7 @@ def main(argv):
         logging.debug("Threads disabled.")
 
     if not SimulatedRun:
+        controller_link.start(controller_event)
         arduino_listen_loop()
 
     ALT_scann_init_done = True
@@ -12,9 +12,9 @@ __copyright__ = "Copyright 2025, Juan Remirez de Esparza"
 __credits__ = ["Juan Remirez de Esparza"]
 __license__ = "MIT"
 __module__ = "ALT-Scann8 - Frame Alignment Checker"
-__version__ = "1.0.6"
-__date__ = "2025-02-12"
-__version_highlight__ = "Image viewer: Replace opencv imshow with a tkinter popup window"
+__version__ = "1.0.7"
+__date__ = "2025-02-23"
+__version_highlight__ = "Support reels with frames stored in subfolders (sharded layout)"
 __maintainer__ = "Juan Remirez de Esparza"
 __email__ = "jremirez@hotmail.com"
 __status__ = "Development"
@@ -29,6 +29,7 @@ import cv2
 import numpy as np
 import time
 import sys
+from frame_layout import FrameLayout
 try:
     import rawpy
     check_dng_frames_for_misalignment = True
@@ -253,7 +254,12 @@ def select_folder():
 
 def process_images_in_folder(folder_path, film_type, threshold):
     global processing, stop_processing_requested
-    sorted_filenames = sorted(os.listdir(folder_path))
+    # Frames can be stored in subfolders (sharded layout): List files relative to reel folder
+    sorted_filenames = []
+    for frame_folder in FrameLayout.frame_folders(folder_path):
+        prefix = os.path.relpath(frame_folder, folder_path)
+        filenames = sorted(os.listdir(frame_folder))
+        sorted_filenames.extend(filenames if prefix == '.' else [os.path.join(prefix, f) for f in filenames])
 
     file_set = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.dng') if check_dng_frames_for_misalignment else ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
     
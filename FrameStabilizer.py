@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+ALT-Scann8 Utility - Frame Stabilizer
+
+This tool is a standalone utility to stabilize the frames of a reel scanned with ALT-Scann8, using the position of
+the sprocket hole recorded for each frame while scanning (ALT-Scann8.registration.csv in the reel folder, see
+frame_registration.py). Each frame is shifted so that its hole is at the reference position (median position of
+the reel), and cropped by the same margin on all frames, so that stabilized frames have no borders.
+Positions are recorded on the image used for the measure (usually smaller than the saved frame), so shifts are
+scaled to the size of the saved frames. All frames must have the same size (frames of a different size are refused).
+As offsets are already known, each frame is just read, shifted and written (no motion estimation), using several
+processes in parallel. Output files follow the same naming (and subfolder layout, if any) as the input frames.
+
+Licensed under a MIT LICENSE.
+"""
+
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "ALT-Scann8 - Frame Stabilizer"
+__version__ = "1.0.0"
+__date__ = "2025-03-07"
+__version_highlight__ = "Frame Stabilizer - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+# ######### Imports section ##########
+
+import os
+import sys
+import time
+import getopt
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+from frame_scanner import FrameScanner
+from frame_registration import load_registration, REGISTRATION_FILENAME
+
+SUPPORTED_TYPES = ('jpg', 'png', 'tif')
+
+
+def compute_shifts(registration, frame_size, horizontal=True):
+    # Returns dictionary frame -> (dx, dy) moving the hole of each frame to the median position of the reel
+    # Registration positions are relative to the measured image (height, width), shifts are scaled to frame_size
+    frame_height, frame_width = frame_size
+    positions = {frame: (y / height, x / width if x is not None else None)
+                 for frame, (y, x, height, width) in registration.items() if height > 0 and width > 0}
+    if len(positions) == 0:
+        return {}
+    reference_y = float(np.median([y for y, x in positions.values()]))
+    x_values = [x for y, x in positions.values() if x is not None]
+    reference_x = float(np.median(x_values)) if horizontal and len(x_values) > 0 else None
+    shifts = {}
+    for frame, (y, x) in positions.items():
+        dx = (reference_x - x) * frame_width if reference_x is not None and x is not None else 0.0
+        shifts[frame] = (dx, (reference_y - y) * frame_height)
+    return shifts
+
+
+def auto_margin(shifts, percentile=99):
+    # Crop margin (x, y) covering the shifts of most frames (shifts beyond it are clamped, usually bad measures)
+    dx = np.abs([shift[0] for shift in shifts.values()])
+    dy = np.abs([shift[1] for shift in shifts.values()])
+    return int(np.ceil(np.percentile(dx, percentile))), int(np.ceil(np.percentile(dy, percentile)))
+
+
+def stabilize_frame(source_path, target_path, frame_size, dx, dy, margin_x, margin_y, integer_shift, quality):
+    image = cv2.imread(source_path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"Cannot read {source_path}")
+    height, width = image.shape[:2]
+    if (height, width) != frame_size:
+        # Shifts and crop margins are in pixels of frame_size, cannot be applied to a different size
+        raise ValueError(f"Frame size is {width}x{height}, expected {frame_size[1]}x{frame_size[0]}")
+    dx = max(-margin_x, min(margin_x, dx))
+    dy = max(-margin_y, min(margin_y, dy))
+    if integer_shift:
+        # Plain crop of the shifted area, no interpolation
+        left = margin_x - int(round(dx))
+        top = margin_y - int(round(dy))
+        result = image[top:top + height - 2 * margin_y, left:left + width - 2 * margin_x]
+    else:
+        # Sub-pixel shift, computed only for the cropped area
+        matrix = np.float32([[1, 0, dx - margin_x], [0, 1, dy - margin_y]])
+        result = cv2.warpAffine(image, matrix, (width - 2 * margin_x, height - 2 * margin_y),
+                                flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    if target_path.lower().endswith('.jpg'):
+        cv2.imwrite(target_path, result, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    else:
+        cv2.imwrite(target_path, result)
+    return target_path
+
+
+def stabilize_folder(source_folder, target_folder, registration_path, horizontal, margin, integer_shift, quality,
+                     processes):
+    registration = load_registration(registration_path)
+    if len(registration) == 0:
+        print(f"No frame registration found in {registration_path}")
+        return
+    files = [(frame, name) for frame, hdr_idx, name in FrameScanner(source_folder).frame_files()
+             if name.rsplit('.', 1)[1].lower() in SUPPORTED_TYPES]
+    if len(files) == 0:
+        print(f"No frames ({', '.join(SUPPORTED_TYPES)}) found in {source_folder}")
+        return
+    # Size of saved frames (taken from the first one), to scale positions measured on a smaller image
+    first_image = cv2.imread(os.path.join(source_folder, files[0][1]), cv2.IMREAD_UNCHANGED)
+    if first_image is None:
+        print(f"Cannot read {files[0][1]}")
+        return
+    frame_size = first_image.shape[:2]
+    del first_image
+    shifts = compute_shifts(registration, frame_size, horizontal)
+    if len(shifts) == 0:
+        print(f"No valid frame registration found in {registration_path}")
+        return
+    margin_x, margin_y = auto_margin(shifts) if margin is None else margin
+    if not horizontal:
+        margin_x = 0
+    not_registered = sum(1 for frame, name in files if frame not in shifts)
+    for subfolder in {os.path.dirname(name) for frame, name in files}:
+        os.makedirs(os.path.join(target_folder, subfolder), exist_ok=True)
+    print(f"Stabilizing {len(files)} frames from {source_folder} into {target_folder}, cropping {margin_x} px "
+          f"horizontally and {margin_y} px vertically on each side ({not_registered} frames without registration "
+          f"are only cropped)")
+    start_time = time.time()
+    errors = 0
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(stabilize_frame, os.path.join(source_folder, name),
+                                   os.path.join(target_folder, name), frame_size, *shifts.get(frame, (0.0, 0.0)),
+                                   margin_x, margin_y, integer_shift, quality)
+                   for frame, name in files]
+        for (frame, name), future in zip(files, futures):
+            try:
+                future.result()
+            except Exception as e:
+                errors += 1
+                print(f"{name}: Stabilization failed: {e}")
+    print(f"Done, {round((time.time() - start_time) * 1000 / len(files), 1)} ms per frame, {errors} errors")
+
+
+def main(argv):
+    source_folder = '.'
+    target_folder = None
+    registration_path = None
+    horizontal = True
+    margin = None
+    integer_shift = False
+    quality = 95
+    processes = None
+
+    opts, args = getopt.getopt(argv, "i:o:r:m:q:j:vnh")
+
+    for opt, arg in opts:
+        if opt == '-i':
+            source_folder = arg
+        elif opt == '-o':
+            target_folder = arg
+        elif opt == '-r':
+            registration_path = arg
+        elif opt == '-m':
+            values = [int(value) for value in arg.split(',')]
+            margin = (values[0], values[-1])
+        elif opt == '-q':
+            quality = int(arg)
+        elif opt == '-j':
+            processes = int(arg)
+        elif opt == '-v':
+            horizontal = False
+        elif opt == '-n':
+            integer_shift = True
+        elif opt == '-h':
+            print("ALT-Scann 8 Frame Stabilizer command line parameters")
+            print("  -i <folder>    Reel folder with frames captured by ALT-Scann8 (current folder by default)")
+            print("  -o <folder>    Folder where stabilized frames are written (<input folder>/stabilized by default)")
+            print(f"  -r <file>      Registration file ({REGISTRATION_FILENAME} in input folder by default)")
+            print("  -m <x,y>       Crop margin in pixels on each side (automatic by default)")
+            print("  -q <quality>   JPG quality (95 by default)")
+            print("  -j <processes> Number of processes (one per CPU by default)")
+            print("  -v             Vertical stabilization only")
+            print("  -n             Shift by whole pixels (plain crop, no interpolation)")
+            exit()
+
+    if registration_path is None:
+        registration_path = os.path.join(source_folder, REGISTRATION_FILENAME)
+    if not os.path.isfile(registration_path):
+        print(f"Registration file {registration_path} not found (enable 'Record frame registration' when scanning)")
+        exit(1)
+    stabilize_folder(source_folder, target_folder if target_folder else os.path.join(source_folder, 'stabilized'),
+                     registration_path, horizontal, margin, integer_shift, quality, processes)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
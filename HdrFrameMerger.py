@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+ALT-Scann8 Utility - HDR Frame Merger
+
+This tool is a standalone utility to merge HDR frames captured by ALT-Scann8 (picture-NNNNN.jpg plus
+picture-NNNNN.N.jpg sub-frames) using Mertens exposure fusion, splitting each frame in tiles processed in
+parallel. It can also benchmark tiled fusion against a single MergeMertens call, checking that the max
+difference between both stays below a threshold (exit status is 1 otherwise).
+
+Licensed under a MIT LICENSE.
+"""
+
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "ALT-Scann8 - HDR Frame Merger"
+__version__ = "1.0.0"
+__date__ = "2025-02-27"
+__version_highlight__ = "HDR Frame Merger - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+# ######### Imports section ##########
+
+import os
+import sys
+import time
+import getopt
+import numpy as np
+import cv2
+from frame_scanner import FrameScanner
+from tiled_fusion import TiledFusion
+
+# Max allowed difference between tiled fusion and a single MergeMertens call (results in 0-1 range, 0.01 is
+# about 2.5 levels in the 8 bit merged frames)
+MAX_DIFFERENCE = 0.01
+
+
+def hdr_frame_sets(folder):
+    # Returns sorted list of (frame, [file paths]) for frames having HDR sub-frames
+    sets = {}
+    for frame, hdr_idx, name in FrameScanner(folder).frame_files():
+        sets.setdefault(frame, []).append((max(hdr_idx, 1), os.path.join(folder, name)))
+    return [(frame, [path for idx, path in sorted(files)]) for frame, files in sorted(sets.items())
+            if len(files) > 1]
+
+
+def fuse(images, fusion):
+    merged = fusion.process(images)
+    return cv2.normalize(merged, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+
+
+def merge_folder(source_folder, target_folder, fusion):
+    if not os.path.isdir(target_folder):
+        os.makedirs(target_folder)
+    frame_sets = hdr_frame_sets(source_folder)
+    print(f"Merging {len(frame_sets)} HDR frames from {source_folder} into {target_folder}")
+    start_time = time.time()
+    for frame, files in frame_sets:
+        images = [cv2.imread(path) for path in files]
+        if any(image is None for image in images):
+            print(f"Frame {frame}: Cannot read all sub-frames, skipping")
+            continue
+        target_file = os.path.join(target_folder, os.path.basename(files[0]))
+        cv2.imwrite(target_file, fuse(images, fusion), [cv2.IMWRITE_JPEG_QUALITY, 95])
+        print(f"Frame {frame}: {len(files)} exposures merged into {target_file}")
+    if len(frame_sets) > 0:
+        print(f"Done, {round((time.time() - start_time) * 1000 / len(frame_sets), 1)} ms per frame")
+
+
+def benchmark(source_folder, fusion, frames=5, threshold=MAX_DIFFERENCE):
+    # Compare tiled fusion with a single MergeMertens call, on the first frames of the folder
+    # Returns False if the max difference between both exceeds the threshold
+    frame_sets = hdr_frame_sets(source_folder)[:frames]
+    if len(frame_sets) == 0:
+        print(f"No HDR frames found in {source_folder}")
+        return False
+    merge_mertens = cv2.createMergeMertens()
+    monolithic_time = tiled_time = 0
+    max_difference = mean_difference = 0
+    for frame, files in frame_sets:
+        images = [cv2.imread(path).astype(np.float32) for path in files]
+        curtime = time.time()
+        reference = merge_mertens.process(images)
+        monolithic_time += time.time() - curtime
+        curtime = time.time()
+        tiled = fusion.process(images)
+        tiled_time += time.time() - curtime
+        difference = np.abs(reference - tiled)
+        max_difference = max(max_difference, float(difference.max()))
+        mean_difference += float(difference.mean())
+    count = len(frame_sets)
+    height, width = cv2.imread(frame_sets[0][1][0]).shape[:2]
+    print(f"Benchmark on {count} frames of {width}x{height}, {len(frame_sets[0][1])} exposures:")
+    print(f"  Single MergeMertens call: {round(monolithic_time * 1000 / count, 1)} ms per frame")
+    print(f"  Tiled fusion ({fusion.tile_size} px tiles, {fusion.overlap} px overlap, {fusion.max_workers} threads): "
+          f"{round(tiled_time * 1000 / count, 1)} ms per frame")
+    print(f"  Mean difference: {mean_difference / count:.4f}")
+    print(f"  Max difference: {max_difference:.4f} "
+          f"({'OK' if max_difference <= threshold else 'FAILED'}, threshold {threshold})")
+    return max_difference <= threshold
+
+
+def main(argv):
+    source_folder = '.'
+    target_folder = None
+    tile_size = 1024
+    overlap = 256
+    threads = None
+    do_benchmark = False
+    threshold = MAX_DIFFERENCE
+
+    opts, args = getopt.getopt(argv, "i:o:t:v:j:d:bh")
+
+    for opt, arg in opts:
+        if opt == '-i':
+            source_folder = arg
+        elif opt == '-o':
+            target_folder = arg
+        elif opt == '-t':
+            tile_size = int(arg)
+        elif opt == '-v':
+            overlap = int(arg)
+        elif opt == '-j':
+            threads = int(arg)
+        elif opt == '-d':
+            threshold = float(arg)
+        elif opt == '-b':
+            do_benchmark = True
+        elif opt == '-h':
+            print("ALT-Scann 8 HDR Frame Merger command line parameters")
+            print("  -i <folder>    Folder with HDR frames captured by ALT-Scann8 (current folder by default)")
+            print("  -o <folder>    Folder where merged frames are written (<input folder>/merged by default)")
+            print("  -t <pixels>    Tile size (1024 by default)")
+            print("  -v <pixels>    Tile overlap (256 by default)")
+            print("  -j <threads>   Number of threads (up to 4 by default)")
+            print("  -b             Benchmark tiled fusion against a single MergeMertens call")
+            print(f"  -d <value>     Max difference allowed by benchmark ({MAX_DIFFERENCE} by default)")
+            exit()
+
+    fusion = TiledFusion(tile_size, overlap, threads)
+    if do_benchmark:
+        success = benchmark(source_folder, fusion, threshold=threshold)
+        fusion.close()
+        sys.exit(0 if success else 1)
+    merge_folder(source_folder, target_folder if target_folder else os.path.join(source_folder, 'merged'), fusion)
+    fusion.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
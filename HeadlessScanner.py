@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+ALT-Scann8 Utility - Headless Scanner
+
+This tool scans a reel without the user interface, using the same scan engine (ScanSession, see scan_session.py):
+e.g. scan 2000 frames to a folder, with the settings saved by ALT-Scann8 (ALT-Scann8.json). Controller settings
+(film type, frame detection, scan speed) and basic camera settings (exposure, white balance) are taken from the
+settings file; frames are saved with the same naming and layout as ALT-Scann8, so that scans can be resumed from
+either one. The next frame is requested as soon as the current one is exposed, while it is saved.
+With -s, the scan is simulated (no scanner or camera required, nothing is saved), to benchmark the scan engine.
+
+Licensed under a MIT LICENSE.
+"""
+
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "ALT-Scann8 - Headless Scanner"
+__version__ = "1.0.0"
+__date__ = "2025-03-08"
+__version_highlight__ = "Headless Scanner - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+# ######### Imports section ##########
+
+import os
+import sys
+import time
+import json
+import getopt
+import logging
+from scan_session import ScanSession, ControllerLink, SimulatedController
+from frame_writer import FrameWriter
+from frame_layout import FrameLayout
+from frame_scanner import FrameScanner
+
+SETTINGS_FILENAME = "ALT-Scann8.json"
+SUPPORTED_TYPES = ('jpg', 'png', 'dng')
+
+# Controller commands used for initial setup (same codes as in controller and UI)
+CMD_SET_REGULAR_8 = 18
+CMD_SET_SUPER_8 = 19
+CMD_SET_PT_LEVEL = 50
+CMD_SET_MIN_FRAME_STEPS = 52
+CMD_SET_FRAME_FINE_TUNE = 54
+CMD_SET_EXTRA_STEPS = 56
+CMD_SET_SCAN_SPEED = 70
+CMD_SET_STALL_TIME = 72
+
+
+def load_settings(path):
+    if path is None or not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def setup_controller(controller, settings, inactivity_delay):
+    # Same settings sent by ALT-Scann8 at start up (auto PT level and frame steps unless disabled)
+    controller.send(CMD_SET_REGULAR_8 if settings.get("FilmType") == "R8" else CMD_SET_SUPER_8)
+    controller.send(CMD_SET_PT_LEVEL, 0 if settings.get("AutoPtLevelEnabled", True)
+                    else int(settings.get("PTLevel", 0)))
+    controller.send(CMD_SET_MIN_FRAME_STEPS, 0 if settings.get("AutoFrameStepsEnabled", True)
+                    else int(settings.get("MinFrameSteps", 0)))
+    controller.send(CMD_SET_FRAME_FINE_TUNE, int(settings.get("FrameFineTune", 0)))
+    controller.send(CMD_SET_EXTRA_STEPS, min(int(settings.get("FrameExtraSteps", 0)), 20))
+    controller.send(CMD_SET_SCAN_SPEED, int(settings.get("ScanSpeed", 5)))
+    controller.send(CMD_SET_STALL_TIME, inactivity_delay)
+
+
+def open_camera(settings):
+    from picamera2 import Picamera2
+    from libcamera import Transform
+
+    camera = Picamera2()
+    sensor_size = camera.sensor_resolution
+    config = camera.create_still_configuration(main={"size": sensor_size}, raw={"size": sensor_size},
+                                               transform=Transform(hflip=True), buffer_count=3)
+    camera.configure(config)
+    auto_exposure = settings.get("AutoExpEnabled", True)
+    camera.set_controls({"AeEnable": auto_exposure})
+    if not auto_exposure and "CurrentExposure" in settings:
+        camera.set_controls({"ExposureTime": int(settings["CurrentExposure"])})
+    camera.set_controls({"AwbEnable": bool(settings.get("AutoWbEnabled", False))})
+    if "GainRed" in settings and "GainBlue" in settings:
+        camera.set_controls({"ColourGains": (float(settings["GainRed"]), float(settings["GainBlue"]))})
+    camera.start()
+    return camera
+
+
+def frame_capturer(camera, writer, layout, file_type):
+    # Returns capture function for the scan session
+    def capture_frame(session):
+        request = camera.capture_request()
+        try:
+            session.request_next_frame()    # Frame exposed: Film moves while it is saved
+            filename = layout.frame_filename(session.state.current_frame, 0, file_type)
+            if file_type == 'dng':
+                writer.write(filename, session.state.current_frame, 0, lambda path: request.save_dng(path))
+            else:
+                writer.write(filename, session.state.current_frame, 0, lambda path: request.save('main', path))
+        finally:
+            request.release()
+    return capture_frame
+
+
+def simulated_capturer(capture_time):
+    def capture_frame(session):
+        time.sleep(capture_time / 2)    # Exposure
+        session.request_next_frame()
+        time.sleep(capture_time / 2)    # Save
+    return capture_frame
+
+
+def print_progress(event, session):
+    state = session.state
+    if event == 'frame' and state.session_frames % 100 == 0:
+        print(f"Frame {state.current_frame}: {state.session_frames} frames in {state.elapsed():.1f} s, "
+              f"{state.fpm if state.fpm != -1 else '-'} frames per minute")
+    elif event == 'error':
+        print(f"Scan error at frame {state.current_frame}")
+
+
+def main(argv):
+    folder = None
+    frames = 0
+    settings_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SETTINGS_FILENAME)
+    file_type = None
+    simulate = False
+    frame_time = 0.1
+    capture_time = 0.05
+
+    opts, args = getopt.getopt(argv, "o:n:c:f:st:k:h")
+
+    for opt, arg in opts:
+        if opt == '-o':
+            folder = arg
+        elif opt == '-n':
+            frames = int(arg)
+        elif opt == '-c':
+            settings_path = arg
+        elif opt == '-f':
+            file_type = arg.lower()
+        elif opt == '-s':
+            simulate = True
+        elif opt == '-t':
+            frame_time = float(arg) / 1000
+        elif opt == '-k':
+            capture_time = float(arg) / 1000
+        elif opt == '-h':
+            print("ALT-Scann 8 Headless Scanner command line parameters")
+            print("  -o <folder>    Folder where frames are saved (required unless simulated)")
+            print("  -n <frames>    Number of frames to scan (0 by default: Until end of reel)")
+            print(f"  -c <file>      Settings file ({SETTINGS_FILENAME} of ALT-Scann8 by default)")
+            print(f"  -f <type>      File type, {'/'.join(SUPPORTED_TYPES)} (as in settings file by default, jpg)")
+            print("  -s             Simulated scan (no scanner required, nothing saved)")
+            print("  -t <ms>        Simulated scan: Time to move film to the next frame (100 by default)")
+            print("  -k <ms>        Simulated scan: Time to capture and save each frame (50 by default)")
+            exit()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    settings = load_settings(settings_path)
+    inactivity_delay = 6
+
+    if simulate:
+        controller = SimulatedController(frame_time)
+        start_frame = 0
+        capture_frame = simulated_capturer(capture_time)
+        camera = None
+        writer = None
+    else:
+        if folder is None:
+            print("Target folder required (-o)")
+            exit(1)
+        if file_type is None:
+            file_type = settings.get("FileType", 'jpg')
+        if file_type not in SUPPORTED_TYPES:
+            print(f"Unsupported file type {file_type}")
+            exit(1)
+        os.makedirs(folder, exist_ok=True)
+        layout = FrameLayout.load(folder)
+        if layout is None:
+            layout = FrameLayout()
+        start_frame = FrameScanner(folder).probe_last_frame(file_type)     # Resume after last frame in folder
+        import smbus
+        controller = ControllerLink(smbus.SMBus(1))
+        setup_controller(controller, settings, inactivity_delay)
+        camera = open_camera(settings)
+        writer = FrameWriter(folder)
+        capture_frame = frame_capturer(camera, writer, layout, file_type)
+
+    session = ScanSession(controller, capture_frame, start_frame, frames, inactivity_delay)
+    session.add_listener(print_progress)
+    controller.start(session.handle_controller_event)
+    print(f"Scanning {frames if frames > 0 else 'all'} frames"
+          f"{' (simulated)' if simulate else f' to {folder}, starting at frame {start_frame + 1}'}")
+    session.start()
+    try:
+        while not session.wait(1):
+            pass
+    except KeyboardInterrupt:
+        session.request_stop("Interrupted by user")
+        session.wait()
+    controller.stop()
+    if writer is not None:
+        writer.close()
+    if camera is not None:
+        camera.stop()
+        camera.close()
+
+    state = session.state
+    print(f"Scan ended ({state.stop_reason}): {state.session_frames} frames in {state.elapsed():.1f} s "
+          f"({state.session_frames * 60 / max(state.elapsed(), 1e-6):.1f} frames per minute), "
+          f"{state.scan_errors} scan errors, {state.forced_frames} forced frames, "
+          f"{state.advance_overlap_time:.1f} s overlapped with film advance")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+"""
+ALT-Scann8 Utility - Pico Controller Harness
+
+This tool runs the Pico controller firmware (ALT-Scann8-Pico-Controller.c) on the workstation, to benchmark and
+regression-test frame detection without a scanner. The firmware is built for Linux against stub Pico SDK headers
+(firmware_harness folder, requires make and g++), and replays a phototransistor (PT) trace: ADC reads return the PT
+level at the current film position, which advances one step per capstan motor step. Time is simulated, so runs are
+deterministic. The RPi side is emulated as the UI does it (commands and responses over the I2C slave interface).
+Traces can be a PT log recorded by ALT-Scann8 (see pt_recorder.py), a text file with one PT value per step, or a
+synthetic trace.
+Results can be saved as a baseline, and later runs compared with it: Any change in detected frames or scan errors,
+or a slower scan, is reported as a regression (exit code 1).
+
+Licensed under a MIT LICENSE.
+"""
+
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "ALT-Scann8 - Pico Controller Harness"
+__version__ = "1.0.0"
+__date__ = "2025-03-06"
+__version_highlight__ = "Pico Controller Harness - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+# ######### Imports section ##########
+
+import os
+import sys
+import getopt
+import json
+import subprocess
+import tempfile
+import time
+import numpy as np
+from pt_recorder import PT_LOG_FILENAME, PT_LOG_MAGIC
+from PtSignalAnalyzer import build_trace, boundary_distance
+
+HARNESS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "firmware_harness")
+HARNESS_EXECUTABLE = os.path.join(HARNESS_FOLDER, "pico_controller_host")
+# Film pitch (S8 4.234 mm, R8 3.81 mm) in capstan steps (14.3 mm capstan, 3200 microsteps per turn)
+SYNTHETIC_FRAME_STEPS = {'s8': 301, 'r8': 271}
+TIME_TOLERANCE = 0.05   # Scan time increase reported as regression
+
+
+def build():
+    # make only rebuilds if firmware or harness changed
+    result = subprocess.run(['make', '-s', '-C', HARNESS_FOLDER], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Firmware harness build failed:\n{result.stdout}{result.stderr}")
+
+
+def synthetic_trace(frames, frame_steps, hole_steps=40, base_level=60, hole_level=300, noise=10, seed=0):
+    # Returns (trace, boundaries): Perforation at the start of each frame, detection expected at its leading edge
+    rng = np.random.default_rng(seed)
+    frame = np.full(frame_steps, base_level)
+    frame[:hole_steps] = hole_level
+    trace = np.tile(frame, frames) + rng.integers(-noise, noise + 1, frames * frame_steps)
+    return np.clip(trace, 0, 4095), [frame_steps * i for i in range(1, frames)]
+
+
+def load_trace(path):
+    # Returns (trace, boundaries) from a reel folder or PT log recorded by ALT-Scann8, or from a text file
+    is_pt_log = os.path.isdir(path)
+    if not is_pt_log:
+        with open(path, 'rb') as f:
+            is_pt_log = f.read(len(PT_LOG_MAGIC)) == PT_LOG_MAGIC
+    if is_pt_log:
+        trace, boundaries, min_frame_steps = build_trace(path)
+        return trace, boundaries
+    return np.loadtxt(path, dtype=int, delimiter=',' if path.endswith('.csv') else None).ravel(), []
+
+
+def run(trace, film_type='s8', pt_level=0, min_frame_steps=0, ratio=40, extra_steps=0, speed=10, capture_delay=0):
+    """
+    Runs the firmware on the trace, returns a dictionary with detected frames (steps, PT level, position, time and
+    latency in us), scan errors (steps, position), end reason and position, virtual and wall times.
+    """
+    build()
+    with tempfile.TemporaryDirectory() as folder:
+        trace_path = os.path.join(folder, "trace.bin")
+        output_path = os.path.join(folder, "events.txt")
+        np.asarray(trace, dtype='<i4').tofile(trace_path)
+        subprocess.run([HARNESS_EXECUTABLE, '-t', trace_path, '-o', output_path, '-f', film_type,
+                        '-p', str(pt_level), '-m', str(min_frame_steps), '-r', str(ratio), '-x', str(extra_steps),
+                        '-s', str(speed), '-c', str(capture_delay)], stdout=subprocess.DEVNULL, check=True)
+        with open(output_path) as f:
+            lines = [line.split() for line in f]
+    result = {'frames': [], 'errors': [], 'end': None, 'end_position': 0, 'time_us': 0, 'wall_seconds': 0}
+    for fields in lines:
+        if fields[0] == 'frame':
+            steps, pt, position, time_us, latency_us = map(int, fields[2:7])
+            result['frames'].append({'steps': steps, 'pt': pt, 'position': position, 'time_us': time_us,
+                                     'latency_us': latency_us})
+        elif fields[0] == 'error':
+            result['errors'].append({'steps': int(fields[1]), 'position': int(fields[3])})
+        elif fields[0] == 'end':
+            result['end'] = fields[1]
+            result['end_position'] = int(fields[2])
+            result['time_us'] = int(fields[3])
+            result['wall_seconds'] = float(fields[4])
+    return result
+
+
+def summarize(result, boundaries):
+    frames = result['frames']
+    print(f"Frames detected: {len(frames)}, scan errors: {len(result['errors'])}, "
+          f"end: {result['end']} at step {result['end_position']}")
+    if len(frames) > 0:
+        steps = np.array([frame['steps'] for frame in frames])
+        latency = np.array([frame['latency_us'] for frame in frames]) / 1000
+        print(f"Steps per frame: {steps.mean():.1f}±{steps.std():.1f} ({steps.min()}-{steps.max()})")
+        print(f"Frame request to frame available: {latency.mean():.1f} ms average, {latency.max():.1f} ms max")
+    virtual_seconds = result['time_us'] / 1e6
+    print(f"Scan time: {virtual_seconds:.2f} s ({len(frames) / max(virtual_seconds, 1e-6):.1f} fps), "
+          f"simulated in {result['wall_seconds']:.2f} s")
+    if len(boundaries) > 0:
+        distance = boundary_distance([frame['position'] for frame in frames], boundaries)
+        print(f"Distance to reference frames: {distance:.1f} steps average ({len(boundaries)} reference frames)")
+
+
+def compare(result, baseline):
+    # Returns list of regressions (empty if none)
+    regressions = []
+    for key in ('frames', 'errors'):
+        current = [(item['steps'], item['position']) for item in result[key]]
+        reference = [(item['steps'], item['position']) for item in baseline[key]]
+        if current != reference:
+            first = next((i for i, (a, b) in enumerate(zip(current, reference)) if a != b),
+                         min(len(current), len(reference)))
+            regressions.append(f"{key}: {len(current)} (baseline {len(reference)}), first difference at #{first + 1}")
+    if result['end'] != baseline['end']:
+        regressions.append(f"end: {result['end']} (baseline {baseline['end']})")
+    if result['time_us'] > baseline['time_us'] * (1 + TIME_TOLERANCE):
+        regressions.append(f"scan time: {result['time_us'] / 1e6:.2f} s (baseline {baseline['time_us'] / 1e6:.2f} s)")
+    return regressions
+
+
+def main(argv):
+    trace_path = None
+    synthetic_frames = 500
+    options = {'film_type': 's8', 'pt_level': 0, 'min_frame_steps': 0, 'ratio': 40, 'extra_steps': 0, 'speed': 10,
+               'capture_delay': 0}
+    save_baseline = None
+    check_baseline = None
+
+    opts, args = getopt.getopt(argv, "i:n:f:t:m:r:x:s:c:b:k:h")
+
+    for opt, arg in opts:
+        if opt == '-i':
+            trace_path = arg
+        elif opt == '-n':
+            synthetic_frames = int(arg)
+        elif opt == '-f':
+            options['film_type'] = arg.lower()
+        elif opt == '-t':
+            options['pt_level'] = 0 if arg == 'auto' else int(arg)
+        elif opt == '-m':
+            options['min_frame_steps'] = 0 if arg == 'auto' else int(arg)
+        elif opt == '-r':
+            options['ratio'] = int(arg)
+        elif opt == '-x':
+            options['extra_steps'] = int(arg)
+        elif opt == '-s':
+            options['speed'] = int(arg)
+        elif opt == '-c':
+            options['capture_delay'] = float(arg)
+        elif opt == '-b':
+            save_baseline = arg
+        elif opt == '-k':
+            check_baseline = arg
+        elif opt == '-h':
+            print("ALT-Scann 8 Pico Controller Harness command line parameters")
+            print(f"  -i <path>      Reel folder or {PT_LOG_FILENAME} file, or text file with one PT value per step")
+            print("  -n <frames>    Frames of synthetic trace, if no trace file given (500 by default)")
+            print("  -f s8|r8       Film type (s8 by default)")
+            print("  -t <level>     PT level threshold, 'auto' for automatic (default)")
+            print("  -m <steps>     Minimum frame steps, 'auto' for automatic (default)")
+            print("  -r <ratio>     Automatic PT level ratio, 5 to 95 (40 by default)")
+            print("  -x <steps>     Extra steps after frame detection (0 by default)")
+            print("  -s <speed>     Scan speed, 1 to 10 (10 by default)")
+            print("  -c <ms>        Capture delay, time taken by RPi to capture each frame (0 by default)")
+            print("  -b <file>      Save results as baseline")
+            print("  -k <file>      Compare results with baseline, exit code 1 if any regression")
+            exit()
+
+    if trace_path is not None:
+        trace, boundaries = load_trace(trace_path)
+        if len(trace) == 0:
+            print(f"No PT signal found in {trace_path}")
+            exit(1)
+    else:
+        trace, boundaries = synthetic_trace(synthetic_frames, SYNTHETIC_FRAME_STEPS.get(options['film_type'], 301))
+    print(f"Replaying {len(trace)} steps through Pico controller firmware")
+    curtime = time.time()
+    result = run(trace, **options)
+    result['options'] = options
+    summarize(result, boundaries)
+    elapsed = time.time() - curtime
+    print(f"Total time (build and run): {elapsed:.2f} s")
+
+    if save_baseline is not None:
+        with open(save_baseline, 'w') as f:
+            json.dump(result, f, indent=1)
+        print(f"Baseline saved to {save_baseline}")
+    if check_baseline is not None:
+        with open(check_baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('options') != options:
+            print(f"Warning: Baseline was generated with different options ({baseline.get('options')})")
+        regressions = compare(result, baseline)
+        if len(regressions) > 0:
+            print("Regressions found:")
+            for regression in regressions:
+                print(f"  {regression}")
+            exit(1)
+        print("No regressions found")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
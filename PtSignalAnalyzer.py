@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+"""
+ALT-Scann8 Utility - PT Signal Analyzer
+
+This tool is a standalone utility to tune perforation detection offline, using the phototransistor (PT) signal
+recorded by ALT-Scann8 while scanning a reel (ALT-Scann8.pt.log in the reel folder, see pt_recorder.py).
+The recorded signal is replayed, one sample per capstan step, through a Python port of the frame detection logic
+of the controller (GetLevelPT/IsHoleDetected/adjust_framesteps in ALT-Scann8-Controller.ino), for each combination
+of fixed thresholds, auto threshold ratios and minimum frame steps requested. Detected frames are then compared
+with the frames detected during the actual scan.
+The controller reports the PT level at most every 20 ms (not at every step), so the signal of each frame is
+resampled to one value per step using the number of steps reported with each detected frame.
+
+Licensed under a MIT LICENSE.
+"""
+
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "ALT-Scann8 - PT Signal Analyzer"
+__version__ = "1.0.0"
+__date__ = "2025-03-05"
+__version_highlight__ = "PT Signal Analyzer - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+# ######### Imports section ##########
+
+import sys
+import getopt
+import itertools
+import numpy as np
+from pt_recorder import PtLogReader, EVENT_FRAME_AVAILABLE, EVENT_SCAN_ERROR, EVENT_REPORT_AUTO_LEVELS, \
+    EVENT_REPORT_PLOTTER_INFO
+
+
+class PerforationDetector:
+    # Port of controller frame detection. A threshold of None means automatic threshold (PT_Level_Auto)
+    def __init__(self, min_frame_steps, threshold=None, auto_level_ratio=40, frame_steps_auto=True):
+        self.min_frame_steps = min_frame_steps
+        self.original_min_frame_steps = min_frame_steps
+        self.pt_level_auto = threshold is None
+        self.threshold = threshold if threshold is not None else 90
+        self.auto_level_ratio = auto_level_ratio
+        self.frame_steps_auto = frame_steps_auto
+        self.max_pt_dynamic = 0
+        self.min_pt_dynamic = 10000
+        self.frame_steps_done = 0
+        self.steps_per_frame_list = []
+
+    def get_level_pt(self, pt):
+        # Dynamic max/min (multiplied by 10 for resolution), slowly converging towards each other
+        self.max_pt_dynamic = max(pt * 10, self.max_pt_dynamic)
+        self.min_pt_dynamic = min(pt * 10, self.min_pt_dynamic)
+        if self.max_pt_dynamic > self.min_pt_dynamic + 5:
+            self.max_pt_dynamic -= 5
+        if self.min_pt_dynamic < self.max_pt_dynamic - 15:
+            self.min_pt_dynamic += 15
+        if self.pt_level_auto and self.frame_steps_done >= int(self.min_frame_steps * 0.9):
+            ratio = self.auto_level_ratio / 100
+            fixed_margin = int((self.max_pt_dynamic - self.min_pt_dynamic) * 0.1)
+            user_margin = int((self.max_pt_dynamic - self.min_pt_dynamic) * 0.9 * ratio)
+            self.threshold = int((self.min_pt_dynamic + fixed_margin + user_margin) / 10)
+        return pt
+
+    def is_hole_detected(self, pt):
+        return self.get_level_pt(pt) >= self.threshold and self.frame_steps_done >= self.min_frame_steps
+
+    def adjust_framesteps(self, frame_steps):
+        if frame_steps > int(self.original_min_frame_steps * 1.05) or \
+                frame_steps < int(self.original_min_frame_steps * 0.95):
+            return
+        self.steps_per_frame_list = (self.steps_per_frame_list + [frame_steps])[-32:]
+        if self.frame_steps_auto:
+            self.min_frame_steps = int(sum(self.steps_per_frame_list) / len(self.steps_per_frame_list)) - 5
+
+    def step(self, pt):
+        # Processes one capstan step, returns ('frame', steps), ('error', steps) or None
+        if self.is_hole_detected(pt):
+            frame_steps = self.frame_steps_done
+            self.adjust_framesteps(frame_steps)
+            self.frame_steps_done = 0
+            return 'frame', frame_steps
+        self.frame_steps_done += 1
+        if self.frame_steps_done > 2 * self.min_frame_steps:
+            frame_steps = self.frame_steps_done
+            self.frame_steps_done = 0
+            return 'error', frame_steps
+        return None
+
+
+def build_trace(log_path):
+    """
+    Returns (trace, boundaries, min_frame_steps): PT value per step, step positions of frames detected during the
+    scan, and MinFrameSteps last reported by the controller (None if never reported).
+    """
+    trace = []
+    boundaries = []
+    min_frame_steps = None
+    samples = []    # (timestamp, pt) since last frame
+    for event, timestamp, frame, param1, param2 in PtLogReader(log_path).records():
+        if event == EVENT_REPORT_PLOTTER_INFO:
+            samples.append((timestamp, param1))
+        elif event == EVENT_REPORT_AUTO_LEVELS:
+            min_frame_steps = param2
+        elif event in (EVENT_FRAME_AVAILABLE, EVENT_SCAN_ERROR):
+            # Frame available: param1 = steps, param2 = PT level at detection. Scan error: param1 = steps done
+            steps = param1
+            if steps > 0 and len(samples) > 0:
+                if event == EVENT_FRAME_AVAILABLE:
+                    samples.append((timestamp, param2))
+                times = np.array([sample[0] for sample in samples])
+                levels = np.array([sample[1] for sample in samples], dtype=np.float64)
+                # Film assumed to move at constant speed between first sample and end of frame
+                step_times = np.linspace(times[0], times[-1], steps + 1)[1:]
+                trace.extend(np.round(np.interp(step_times, times, levels)).astype(int).tolist())
+                if event == EVENT_FRAME_AVAILABLE:
+                    boundaries.append(len(trace))
+            samples = []
+    return np.array(trace, dtype=int), boundaries, min_frame_steps
+
+
+def evaluate(trace, boundaries, detector):
+    detected = []
+    errors = 0
+    frame_steps = []
+    for position, pt in enumerate(trace):
+        result = detector.step(int(pt))
+        if result is None:
+            continue
+        if result[0] == 'frame':
+            detected.append(position + 1)
+            frame_steps.append(result[1])
+        else:
+            errors += 1
+    return {'frames': len(detected), 'errors': errors,
+            'steps_mean': float(np.mean(frame_steps)) if len(frame_steps) > 0 else float('nan'),
+            'steps_std': float(np.std(frame_steps)) if len(frame_steps) > 0 else float('nan'),
+            'distance': boundary_distance(detected, boundaries)}
+
+
+def boundary_distance(detected, boundaries):
+    # Mean distance (in steps) of each detected frame to the nearest frame detected during the scan
+    if len(detected) == 0 or len(boundaries) == 0:
+        return float('inf')
+    reference = np.array(boundaries)
+    detected_array = np.array(detected)
+    indices = np.searchsorted(reference, detected_array)
+    before = reference[np.clip(indices - 1, 0, len(reference) - 1)]
+    after = reference[np.clip(indices, 0, len(reference) - 1)]
+    return float(np.minimum(np.abs(before - detected_array), np.abs(after - detected_array)).mean())
+
+
+def parse_list(arg, value_type=int):
+    return [value_type(value) for value in arg.split(',')]
+
+
+def main(argv):
+    log_path = '.'
+    thresholds = [None]
+    ratios = [40]
+    min_frame_steps_list = None
+
+    opts, args = getopt.getopt(argv, "i:t:r:m:h")
+
+    for opt, arg in opts:
+        if opt == '-i':
+            log_path = arg
+        elif opt == '-t':
+            thresholds = [None if value == 'auto' else int(value) for value in arg.split(',')]
+        elif opt == '-r':
+            ratios = parse_list(arg)
+        elif opt == '-m':
+            min_frame_steps_list = parse_list(arg)
+        elif opt == '-h':
+            print("ALT-Scann 8 PT Signal Analyzer command line parameters")
+            print("  -i <path>      Reel folder (or PT log file) recorded by ALT-Scann8 (current folder by default)")
+            print("  -t <list>      Comma separated PT thresholds to test, 'auto' for automatic threshold (default)")
+            print("  -r <list>      Comma separated auto threshold ratios (PerforationThresholdAutoLevelRatio) to test")
+            print("  -m <list>      Comma separated MinFrameSteps values to test (last reported value by default)")
+            exit()
+
+    trace, boundaries, reported_min_frame_steps = build_trace(log_path)
+    if len(trace) == 0:
+        print(f"No PT signal recorded in {log_path}")
+        exit(1)
+    if min_frame_steps_list is None:
+        if reported_min_frame_steps is None:
+            print("MinFrameSteps never reported by controller, please specify it with -m")
+            exit(1)
+        min_frame_steps_list = [reported_min_frame_steps]
+    print(f"Replaying {len(trace)} steps, {len(boundaries)} frames detected during scan "
+          f"({round(len(trace) / max(1, len(boundaries)), 1)} steps per frame)")
+    print(f"{'Threshold':>9} {'Ratio':>5} {'MinSteps':>8} {'Frames':>6} {'Errors':>6} {'Steps':>13} {'Distance':>8}")
+    results = []
+    for threshold, ratio, min_frame_steps in itertools.product(thresholds, ratios, min_frame_steps_list):
+        if threshold is not None and ratio != ratios[0]:
+            continue    # Ratio only used with automatic threshold
+        result = evaluate(trace, boundaries, PerforationDetector(min_frame_steps, threshold, ratio))
+        results.append(((result['errors'], abs(result['frames'] - len(boundaries)), result['distance']),
+                        threshold, ratio, min_frame_steps, result))
+    # Best combinations first: Less errors, frame count closer to scan, detection closer to scan
+    for key, threshold, ratio, min_frame_steps, result in sorted(results, key=lambda item: item[0]):
+        print(f"{'auto' if threshold is None else threshold:>9} {ratio if threshold is None else '-':>5} "
+              f"{min_frame_steps:>8} {result['frames']:>6} {result['errors']:>6} "
+              f"{result['steps_mean']:>7.1f}±{result['steps_std']:<5.1f} {result['distance']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+ALT-Scann8 Utility - Raw Frame Exporter
+
+This tool is a standalone utility to convert frames captured by ALT-Scann8 with file type 'raw' (frame container
+in the reel folder, see frame_container.py) into JPG, PNG or TIFF files, using several processes in parallel.
+Output files follow the same naming (and subfolder layout, if any) as frames captured directly in that format.
+
+Licensed under a MIT LICENSE.
+"""
+
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "ALT-Scann8 - Raw Frame Exporter"
+__version__ = "1.0.0"
+__date__ = "2025-03-02"
+__version_highlight__ = "Raw Frame Exporter - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+# ######### Imports section ##########
+
+import os
+import sys
+import time
+import getopt
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from frame_container import FrameContainer, FrameContainerReader
+from frame_layout import FrameLayout
+
+# Reader opened once per worker process (memory maps are not shared between processes)
+worker_reader = None
+
+
+def init_worker(source_folder):
+    global worker_reader
+    worker_reader = FrameContainerReader(source_folder)
+
+
+def export_frame(frame, hdr_idx, target_path, file_type, quality, verify):
+    image = Image.fromarray(worker_reader.read(frame, hdr_idx, verify))
+    if file_type == 'jpg':
+        image.save(target_path, quality=quality)
+    elif file_type == 'png':
+        image.save(target_path, compress_level=1)
+    else:
+        image.save(target_path, compression='tiff_lzw')
+    return frame, hdr_idx
+
+
+def export_folder(source_folder, target_folder, file_type, quality, processes, verify):
+    reader = FrameContainerReader(source_folder)
+    keys = reader.frame_keys()
+    layout = FrameLayout.load(source_folder)
+    if layout is None:
+        layout = FrameLayout()
+    for subfolder in {os.path.dirname(layout.frame_filename(frame, hdr_idx, file_type)) for frame, hdr_idx in keys}:
+        os.makedirs(os.path.join(target_folder, subfolder), exist_ok=True)
+    print(f"Exporting {len(keys)} frames from {source_folder} into {target_folder} as {file_type}")
+    start_time = time.time()
+    errors = 0
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(source_folder,)) as executor:
+        futures = [executor.submit(export_frame, frame, hdr_idx,
+                                   os.path.join(target_folder, layout.frame_filename(frame, hdr_idx, file_type)),
+                                   file_type, quality, verify)
+                   for frame, hdr_idx in keys]
+        for (frame, hdr_idx), future in zip(keys, futures):
+            try:
+                future.result()
+            except Exception as e:
+                errors += 1
+                print(f"Frame {frame}.{hdr_idx}: Export failed: {e}")
+    if len(keys) > 0:
+        print(f"Done, {round((time.time() - start_time) * 1000 / len(keys), 1)} ms per frame, {errors} errors")
+
+
+def main(argv):
+    source_folder = '.'
+    target_folder = None
+    file_type = 'jpg'
+    quality = 95
+    processes = None
+    verify = False
+
+    opts, args = getopt.getopt(argv, "i:o:f:q:j:ch")
+
+    for opt, arg in opts:
+        if opt == '-i':
+            source_folder = arg
+        elif opt == '-o':
+            target_folder = arg
+        elif opt == '-f':
+            file_type = arg.lower()
+        elif opt == '-q':
+            quality = int(arg)
+        elif opt == '-j':
+            processes = int(arg)
+        elif opt == '-c':
+            verify = True
+        elif opt == '-h':
+            print("ALT-Scann 8 Raw Frame Exporter command line parameters")
+            print("  -i <folder>    Reel folder with frames captured as 'raw' (current folder by default)")
+            print("  -o <folder>    Folder where exported frames are written (<input folder>/<format> by default)")
+            print("  -f <format>    Output format: jpg, png or tif (jpg by default)")
+            print("  -q <quality>   JPG quality (95 by default)")
+            print("  -j <processes> Number of processes (one per CPU by default)")
+            print("  -c             Verify CRC of each frame before exporting it")
+            exit()
+
+    if file_type not in ('jpg', 'png', 'tif'):
+        print(f"Unsupported output format {file_type}")
+        exit(1)
+    if not FrameContainer.exists(source_folder):
+        print(f"No raw frames found in {source_folder}")
+        exit(1)
+    export_folder(source_folder, target_folder if target_folder else os.path.join(source_folder, file_type),
+                  file_type, quality, processes, verify)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,108 @@
+"""
+****************************************************************************************************************
+Class ColorPipeline
+Optional color correction applied to frames at save time (JPG/PNG only, DNG files are raw and not modified).
+It allows per-reel corrections (typically for faded film) to be baked in during the scan, instead of re-processing
+all frames afterwards. Correction is defined by per-channel curves (black point, white point, gamma) and a 3x3
+color matrix, stored as JSON in the reel folder (file ALT-Scann8.color), or else in the base folder.
+Curves are converted to a lookup table, applied with a single PIL point() pass, and the matrix with a single PIL
+convert() pass; both run in C without holding the GIL, so the save threads process frames in parallel.
+Tables are built once per set of settings, and cached using a hash of the settings.
+Settings and their tables are replaced as a single tuple, so that the save threads always use a consistent set,
+even if settings change (e.g. new reel) while frames are still being saved.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "ColorPipeline"
+__version__ = "1.0.0"
+__date__ = "2025-03-01"
+__version_highlight__ = "ColorPipeline - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+
+COLOR_FILENAME = "ALT-Scann8.color"
+IDENTITY_MATRIX = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+DEFAULT_SETTINGS = {'black': [0, 0, 0], 'white': [255, 255, 255], 'gamma': [1.0, 1.0, 1.0],
+                    'matrix': IDENTITY_MATRIX}
+
+
+class ColorPipeline:
+    def __init__(self):
+        # (settings, settings hash, lut, matrix), None means no correction
+        # lut: 768 entries, for PIL point(). matrix: 12-tuple for PIL convert(), None if identity
+        self.current = None
+        self.cache = {}         # settings hash -> (lut, matrix)
+
+    def is_active(self):
+        return self.current is not None
+
+    @staticmethod
+    def hash_settings(settings):
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+    def set_settings(self, settings):
+        # Dictionary with any of the keys in DEFAULT_SETTINGS, or None to disable correction
+        if settings is None:
+            self.current = None
+            return
+        full_settings = dict(DEFAULT_SETTINGS)
+        full_settings.update(settings)
+        settings_hash = self.hash_settings(full_settings)
+        if self.current is not None and settings_hash == self.current[1]:
+            return
+        if settings_hash not in self.cache:
+            self.cache[settings_hash] = self.build_tables(full_settings)
+        lut, matrix = self.cache[settings_hash]
+        self.current = (full_settings, settings_hash, lut, matrix)
+        logging.info(f"ColorPipeline: Using settings {settings_hash[:8]} ({full_settings})")
+
+    @staticmethod
+    def build_tables(settings):
+        levels = np.arange(256, dtype=np.float64)
+        lut = []
+        for channel in range(3):
+            black = settings['black'][channel]
+            white = max(settings['white'][channel], black + 1)
+            curve = np.clip((levels - black) / (white - black), 0, 1) ** (1 / settings['gamma'][channel])
+            lut.extend(np.round(curve * 255).astype(int).tolist())
+        matrix = None
+        if settings['matrix'] != IDENTITY_MATRIX:
+            # PIL expects a 3x4 matrix (last column is an offset)
+            matrix = tuple(value for row in settings['matrix'] for value in list(row) + [0])
+        return lut, matrix
+
+    def load(self, *folders):
+        # Loads settings from first folder having a color file, disables correction if none is found
+        for folder in folders:
+            color_path = os.path.join(folder, COLOR_FILENAME)
+            if not os.path.isfile(color_path):
+                continue
+            try:
+                with open(color_path) as f:
+                    self.set_settings(json.load(f))
+                return True
+            except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+                logging.warning(f"Invalid color file {color_path}: {e}")
+        self.set_settings(None)
+        return False
+
+    def process(self, image):
+        # PIL RGB image, returns corrected image
+        current = self.current  # Single read: Settings might be replaced meanwhile
+        if current is None:
+            return image
+        settings, settings_hash, lut, matrix = current
+        image = image.point(lut)
+        if matrix is not None:
+            image = image.convert('RGB', matrix)
+        return image
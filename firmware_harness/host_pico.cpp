@@ -0,0 +1,435 @@
+/*
+ALT-Scann8 - Pico controller firmware harness
+
+Host implementation of the Pico SDK stubs (include folder), to run the Pico controller firmware
+(ALT-Scann8-Pico-Controller.c) on Linux against a simulated scanner:
+- Film transport: Each rising edge on the capstan step pin (motor B) moves the film one step. ADC reads return
+  the PT level of the trace at the current film position. The run ends when the film reaches the end of the trace.
+- Clock: Virtual, in microseconds. It only advances in sleep_us/sleep_ms and in ADC conversions (2 us each, as
+  in the RP2040), so runs are deterministic, and much faster than real time.
+- Raspberry Pi: Emulated as the UI does it. Commands are written over I2C (3 bytes), responses are polled every
+  10 ms (register byte + 5 bytes read). Each frame reported is followed by CMD_GET_NEXT_FRAME, after a
+  configurable capture delay.
+Events seen by the emulated RPi are written to the output file, one per line, and parsed by
+PicoControllerHarness.py (in the parent folder), which is the intended way to run this program.
+
+Licensed under a MIT LICENSE.
+*/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <setjmp.h>
+#include <time.h>
+#include <unistd.h>
+#include "pico/stdlib.h"
+#include "pico/i2c_slave.h"
+#include "hardware/adc.h"
+#include "hardware/pwm.h"
+
+// Firmware entry points
+void setup();
+void loop();
+
+// Pins and I2C protocol, same values as in firmware and UI
+#define PIN_MOTOR_A_STEP    22
+#define PIN_MOTOR_B_STEP    19
+#define PIN_MOTOR_C_STEP    14
+#define MAX_PIN             32
+
+#define CMD_GET_CNT_STATUS 2
+#define CMD_START_SCAN 10
+#define CMD_GET_NEXT_FRAME 12
+#define CMD_SET_REGULAR_8 18
+#define CMD_SET_SUPER_8 19
+#define CMD_SET_PT_LEVEL 50
+#define CMD_SET_MIN_FRAME_STEPS 52
+#define CMD_SET_FRAME_FINE_TUNE 54
+#define CMD_SET_EXTRA_STEPS 56
+#define CMD_SET_SCAN_SPEED 70
+#define CMD_REPORT_PLOTTER_INFO 87
+#define RSP_FRAME_AVAILABLE 80
+#define RSP_SCAN_ERROR 81
+#define RSP_REPORT_AUTO_LEVELS 86
+#define RSP_REPORT_PLOTTER_INFO 87
+#define RSP_SCAN_ENDED 88
+
+#define ADC_CONVERSION_US       2
+#define RPI_POLL_INTERVAL_US    10000   // arduino_listen_loop period in UI
+#define RPI_COMMAND_SPACING_US  1000
+#define MAX_PENDING_COMMANDS    32
+
+struct i2c_inst {
+    i2c_slave_handler_t handler;
+    uint8_t rx[8];      // Bytes written by master, pending to be read by slave
+    size_t rx_len;
+    size_t rx_pos;
+    uint8_t tx[8];      // Bytes written by slave, for master to read
+    size_t tx_len;
+};
+
+i2c_inst_t i2c0_inst;
+i2c_inst_t i2c1_inst;
+
+// Simulated scanner
+static uint64_t now_us = 0;
+static uint64_t timeout_us = 0;
+static int32_t *trace = NULL;
+static long trace_len = 0;
+static long position = 0;           // Film position, in capstan steps
+static long motor_steps[3];         // Steps done by motors A (rewind), B (capstan), C (collect)
+static bool pin_state[MAX_PIN];
+static FILE *out = NULL;
+static jmp_buf end_of_run;
+static struct timespec wall_start;
+
+// Emulated RPi
+static struct {
+    int cmd;
+    int param;
+    uint64_t due;
+} pending[MAX_PENDING_COMMANDS];
+static int pending_count = 0;
+static uint64_t next_poll_us = RPI_POLL_INTERVAL_US;
+static uint64_t frame_request_us = 0;   // Time of last CMD_START_SCAN/CMD_GET_NEXT_FRAME
+static uint64_t capture_delay_us = 0;
+static bool rpi_busy = false;
+static int frames = 0;
+static int errors = 0;
+
+
+static double wall_seconds() {
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return (t.tv_sec - wall_start.tv_sec) + (t.tv_nsec - wall_start.tv_nsec) / 1e9;
+}
+
+static void finish(const char *reason) {
+    fprintf(out, "end %s %ld %llu %.3f %ld %ld %ld\n", reason, position, (unsigned long long)now_us, wall_seconds(),
+            motor_steps[0], motor_steps[1], motor_steps[2]);
+    longjmp(end_of_run, 1);
+}
+
+// ---- Emulated RPi, as I2C master ----
+static void i2c_master_write(const uint8_t *data, size_t len) {
+    i2c_inst_t *i2c = i2c0;
+    if (i2c->handler == NULL)
+        return;
+    memcpy(i2c->rx, data, len);
+    i2c->rx_len = len;
+    i2c->rx_pos = 0;
+    while (i2c->rx_pos < i2c->rx_len) {
+        size_t previous_pos = i2c->rx_pos;
+        i2c->handler(i2c, I2C_SLAVE_RECEIVE);
+        if (i2c->rx_pos == previous_pos)
+            break;  // Slave not reading
+    }
+    i2c->handler(i2c, I2C_SLAVE_FINISH);
+}
+
+static bool i2c_master_read(uint8_t reg, uint8_t *data, size_t len) {
+    i2c_inst_t *i2c = i2c0;
+    if (i2c->handler == NULL)
+        return false;
+    i2c_master_write(&reg, 1);
+    i2c->tx_len = 0;
+    for (size_t i = 0; i < len; i++)
+        i2c->handler(i2c, I2C_SLAVE_REQUEST);
+    i2c->handler(i2c, I2C_SLAVE_FINISH);
+    memset(data, 0, len);
+    memcpy(data, i2c->tx, i2c->tx_len < len ? i2c->tx_len : len);
+    return true;
+}
+
+static void rpi_send(int cmd, int param, uint64_t due) {
+    if (pending_count >= MAX_PENDING_COMMANDS) {
+        fprintf(stderr, "Too many pending commands\n");
+        exit(1);
+    }
+    pending[pending_count].cmd = cmd;
+    pending[pending_count].param = param;
+    pending[pending_count].due = due;
+    pending_count++;
+}
+
+static uint64_t rpi_next_event() {
+    uint64_t next = next_poll_us;
+    for (int i = 0; i < pending_count; i++)
+        if (pending[i].due < next)
+            next = pending[i].due;
+    return next;
+}
+
+static void rpi_poll() {
+    uint8_t data[5];
+    int rsp, param1, param2;
+
+    if (!i2c_master_read(CMD_GET_CNT_STATUS, data, 5))
+        return;
+    rsp = data[0];
+    param1 = data[1] * 256 + data[2];
+    param2 = data[3] * 256 + data[4];
+    switch (rsp) {
+        case RSP_FRAME_AVAILABLE:
+            frames++;
+            fprintf(out, "frame %d %d %d %ld %llu %llu\n", frames, param1, param2, position,
+                    (unsigned long long)now_us, (unsigned long long)(now_us - frame_request_us));
+            rpi_send(CMD_GET_NEXT_FRAME, 0, now_us + capture_delay_us);
+            break;
+        case RSP_SCAN_ERROR:
+            errors++;
+            fprintf(out, "error %d %d %ld %llu\n", param1, param2, position, (unsigned long long)now_us);
+            rpi_send(CMD_GET_NEXT_FRAME, 0, now_us);
+            break;
+        case RSP_REPORT_AUTO_LEVELS:
+            fprintf(out, "levels %d %d %llu\n", param1, param2, (unsigned long long)now_us);
+            break;
+        case RSP_REPORT_PLOTTER_INFO:
+            fprintf(out, "pt %d %d %llu\n", param1, param2, (unsigned long long)now_us);
+            break;
+        case RSP_SCAN_ENDED:
+            finish("scan_ended");
+            break;
+    }
+}
+
+static void rpi_service() {
+    int i = 0;
+    while (i < pending_count) {
+        if (pending[i].due <= now_us) {
+            uint8_t data[3] = {(uint8_t)pending[i].cmd, (uint8_t)(pending[i].param % 256),
+                               (uint8_t)(pending[i].param >> 8)};
+            if (pending[i].cmd == CMD_START_SCAN || pending[i].cmd == CMD_GET_NEXT_FRAME)
+                frame_request_us = now_us;
+            i2c_master_write(data, 3);
+            memmove(&pending[i], &pending[i + 1], (pending_count - i - 1) * sizeof(pending[0]));
+            pending_count--;
+        }
+        else
+            i++;
+    }
+    if (now_us >= next_poll_us) {
+        rpi_poll();
+        next_poll_us += RPI_POLL_INTERVAL_US;
+    }
+}
+
+// Advances virtual clock, serving RPi events due in between (as interrupts would on the Pico)
+static void advance(uint64_t us) {
+    uint64_t target = now_us + us;
+    if (!rpi_busy) {
+        rpi_busy = true;
+        for (uint64_t next = rpi_next_event(); next <= target; next = rpi_next_event()) {
+            if (next > now_us)
+                now_us = next;
+            rpi_service();
+        }
+        rpi_busy = false;
+    }
+    now_us = target;
+    if (timeout_us > 0 && now_us > timeout_us)
+        finish("timeout");
+}
+
+// ---- Pico SDK stubs ----
+bool stdio_init_all(void) {
+    return true;
+}
+
+absolute_time_t get_absolute_time(void) {
+    return now_us;
+}
+
+void sleep_us(uint64_t us) {
+    advance(us);
+}
+
+void sleep_ms(uint32_t ms) {
+    advance((uint64_t)ms * 1000);
+}
+
+void gpio_init(uint gpio) {
+    if (gpio < MAX_PIN)
+        pin_state[gpio] = false;
+}
+
+void gpio_set_dir(uint gpio, bool out) {
+}
+
+void gpio_set_function(uint gpio, enum gpio_function fn) {
+}
+
+void gpio_pull_up(uint gpio) {
+    if (gpio < MAX_PIN)
+        pin_state[gpio] = true;     // Inputs read high (switches open)
+}
+
+void gpio_put(uint gpio, bool value) {
+    if (gpio >= MAX_PIN)
+        return;
+    if (value && !pin_state[gpio]) {   // Rising edge: Motor step
+        if (gpio == PIN_MOTOR_A_STEP)
+            motor_steps[0]++;
+        else if (gpio == PIN_MOTOR_C_STEP)
+            motor_steps[2]++;
+        else if (gpio == PIN_MOTOR_B_STEP) {
+            motor_steps[1]++;
+            position++;
+            if (position >= trace_len) {
+                pin_state[gpio] = value;
+                finish("trace");
+            }
+        }
+    }
+    pin_state[gpio] = value;
+}
+
+bool gpio_get(uint gpio) {
+    return gpio < MAX_PIN ? pin_state[gpio] : false;
+}
+
+void adc_init(void) {
+}
+
+void adc_gpio_init(uint gpio) {
+}
+
+void adc_select_input(uint input) {
+}
+
+uint16_t adc_read(void) {
+    advance(ADC_CONVERSION_US);
+    return (uint16_t)trace[position < trace_len ? position : trace_len - 1];
+}
+
+uint pwm_gpio_to_slice_num(uint gpio) {
+    return (gpio >> 1) & 7;
+}
+
+pwm_config pwm_get_default_config(void) {
+    pwm_config c = {0, 0, 0xffff};
+    return c;
+}
+
+void pwm_init(uint slice_num, pwm_config *c, bool start) {
+}
+
+void pwm_set_gpio_level(uint gpio, uint16_t level) {
+}
+
+uint i2c_init(i2c_inst_t *i2c, uint baudrate) {
+    return baudrate;
+}
+
+int i2c_read_blocking(i2c_inst_t *i2c, uint8_t addr, uint8_t *dst, size_t len, bool nostop) {
+    return PICO_ERROR_GENERIC;  // No devices on the bus
+}
+
+size_t i2c_get_read_available(i2c_inst_t *i2c) {
+    return i2c->rx_len - i2c->rx_pos;
+}
+
+uint8_t i2c_read_byte_raw(i2c_inst_t *i2c) {
+    return i2c->rx_pos < i2c->rx_len ? i2c->rx[i2c->rx_pos++] : 0;
+}
+
+void i2c_write_byte_raw(i2c_inst_t *i2c, uint8_t value) {
+    if (i2c->tx_len < sizeof(i2c->tx))
+        i2c->tx[i2c->tx_len++] = value;
+}
+
+void i2c_slave_init(i2c_inst_t *i2c, uint8_t address, i2c_slave_handler_t handler) {
+    i2c->handler = handler;
+}
+
+// ---- Main ----
+static void usage() {
+    printf("ALT-Scann8 Pico controller firmware harness command line parameters\n");
+    printf("  -t <file>      PT trace to replay: One int32 (little endian) per capstan step\n");
+    printf("  -o <file>      Output file for events (stderr by default)\n");
+    printf("  -f s8|r8       Film type (s8 by default)\n");
+    printf("  -p <level>     PT level threshold, 0 for automatic (default)\n");
+    printf("  -m <steps>     Minimum frame steps, 0 for automatic (default)\n");
+    printf("  -r <ratio>     Automatic PT level ratio, 5 to 95 (40 by default)\n");
+    printf("  -x <steps>     Extra steps after frame detection (0 by default)\n");
+    printf("  -s <speed>     Scan speed, 1 to 10 (10 by default)\n");
+    printf("  -c <ms>        Capture delay: Time between frame available and next frame request (0 by default)\n");
+    printf("  -l             Enable plotter info reports\n");
+    printf("  -T <seconds>   Virtual time limit (60 s + 20 ms per step by default)\n");
+}
+
+int main(int argc, char **argv) {
+    const char *trace_path = NULL;
+    const char *out_path = NULL;
+    bool is_s8 = true, plotter = false;
+    int pt_level = 0, min_frame_steps = 0, ratio = 40, extra_steps = 0, speed = 10;
+    double timeout_s = 0;
+    int opt;
+
+    while ((opt = getopt(argc, argv, "t:o:f:p:m:r:x:s:c:lT:h")) != -1) {
+        switch (opt) {
+            case 't': trace_path = optarg; break;
+            case 'o': out_path = optarg; break;
+            case 'f': is_s8 = strcmp(optarg, "r8") != 0; break;
+            case 'p': pt_level = atoi(optarg); break;
+            case 'm': min_frame_steps = atoi(optarg); break;
+            case 'r': ratio = atoi(optarg); break;
+            case 'x': extra_steps = atoi(optarg); break;
+            case 's': speed = atoi(optarg); break;
+            case 'c': capture_delay_us = (uint64_t)(atof(optarg) * 1000); break;
+            case 'l': plotter = true; break;
+            case 'T': timeout_s = atof(optarg); break;
+            default:
+                usage();
+                return opt == 'h' ? 0 : 1;
+        }
+    }
+    if (trace_path == NULL) {
+        usage();
+        return 1;
+    }
+
+    FILE *f = fopen(trace_path, "rb");
+    if (f == NULL) {
+        perror(trace_path);
+        return 1;
+    }
+    fseek(f, 0, SEEK_END);
+    trace_len = ftell(f) / sizeof(int32_t);
+    fseek(f, 0, SEEK_SET);
+    trace = (int32_t *)malloc((trace_len > 0 ? trace_len : 1) * sizeof(int32_t));
+    trace_len = fread(trace, sizeof(int32_t), trace_len, f);
+    fclose(f);
+    if (trace_len == 0) {
+        fprintf(stderr, "%s: Empty trace\n", trace_path);
+        return 1;
+    }
+    out = out_path != NULL ? fopen(out_path, "w") : stderr;
+    if (out == NULL) {
+        perror(out_path);
+        return 1;
+    }
+    timeout_us = timeout_s > 0 ? (uint64_t)(timeout_s * 1e6) : 60000000ULL + 20000ULL * trace_len;
+
+    // Same init sequence as UI, then start scan
+    uint64_t due = RPI_COMMAND_SPACING_US;
+    rpi_send(is_s8 ? CMD_SET_SUPER_8 : CMD_SET_REGULAR_8, 0, due);
+    rpi_send(CMD_SET_PT_LEVEL, pt_level, due += RPI_COMMAND_SPACING_US);
+    rpi_send(CMD_SET_MIN_FRAME_STEPS, min_frame_steps, due += RPI_COMMAND_SPACING_US);
+    rpi_send(CMD_SET_FRAME_FINE_TUNE, ratio, due += RPI_COMMAND_SPACING_US);
+    if (extra_steps > 0)
+        rpi_send(CMD_SET_EXTRA_STEPS, extra_steps, due += RPI_COMMAND_SPACING_US);
+    rpi_send(CMD_SET_SCAN_SPEED, speed, due += RPI_COMMAND_SPACING_US);
+    rpi_send(CMD_REPORT_PLOTTER_INFO, plotter ? 1 : 0, due += RPI_COMMAND_SPACING_US);
+    rpi_send(CMD_START_SCAN, 0, due += RPI_COMMAND_SPACING_US);
+
+    clock_gettime(CLOCK_MONOTONIC, &wall_start);
+    if (setjmp(end_of_run) == 0) {
+        setup();
+        loop();     // Never returns: Run ends by longjmp from finish()
+    }
+    if (out != stderr)
+        fclose(out);
+    free(trace);
+    return 0;
+}
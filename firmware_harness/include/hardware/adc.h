@@ -0,0 +1,12 @@
+// Host stub of the Pico SDK: ADC, reads return the PT trace value at the current film position
+#ifndef _HARDWARE_ADC_H
+#define _HARDWARE_ADC_H
+
+#include "pico/stdlib.h"
+
+void adc_init(void);
+void adc_gpio_init(uint gpio);
+void adc_select_input(uint input);
+uint16_t adc_read(void);
+
+#endif
@@ -0,0 +1,23 @@
+// Host stub of the Pico SDK: GPIO, step pins of the motors drive the simulated film transport
+#ifndef _HARDWARE_GPIO_H
+#define _HARDWARE_GPIO_H
+
+#include "pico/stdlib.h"
+
+enum gpio_function {
+    GPIO_FUNC_SPI = 1,
+    GPIO_FUNC_UART = 2,
+    GPIO_FUNC_I2C = 3,
+    GPIO_FUNC_PWM = 4,
+    GPIO_FUNC_SIO = 5,
+    GPIO_FUNC_NULL = 0x1f,
+};
+
+void gpio_init(uint gpio);
+void gpio_set_dir(uint gpio, bool out);
+void gpio_set_function(uint gpio, enum gpio_function fn);
+void gpio_pull_up(uint gpio);
+void gpio_put(uint gpio, bool value);
+bool gpio_get(uint gpio);
+
+#endif
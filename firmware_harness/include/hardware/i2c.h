@@ -0,0 +1,22 @@
+// Host stub of the Pico SDK: I2C, bytes exchanged with the simulated RPi of the harness
+#ifndef _HARDWARE_I2C_H
+#define _HARDWARE_I2C_H
+
+#include "pico/stdlib.h"
+
+typedef struct i2c_inst i2c_inst_t;
+
+extern i2c_inst_t i2c0_inst;
+extern i2c_inst_t i2c1_inst;
+
+#define i2c0 (&i2c0_inst)
+#define i2c1 (&i2c1_inst)
+#define i2c_default i2c0
+
+uint i2c_init(i2c_inst_t *i2c, uint baudrate);
+int i2c_read_blocking(i2c_inst_t *i2c, uint8_t addr, uint8_t *dst, size_t len, bool nostop);
+size_t i2c_get_read_available(i2c_inst_t *i2c);
+uint8_t i2c_read_byte_raw(i2c_inst_t *i2c);
+void i2c_write_byte_raw(i2c_inst_t *i2c, uint8_t value);
+
+#endif
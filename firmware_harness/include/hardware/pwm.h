@@ -0,0 +1,18 @@
+// Host stub of the Pico SDK: PWM (leds, buzzer), levels are ignored
+#ifndef _HARDWARE_PWM_H
+#define _HARDWARE_PWM_H
+
+#include "pico/stdlib.h"
+
+typedef struct {
+    uint32_t csr;
+    uint32_t div;
+    uint32_t top;
+} pwm_config;
+
+uint pwm_gpio_to_slice_num(uint gpio);
+pwm_config pwm_get_default_config(void);
+void pwm_init(uint slice_num, pwm_config *c, bool start);
+void pwm_set_gpio_level(uint gpio, uint16_t level);
+
+#endif
@@ -0,0 +1,8 @@
+// Host stub of the Pico SDK: Binary info (picotool metadata) is not needed on host
+#ifndef _PICO_BINARY_INFO_H
+#define _PICO_BINARY_INFO_H
+
+#define bi_decl(_decl)
+#define bi_2pins_with_func(p0, p1, func) 0
+
+#endif
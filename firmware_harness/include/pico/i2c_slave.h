@@ -0,0 +1,17 @@
+// Host stub of the Pico SDK: I2C slave, events are generated by the simulated RPi of the harness
+#ifndef _PICO_I2C_SLAVE_H
+#define _PICO_I2C_SLAVE_H
+
+#include "hardware/i2c.h"
+
+typedef enum i2c_slave_event_t {
+    I2C_SLAVE_RECEIVE,  // Data from master available for reading
+    I2C_SLAVE_REQUEST,  // Master is requesting data
+    I2C_SLAVE_FINISH,   // Master has sent a stop or restart signal
+} i2c_slave_event_t;
+
+typedef void (*i2c_slave_handler_t)(i2c_inst_t *i2c, i2c_slave_event_t event);
+
+void i2c_slave_init(i2c_inst_t *i2c, uint8_t address, i2c_slave_handler_t handler);
+
+#endif
@@ -0,0 +1,19 @@
+// Host stub of the Pico SDK, for the firmware harness (see ../../Makefile)
+// Declares only what ALT-Scann8-Pico-Controller.c uses; implemented by host_pico.cpp
+#ifndef _PICO_STDLIB_H
+#define _PICO_STDLIB_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stddef.h>
+
+typedef unsigned int uint;
+
+#define PICO_ERROR_GENERIC -1
+
+#include "pico/time.h"
+#include "hardware/gpio.h"
+
+bool stdio_init_all(void);
+
+#endif
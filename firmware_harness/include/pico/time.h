@@ -0,0 +1,18 @@
+// Host stub of the Pico SDK: Time functions run on the simulated clock of the harness (microseconds)
+#ifndef _PICO_TIME_H
+#define _PICO_TIME_H
+
+#include <stdint.h>
+
+typedef uint64_t absolute_time_t;
+
+absolute_time_t get_absolute_time(void);
+void sleep_us(uint64_t us);
+void sleep_ms(uint32_t ms);
+
+static inline uint64_t to_us_since_boot(absolute_time_t t) { return t; }
+static inline uint32_t to_ms_since_boot(absolute_time_t t) { return (uint32_t)(t / 1000); }
+static inline absolute_time_t delayed_by_us(absolute_time_t t, uint64_t us) { return t + us; }
+static inline absolute_time_t delayed_by_ms(absolute_time_t t, uint32_t ms) { return t + (uint64_t)ms * 1000; }
+
+#endif
@@ -0,0 +1,242 @@
+"""
+****************************************************************************************************************
+Class FrameContainer
+Lossless intermediate format for capture (FileType 'raw'): Frames are stored as plain RGB arrays, appended to large
+chunk files in the reel folder (chunk-NNNN.raw), optionally compressed with LZ4 or Zstandard if the corresponding
+module is installed. Each frame written adds a fixed size record to an index file (ALT-Scann8.raw.idx) with its
+position, size, shape and CRC. No image encoder is involved, so save threads write frames at disk speed.
+Index records are kept in memory until the chunk data they reference has been synced (every fsync_interval frames),
+and only then appended to the index and synced, so that an interrupted session (even a power cut) never leaves
+records referencing incomplete frames. As a further check, readers ignore records beyond the end of their chunk
+file. A re-captured frame simply adds a newer record (last one wins).
+Class FrameContainerReader
+Reads frames back from a reel folder; uncompressed frames are memory-mapped (no copy until used). Frames are
+then converted to JPG/PNG/TIFF by the RawFrameExporter utility.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "FrameContainer"
+__version__ = "1.0.0"
+__date__ = "2025-03-02"
+__version_highlight__ = "FrameContainer - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import os
+import struct
+import zlib
+import threading
+import logging
+import numpy as np
+
+try:
+    import lz4.frame
+    lz4_installed = True
+except ImportError:
+    lz4_installed = False
+
+try:
+    import zstandard
+    zstd_installed = True
+except ImportError:
+    zstd_installed = False
+
+INDEX_FILENAME = "ALT-Scann8.raw.idx"
+INDEX_MAGIC = b"ALTSC8R1"
+CHUNK_FILENAME = "chunk-{:04d}.raw"
+# frame, hdr_idx, chunk, offset, length, height, width, channels, codec, crc32
+INDEX_RECORD = struct.Struct('<IBHQIHHBBI')
+CODECS = {'none': 0, 'lz4': 1, 'zstd': 2}
+ZSTD_LEVEL = 1  # Fastest levels already remove most of the redundancy of film frames
+
+
+def available_codecs():
+    return ['none'] + (['lz4'] if lz4_installed else []) + (['zstd'] if zstd_installed else [])
+
+
+class FrameContainer:
+    def __init__(self, folder=None, codec='none', chunk_size_mb=2048, fsync_interval=10):
+        self.folder = None
+        self.set_codec(codec)
+        self.chunk_size = chunk_size_mb * 1024 * 1024
+        self.fsync_interval = fsync_interval    # Frames between fsync (0 to disable fsync)
+        self.lock = threading.Lock()
+        self.thread_data = threading.local()    # Zstandard compressors are not shared between threads
+        self.index_file = None
+        self.chunk_file = None
+        self.chunk_idx = 0
+        self.pending_records = []   # Index records of frames whose data is not synced yet
+        if folder is not None:
+            self.set_folder(folder)
+
+    @staticmethod
+    def exists(folder):
+        return os.path.isfile(os.path.join(folder, INDEX_FILENAME))
+
+    def set_folder(self, folder):
+        if folder == self.folder:
+            return
+        self.close()
+        with self.lock:
+            self.folder = folder
+            index_path = os.path.join(folder, INDEX_FILENAME)
+            last_chunk = 0
+            if os.path.isfile(index_path):
+                # Existing reel: Continue in the last chunk used
+                entries = list(FrameContainerReader.index_entries(folder))
+                last_chunk = max([entry[2] for entry in entries], default=0)
+                # Drop incomplete or invalid records left by an interrupted session, so that new records stay
+                # aligned and valid ones are not hidden behind them
+                valid_size = len(INDEX_MAGIC) + len(entries) * INDEX_RECORD.size
+                if os.path.getsize(index_path) > valid_size:
+                    logging.warning(f"FrameContainer: Removing incomplete index records in {folder}")
+                    os.truncate(index_path, valid_size)
+                self.index_file = open(index_path, 'ab')
+            else:
+                self.index_file = open(index_path, 'wb')
+                self.index_file.write(INDEX_MAGIC)
+            self.open_chunk(last_chunk)
+
+    def set_codec(self, codec):
+        # Frames already stored keep their codec (recorded per frame in the index)
+        if codec not in available_codecs():
+            logging.warning(f"FrameContainer: Codec {codec} not available, frames will be stored uncompressed")
+            codec = 'none'
+        self.codec = codec
+
+    def set_fsync_interval(self, fsync_interval):
+        self.sync()     # Flush frames pending with the previous interval
+        self.fsync_interval = fsync_interval
+
+    def open_chunk(self, chunk_idx):
+        if self.chunk_file is not None:
+            self.chunk_file.close()
+        self.chunk_idx = chunk_idx
+        self.chunk_file = open(os.path.join(self.folder, CHUNK_FILENAME.format(chunk_idx)), 'ab')
+
+    def compress(self, data):
+        if self.codec == 'lz4':
+            return lz4.frame.compress(data)
+        elif self.codec == 'zstd':
+            if not hasattr(self.thread_data, 'compressor'):
+                self.thread_data.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            return self.thread_data.compressor.compress(data)
+        return data
+
+    def write(self, frame_idx, hdr_idx, array):
+        """
+        Appends a frame (uint8 array, height x width x channels) to the container.
+        Returns (chunk full path, stored size, crc32 of stored data).
+        """
+        array = np.ascontiguousarray(array, dtype=np.uint8)
+        height, width = array.shape[:2]
+        channels = array.shape[2] if array.ndim == 3 else 1
+        # Compression and CRC done outside the lock, so that save threads do them in parallel
+        data = self.compress(memoryview(array).cast('B'))
+        crc = zlib.crc32(data)
+        with self.lock:
+            if self.chunk_file.tell() > 0 and self.chunk_file.tell() + len(data) > self.chunk_size:
+                self.sync_records()     # Pending records refer to the current chunk
+                self.open_chunk(self.chunk_idx + 1)
+            offset = self.chunk_file.tell()
+            self.chunk_file.write(data)
+            self.chunk_file.flush()
+            record = INDEX_RECORD.pack(frame_idx, hdr_idx, self.chunk_idx, offset, len(data), height, width,
+                                       channels, CODECS[self.codec], crc)
+            chunk_path = self.chunk_file.name
+            if self.fsync_interval > 0:
+                # Record added to the index once data is synced
+                self.pending_records.append(record)
+                if len(self.pending_records) >= self.fsync_interval:
+                    self.sync_records()
+            else:
+                # No fsync: Record added only after data is in the chunk file
+                self.index_file.write(record)
+                self.index_file.flush()
+        return chunk_path, len(data), crc
+
+    def sync_records(self):
+        # Called with lock held: Data first, then index, so that records never point to unsynced data
+        if self.chunk_file is None or len(self.pending_records) == 0:
+            return
+        self.chunk_file.flush()
+        os.fsync(self.chunk_file.fileno())
+        self.index_file.writelines(self.pending_records)
+        self.index_file.flush()
+        os.fsync(self.index_file.fileno())
+        self.pending_records = []
+
+    def sync(self):
+        with self.lock:
+            self.sync_records()
+
+    def close(self):
+        self.sync()
+        with self.lock:
+            if self.chunk_file is not None:
+                self.chunk_file.close()
+                self.chunk_file = None
+            if self.index_file is not None:
+                self.index_file.close()
+                self.index_file = None
+            self.folder = None
+
+
+class FrameContainerReader:
+    def __init__(self, folder):
+        self.folder = folder
+        self.entries = {}   # (frame, hdr_idx) -> index record, latest one for re-captured frames
+        for entry in self.index_entries(folder):
+            self.entries[(entry[0], entry[1])] = entry
+        self.chunks = {}    # chunk number -> memory map of the chunk file
+
+    @staticmethod
+    def index_entries(folder):
+        # Generator of index records (tuples in INDEX_RECORD order), incomplete trailing record ignored.
+        # Stops at the first record referencing data beyond the end of its chunk file (data lost in a power cut)
+        with open(os.path.join(folder, INDEX_FILENAME), 'rb') as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                logging.warning(f"FrameContainer: {folder} has an invalid index file")
+                return
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_RECORD.size
+        chunk_sizes = {}
+        for entry in INDEX_RECORD.iter_unpack(data[:usable]):
+            chunk_idx, offset, length = entry[2], entry[3], entry[4]
+            if chunk_idx not in chunk_sizes:
+                chunk_path = os.path.join(folder, CHUNK_FILENAME.format(chunk_idx))
+                chunk_sizes[chunk_idx] = os.path.getsize(chunk_path) if os.path.isfile(chunk_path) else 0
+            if offset + length > chunk_sizes[chunk_idx]:
+                logging.warning(f"FrameContainer: Frame {entry[0]}.{entry[1]} in {folder} references missing data, "
+                                f"ignoring it and following ones")
+                return
+            yield entry
+
+    def frame_keys(self):
+        # Sorted list of (frame, hdr_idx) stored in the container
+        return sorted(self.entries)
+
+    def chunk_map(self, chunk_idx):
+        if chunk_idx not in self.chunks:
+            self.chunks[chunk_idx] = np.memmap(os.path.join(self.folder, CHUNK_FILENAME.format(chunk_idx)),
+                                               dtype=np.uint8, mode='r')
+        return self.chunks[chunk_idx]
+
+    def read(self, frame_idx, hdr_idx=0, verify=False):
+        # Returns frame as an uint8 array (read only view of the chunk if stored uncompressed)
+        frame, hdr_idx, chunk_idx, offset, length, height, width, channels, codec, crc = \
+            self.entries[(frame_idx, hdr_idx)]
+        data = self.chunk_map(chunk_idx)[offset:offset + length]
+        if verify and zlib.crc32(data) != crc:
+            raise ValueError(f"Frame {frame_idx}.{hdr_idx}: CRC mismatch in {CHUNK_FILENAME.format(chunk_idx)}")
+        if codec == CODECS['lz4']:
+            data = np.frombuffer(lz4.frame.decompress(data), dtype=np.uint8)
+        elif codec == CODECS['zstd']:
+            data = np.frombuffer(zstandard.ZstdDecompressor().decompress(data, max_output_size=height * width *
+                                                                         channels), dtype=np.uint8)
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        return data.reshape(shape)
@@ -0,0 +1,83 @@
+"""
+****************************************************************************************************************
+Class FrameLayout
+Defines where frame files are stored within a reel folder.
+Default layout stores all frames in the reel folder itself (picture-NNNNN.ext, 5 digits). For very long reels,
+frames can instead be distributed in subfolders of 'shard_size' frames each (frames-NNNNNN/picture-NNNNNN.ext,
+6 digits), which keeps directory operations fast and removes the 99,999 frame limit.
+The shard size used is stored in a small file in the reel folder, so that tools reading the folder (simulator,
+resume logic, FrameAlignmentChecker) can use the same layout the reel was captured with.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "FrameLayout"
+__version__ = "1.0.0"
+__date__ = "2025-02-23"
+__version_highlight__ = "FrameLayout - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import os
+import logging
+
+LAYOUT_FILENAME = "ALT-Scann8.layout"
+SHARD_DIR_PREFIX = "frames-"
+
+
+class FrameLayout:
+    def __init__(self, shard_size=0):
+        self.shard_size = shard_size    # Frames per subfolder, 0 for all frames in reel folder
+
+    def is_sharded(self):
+        return self.shard_size > 0
+
+    def shard_dir(self, frame_idx):
+        # Subfolder named after the first frame it contains
+        return f"{SHARD_DIR_PREFIX}{(frame_idx // self.shard_size) * self.shard_size:06d}"
+
+    def frame_filename(self, frame_idx, hdr_idx, file_type):
+        # Relative path (to reel folder) of a frame file. Hdr frame 1 has standard filename
+        if self.is_sharded():
+            if hdr_idx > 1:
+                name = f"picture-{frame_idx:06d}.{hdr_idx:1d}.{file_type}"
+            else:
+                name = f"picture-{frame_idx:06d}.{file_type}"
+            return os.path.join(self.shard_dir(frame_idx), name)
+        else:
+            if hdr_idx > 1:
+                return f"picture-{frame_idx:05d}.{hdr_idx:1d}.{file_type}"
+            else:
+                return f"picture-{frame_idx:05d}.{file_type}"
+
+    def save(self, folder):
+        # Only sharded layout needs to be recorded, absence of file means default layout
+        if self.is_sharded():
+            with open(os.path.join(folder, LAYOUT_FILENAME), 'w') as f:
+                f.write(f"{self.shard_size}\n")
+
+    @staticmethod
+    def load(folder):
+        # Returns layout used in a reel folder, or None if the folder has no layout file
+        layout_path = os.path.join(folder, LAYOUT_FILENAME)
+        if not os.path.isfile(layout_path):
+            return None
+        try:
+            with open(layout_path) as f:
+                return FrameLayout(int(f.read().strip()))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Invalid layout file {layout_path}: {e}")
+            return None
+
+    @staticmethod
+    def frame_folders(folder):
+        # Reel folder plus shard subfolders (if any), sorted, so that frames are listed in capture order
+        folders = [folder]
+        with os.scandir(folder) as entries:
+            shards = sorted(entry.name for entry in entries
+                            if entry.name.startswith(SHARD_DIR_PREFIX) and entry.is_dir())
+        folders.extend(os.path.join(folder, shard) for shard in shards)
+        return folders
@@ -0,0 +1,187 @@
+"""
+****************************************************************************************************************
+Class FrameRegistration
+Records the position of the sprocket hole measured on each captured frame, with sub-pixel resolution, in a text
+file stored in the reel folder (ALT-Scann8.registration.csv), so that frames can be stabilized offline by just
+shifting them (see FrameStabilizer), instead of running a full frame motion estimation in post-production.
+Position is measured on the left strip of the frame (where the hole is), by locating its edges on intensity
+profiles: The vertical position is the centre between top and bottom edges of the hole (row profile), the
+horizontal position is the inner (right) edge of the hole (column profile across the rows of the hole). Each edge
+is located where the profile crosses the level halfway between film and hole, interpolated between the two pixels
+on each side of the crossing.
+Lines are buffered in memory and written in blocks, as they are added from the save threads.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "FrameRegistration"
+__version__ = "1.0.0"
+__date__ = "2025-03-07"
+__version_highlight__ = "FrameRegistration - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import os
+import threading
+import logging
+import numpy as np
+
+REGISTRATION_FILENAME = "ALT-Scann8.registration.csv"
+REGISTRATION_HEADER = "frame,y,x,height,width\n"
+MIN_CONTRAST = 40       # Minimum difference between hole and film levels, below it the hole is not searched
+MIN_HOLE_HEIGHT = 0.08  # Minimum hole height (fraction of frame height), same as misaligned frame detection
+
+
+def longest_run(mask, min_length=1):
+    # Returns (start, end) of the longest run of True values (end included), None if none as long as min_length
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    changes = np.flatnonzero(np.diff(padded))
+    starts, ends = changes[0::2], changes[1::2] - 1
+    if len(starts) == 0:
+        return None
+    longest = int(np.argmax(ends - starts))
+    if ends[longest] - starts[longest] + 1 < min_length:
+        return None
+    return int(starts[longest]), int(ends[longest])
+
+
+def edge_position(profile, level, inside, outside):
+    # Sub-pixel position where profile crosses level, between index inside (hole) and adjacent index outside
+    a = profile[inside]
+    b = profile[outside]
+    if a == b:
+        return float(inside)
+    return inside + (outside - inside) * (a - level) / (a - b)
+
+
+def measure_hole(gray, film_type='S8', slice_width=10, strip_ratio=0.2):
+    """
+    Returns (y, x) position of the sprocket hole in a grayscale frame (array): y is the vertical centre of the
+    hole, x its inner (right) edge, both in pixels with sub-pixel resolution. Returns None if no hole is found,
+    x is None if the hole is found but its inner edge is not within the left strip (strip_ratio of the width).
+    As in misaligned frame detection, holes are bright for S8 and dark for R8.
+    """
+    height, width = gray.shape[:2]
+    strip = gray[:, :max(slice_width, int(width * strip_ratio))].astype(np.float32)
+    if film_type != 'S8':
+        strip = 255 - strip
+    # Vertical: Row profile on the first columns, always inside the hole
+    profile = strip[:, :slice_width].mean(axis=1)
+    low, high = np.percentile(profile, (5, 95))
+    if high - low < MIN_CONTRAST:
+        return None
+    level = (low + high) / 2
+    run = longest_run(profile > level, int(height * MIN_HOLE_HEIGHT))
+    if run is None:
+        return None
+    top, bottom = run
+    if top == 0 or bottom == height - 1:
+        return None     # Hole cut by frame border, centre cannot be measured
+    y = (edge_position(profile, level, top, top - 1) + edge_position(profile, level, bottom, bottom + 1)) / 2
+    # Horizontal: Column profile across the central rows of the hole (away from its rounded corners)
+    quarter = (bottom - top) // 4
+    columns = strip[top + quarter:bottom - quarter + 1].mean(axis=0)
+    inside = np.flatnonzero(columns[:slice_width] > level)
+    if len(inside) == 0:
+        return y, None
+    outside = np.flatnonzero(columns[inside[0]:] <= level)
+    if len(outside) == 0:
+        return y, None
+    edge = inside[0] + int(outside[0])
+    return y, edge_position(columns, level, edge - 1, edge)
+
+
+def load_registration(path):
+    """
+    Returns dictionary frame -> (y, x, height, width) from a registration file, or reel folder containing it.
+    x is None if not measured. If a frame appears more than once (scan resumed), the last measure is kept.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, REGISTRATION_FILENAME)
+    result = {}
+    with open(path) as f:
+        for line in f:
+            fields = line.strip().split(',')
+            if len(fields) != 5 or not fields[0].isdigit():
+                continue    # Header, or incomplete line of an interrupted session
+            try:
+                result[int(fields[0])] = (float(fields[1]), float(fields[2]) if fields[2] else None,
+                                          int(fields[3]), int(fields[4]))
+            except ValueError:
+                continue
+    return result
+
+
+class FrameRegistration:
+    def __init__(self, lines_per_write=50):
+        self.file = None
+        self.folder = None
+        self.lines = []
+        self.lines_per_write = lines_per_write
+        self.lock = threading.Lock()
+        self.measured = 0
+        self.not_found = 0
+
+    def set_folder(self, folder):
+        if folder == self.folder:
+            return
+        self.close()
+        path = os.path.join(folder, REGISTRATION_FILENAME)
+        with self.lock:
+            try:
+                is_new = not os.path.isfile(path)
+                incomplete = False
+                if not is_new and os.path.getsize(path) > 0:
+                    with open(path, 'rb') as f:
+                        f.seek(-1, os.SEEK_END)
+                        incomplete = f.read(1) != b'\n'
+                self.file = open(path, 'a')
+                if is_new:
+                    self.file.write(REGISTRATION_HEADER)
+                elif incomplete:
+                    self.file.write('\n')   # Line left incomplete by an interrupted session is then ignored
+                self.folder = folder
+            except OSError as e:
+                logging.warning(f"FrameRegistration: Cannot open {path}: {e}")
+
+    def add_frame(self, frame_idx, gray, film_type='S8'):
+        # Measures hole position on a grayscale frame (array) and records it. Called from save threads
+        if self.file is None:
+            return None
+        position = measure_hole(gray, film_type)
+        with self.lock:
+            if position is None:
+                self.not_found += 1
+                return None
+            y, x = position
+            self.measured += 1
+            self.lines.append(f"{frame_idx},{y:.2f},{'' if x is None else f'{x:.2f}'},"
+                              f"{gray.shape[0]},{gray.shape[1]}\n")
+            if len(self.lines) >= self.lines_per_write:
+                self._write()
+        return position
+
+    def _write(self):
+        if self.file is None or len(self.lines) == 0:
+            return
+        try:
+            self.file.writelines(self.lines)
+            self.file.flush()
+        except OSError as e:
+            logging.warning(f"FrameRegistration: Error writing registration file: {e}")
+        self.lines = []
+
+    def flush(self):
+        with self.lock:
+            self._write()
+
+    def close(self):
+        with self.lock:
+            self._write()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.folder = None
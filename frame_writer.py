@@ -0,0 +1,202 @@
+"""
+****************************************************************************************************************
+Class FrameWriter
+Write-behind layer used to store captured frames on disk.
+Each frame is first written to a temporary file in the target folder, and renamed to its final name only once
+the write is complete. This way an interrupted write (power cut, crash) never leaves a truncated file under a
+valid frame name.
+To avoid the cost of a synchronous fsync per file (very noticeable on SD cards), renamed files are accumulated
+and synced together every 'fsync_interval' frames (or 'fsync_max_delay' seconds). Once a batch has been synced,
+the frame numbers it contains are appended to a manifest file in the same folder, so that the manifest only
+lists frames known to be safely stored. With fsync disabled (interval 0), frames are appended to the manifest as
+soon as they are renamed (without fsync).
+Each frame is recorded in the manifest of the folder it was written to, even if the folder changes (new reel)
+while it is being saved.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "FrameWriter"
+__version__ = "1.0.0"
+__date__ = "2025-02-20"
+__version_highlight__ = "FrameWriter - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import os
+import time
+import threading
+import logging
+from frame_layout import FrameLayout
+
+TEMP_FILE_PREFIX = ".tmp-"
+MANIFEST_FILENAME = "ALT-Scann8.manifest"
+
+
+class FrameWriter:
+    def __init__(self, folder=None, fsync_interval=10, fsync_max_delay=5):
+        self.folder = None
+        self.fsync_interval = fsync_interval    # Number of frames between fsync batches (0 to disable fsync)
+        self.fsync_max_delay = fsync_max_delay  # Max time (in sec) a frame can stay pending to be synced
+        self.pending = []   # List of (frame_idx, hdr_idx, fullpath) renamed but not yet synced
+        self.last_sync_time = time.time()
+        self.lock = threading.Lock()
+        self.existing_dirs = set()  # Subfolders already checked/created (sharded layout)
+        if folder is not None:
+            self.set_folder(folder)
+
+    def set_folder(self, folder):
+        with self.lock:
+            if folder == self.folder:
+                return
+            # Pending frames belong to the previous folder: Taken in the same step as the switch, so that no frame
+            # of the previous folder can be added in between
+            batch = self.pending
+            self.pending = []
+            previous_folder = self.folder
+            self.folder = folder
+            self.last_sync_time = time.time()
+            self.existing_dirs = set()
+        self.sync_batch(batch, previous_folder)
+        self.remove_stale_temp_files()
+
+    def set_fsync_interval(self, fsync_interval):
+        self.sync()     # Flush frames pending with the previous interval
+        self.fsync_interval = fsync_interval
+
+    def remove_stale_temp_files(self):
+        # Temporary files left behind by an interrupted session are incomplete by definition
+        if self.folder is None or not os.path.isdir(self.folder):
+            return
+        for folder in FrameLayout.frame_folders(self.folder):   # Reel folder and shard subfolders, if any
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith(TEMP_FILE_PREFIX) and entry.is_file():
+                        logging.warning(f"Removing incomplete frame file {entry.path}")
+                        try:
+                            os.remove(entry.path)
+                        except OSError as e:
+                            logging.warning(f"Could not remove incomplete frame file {entry.path}: {e}")
+
+    @staticmethod
+    def temp_path(folder, filename):
+        # Keep file extension at the end, as some libraries (PIL, PiCamera2) use it to decide the format
+        head, tail = os.path.split(filename)
+        return os.path.join(folder, head, TEMP_FILE_PREFIX + tail)
+
+    def write(self, filename, frame_idx, hdr_idx, save_function):
+        """
+        Saves a frame using 'save_function', which receives the temporary path where to write the file, then
+        renames it to 'filename' (relative to the writer folder). Returns the final full path of the file.
+        """
+        folder = self.folder    # Folder might change (new reel) while saving, frame stays in this one
+        temp_path = self.temp_path(folder, filename)
+        dirname = os.path.dirname(temp_path)
+        if dirname not in self.existing_dirs:
+            # New subfolder: Parent folder entry needs to be synced as well
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname, exist_ok=True)
+                self.fsync_dir(os.path.dirname(dirname))
+            self.existing_dirs.add(dirname)
+        try:
+            save_function(temp_path)
+        except Exception:
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+            raise
+        return self.commit(folder, temp_path, filename, frame_idx, hdr_idx)
+
+    def commit(self, folder, temp_path, filename, frame_idx, hdr_idx):
+        fullpath = os.path.join(folder, filename)
+        os.replace(temp_path, fullpath)
+        sync_required = False
+        previous_folder = False
+        with self.lock:
+            if self.fsync_interval == 0:
+                self.append_manifest(folder, [(frame_idx, hdr_idx, fullpath)], False)
+            elif folder != self.folder:
+                previous_folder = True  # Folder switched while saving: Its pending frames were already synced
+            else:
+                self.pending.append((frame_idx, hdr_idx, fullpath))
+                sync_required = (len(self.pending) >= self.fsync_interval or
+                                 time.time() - self.last_sync_time > self.fsync_max_delay)
+        if previous_folder:
+            self.sync_batch([(frame_idx, hdr_idx, fullpath)], folder)
+        elif sync_required:
+            self.sync()
+        return fullpath
+
+    def sync(self):
+        with self.lock:
+            batch = self.pending
+            self.pending = []
+            self.last_sync_time = time.time()
+            folder = self.folder
+        self.sync_batch(batch, folder)
+
+    def sync_batch(self, batch, folder):
+        # Syncs files of a batch (all of them in 'folder'), then records them in the manifest of the folder
+        if len(batch) == 0 or folder is None:
+            return
+        curtime = time.time()
+        synced_dirs = set()
+        for frame_idx, hdr_idx, fullpath in batch:
+            try:
+                fd = os.open(fullpath, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                synced_dirs.add(os.path.dirname(fullpath))
+            except OSError as e:
+                logging.warning(f"Could not sync frame file {fullpath}: {e}")
+        # Directory entries need to be synced too, for the renames to be persistent
+        for dirname in synced_dirs:
+            self.fsync_dir(dirname)
+        with self.lock:
+            self.append_manifest(folder, batch, True)
+        logging.debug(f"FrameWriter: {len(batch)} files synced in {round((time.time() - curtime) * 1000, 1)} ms")
+
+    @staticmethod
+    def append_manifest(folder, batch, fsync):
+        # Called with lock held, so that lines written by different threads are not mixed
+        try:
+            with open(os.path.join(folder, MANIFEST_FILENAME), 'a') as f:
+                for frame_idx, hdr_idx, fullpath in batch:
+                    f.write(f"{frame_idx},{hdr_idx},{os.path.relpath(fullpath, folder)}\n")
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            logging.warning(f"Could not update manifest in {folder}: {e}")
+
+    @staticmethod
+    def fsync_dir(dirname):
+        try:
+            fd = os.open(dirname, os.O_RDONLY)
+        except OSError:
+            return  # Not possible in all platforms
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def completed_frames(self, folder=None):
+        # Returns set of (frame_idx, hdr_idx) listed in the manifest of the folder (current folder by default)
+        completed = set()
+        manifest_path = os.path.join(folder if folder is not None else self.folder, MANIFEST_FILENAME)
+        if os.path.isfile(manifest_path):
+            with open(manifest_path) as f:
+                for line in f:
+                    fields = line.strip().split(',')
+                    if len(fields) >= 2 and fields[0].isdigit() and fields[1].isdigit():
+                        completed.add((int(fields[0]), int(fields[1])))
+        return completed
+
+    def close(self):
+        self.sync()
@@ -0,0 +1,108 @@
+"""
+****************************************************************************************************************
+Class FramingController
+Closed-loop framing correction: The vertical offset of the sprocket hole measured on each captured frame (the same
+check used to detect misaligned frames) is fed back to the controller as extra steps after frame detection
+(CMD_SET_EXTRA_STEPS), so that framing drift along a reel is corrected without user intervention.
+The loop is damped, as the effect of a correction is only seen a few frames later (frames already detected or in
+the save queue still have the previous framing):
+- Offsets are collected only from frames detected after the last correction has settled, and reduced to their
+  median (holes not found and outliers are ignored).
+- Only a fraction of the measured error (gain) is corrected each time, limited to a few steps per correction.
+- Errors smaller than a dead band are ignored, to avoid chasing noise.
+Correction is limited to the extra steps actually applied by the controllers: Positive only (negative values just
+lower the frame detection threshold, they do not move the film back), and only with automatic frame steps (the
+Arduino Nano controller ignores them otherwise). Framing can therefore only be corrected towards more steps per
+frame; corrections beyond that range are reported once, instead of silently accumulating.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "FramingController"
+__version__ = "1.0.0"
+__date__ = "2025-03-06"
+__version_highlight__ = "FramingController - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import threading
+import logging
+import statistics
+
+EXTRA_STEPS_MIN = 0     # Range of CMD_SET_EXTRA_STEPS values that actually move the film after frame detection
+EXTRA_STEPS_MAX = 30
+
+
+def offset_to_steps(offset, image_height, frame_steps):
+    # Captured area is roughly one frame high: Steps per pixel approximated as frame steps / image height
+    return offset * frame_steps / image_height
+
+
+class FramingController:
+    def __init__(self, gain=0.3, samples=5, settle_frames=3, max_change=3, dead_band=0.01, outlier_ratio=0.25):
+        self.gain = gain                    # Fraction of the measured error corrected each time
+        self.samples = samples              # Offsets required for each correction
+        self.settle_frames = settle_frames  # Frames after a correction whose offset is not yet representative
+        self.max_change = max_change        # Maximum change (steps) per correction
+        self.dead_band = dead_band          # Errors below this fraction of the frame height are ignored
+        self.outlier_ratio = outlier_ratio  # Offsets above this fraction of the frame height are ignored
+        self.lock = threading.Lock()
+        self.reset(0)
+
+    def reset(self, extra_steps):
+        # Called at scan start, with the extra steps currently set in the controller
+        with self.lock:
+            self.extra_steps = extra_steps
+            # Unrounded value, so that small corrections accumulate
+            self.position = float(max(EXTRA_STEPS_MIN, min(EXTRA_STEPS_MAX, extra_steps)))
+            self.saturated = False  # Last correction was limited by the range of the controller
+            self.offsets = []
+            self.last_change_frame = -1
+            self.pending = None
+            self.corrections = 0
+
+    def add_offset(self, frame_idx, offset, image_height, frame_steps):
+        """
+        Adds the hole offset (pixels, positive if hole below the middle of the frame, None if not found) measured
+        on a frame. frame_steps is the current number of steps per frame, used to convert pixels to steps.
+        Called from save threads.
+        """
+        if offset is None or image_height <= 0 or frame_steps <= 0 or abs(offset) > image_height * self.outlier_ratio:
+            return
+        with self.lock:
+            if frame_idx <= self.last_change_frame + self.settle_frames:
+                return
+            self.offsets.append(offset)
+            if len(self.offsets) < self.samples:
+                return
+            error = statistics.median(self.offsets)
+            self.offsets = []
+            if abs(error) <= image_height * self.dead_band:
+                return
+            change = self.gain * offset_to_steps(error, image_height, frame_steps)
+            change = max(-self.max_change, min(self.max_change, change))
+            position = self.position + change
+            self.position = max(EXTRA_STEPS_MIN, min(EXTRA_STEPS_MAX, position))
+            if position != self.position and not self.saturated:
+                logging.warning(f"FramingController: Frame {frame_idx}, offset {error} px cannot be corrected, "
+                                f"extra steps limited to {EXTRA_STEPS_MIN}..{EXTRA_STEPS_MAX}")
+            self.saturated = position != self.position
+            if round(self.position) != self.extra_steps:
+                self.pending = round(self.position)
+                logging.debug(f"FramingController: Frame {frame_idx}, offset {error} px, extra steps "
+                              f"{self.extra_steps} -> {self.pending}")
+
+    def get_update(self, frame_idx):
+        # Returns new extra steps to send to the controller (None if no change), before requesting frame frame_idx
+        with self.lock:
+            if self.pending is None:
+                return None
+            self.extra_steps = self.pending
+            self.pending = None
+            self.offsets = []
+            self.last_change_frame = frame_idx
+            self.corrections += 1
+            return self.extra_steps
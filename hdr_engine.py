@@ -0,0 +1,236 @@
+"""
+****************************************************************************************************************
+Class HdrEngine
+Handles the exposure changes required for HDR capture.
+After an exposure change, the sensor needs a few frames before delivering images with the new exposure. Instead
+of discarding a fixed number of full captures (dry runs), the engine reads only the metadata of the frames
+delivered by the camera, until the reported ExposureTime matches the requested one. Typically this takes one or
+two frames, and no image needs to be converted or copied in the meantime.
+In exposure cycling mode, the whole exposure list of a frame is fed to the camera one exposure per delivered
+frame, without waiting for each one to be applied. Frames are then harvested as they arrive, by matching the
+ExposureTime in their metadata against the requested exposures, so that a full HDR set takes roughly
+num_exposures sensor frame times (plus the pipeline delay of the camera).
+In adaptive bracket mode, a histogram of the middle exposure of the previous frame (downscaled) is used to decide
+which of the other exposures are actually needed: Intermediate short exposures only if highlights are clipped,
+longer ones only if shadows are crushed. The shortest exposure is always captured, as its file (hdr index 1) is
+the base file of the frame (standard filename, used by alignment check, storage forecast, frame scanner and
+merger). Frames with a limited dynamic range are then captured with 2 exposures instead of the full list.
+Reference images (middle exposure) are processed by a background thread, which also calibrates the bracket:
+From the mean luminance of the middle exposure, it estimates the exposure giving a mid-grey average, to be used
+as new center of the bracket (replacing an auto-exposure run with extra captures in the capture loop).
+Frames saved with respect to the previous method (fixed number of dry runs per exposure change) are counted per
+reel.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "HdrEngine"
+__version__ = "1.0.0"
+__date__ = "2025-02-26"
+__version_highlight__ = "HdrEngine - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import time
+import logging
+import threading
+import queue
+import numpy as np
+
+# Adaptive bracket: Fraction of pixels clipped (highlights) or crushed (shadows) requiring additional exposures
+CLIPPED_FRACTION_MIN = 0.002
+CLIPPED_FRACTION_HIGH = 0.02    # Above this, intermediate exposures are used as well (5 exposure brackets)
+CLIPPED_LEVEL_HIGH = 250
+CLIPPED_LEVEL_LOW = 8
+# Bracket calibration: Target mean (linear) luminance of the middle exposure, and max correction per frame
+CALIBRATION_TARGET = 0.18
+CALIBRATION_MAX_RATIO = 2.0
+DISPLAY_GAMMA = 2.2
+
+
+class HdrEngine:
+    def __init__(self, camera, dry_run_iterations=4, max_wait_frames=12):
+        self.camera = camera
+        self.dry_run_iterations = dry_run_iterations  # Captures discarded per exposure change by previous method
+        self.max_wait_frames = max_wait_frames  # Give up waiting after this many frames (exposure not reachable)
+        self.last_exposure = None   # Last exposure requested to the camera
+        self.reference_histogram = None     # Luminance histogram of middle exposure of previous frame
+        self.calibrated_exposure = None     # Exposure (microseconds) for the bracket center, as per last reference
+        self.reference_queue = queue.Queue(maxsize=2)
+        self.reference_thread = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        # Called at the start of each reel
+        self.exposure_changes = 0
+        self.dry_runs_replaced = 0  # Captures the previous method would have discarded
+        self.frames_waited = 0
+        self.timeouts = 0
+        self.exposures_skipped = 0
+
+    @staticmethod
+    def exposure_matches(actual, requested):
+        # Sensor applies exposure in multiples of the line time, so an exact match is not always possible
+        return abs(actual - requested) <= max(requested * 0.02, 50)
+
+    def set_exposure(self, exposure_time):
+        # Sets exposure (in microseconds) and consumes frame metadata until frames with that exposure are delivered
+        # Returns metadata of the first frame with the requested exposure
+        self.camera.set_controls({"ExposureTime": exposure_time})
+        self.last_exposure = exposure_time
+        self.exposure_changes += 1
+        self.dry_runs_replaced += self.dry_run_iterations - 1
+        metadata = None
+        for i in range(self.max_wait_frames):
+            metadata = self.camera.capture_metadata()
+            self.frames_waited += 1
+            if self.exposure_matches(metadata["ExposureTime"], exposure_time):
+                return metadata
+        self.timeouts += 1
+        logging.warning(f"HdrEngine: Exposure {exposure_time} not reached after {self.max_wait_frames} frames "
+                        f"(current {metadata['ExposureTime'] if metadata is not None else '?'})")
+        return metadata
+
+    def wait_ae_settled(self):
+        # With auto exposure enabled, wait until two consecutive frames report the same exposure
+        # Returns metadata of the last frame
+        previous_exposure = None
+        metadata = None
+        for i in range(self.max_wait_frames * 2):
+            metadata = self.camera.capture_metadata()
+            self.frames_waited += 1
+            if metadata.get("AeLocked", False) or metadata["ExposureTime"] == previous_exposure:
+                break
+            previous_exposure = metadata["ExposureTime"]
+        self.dry_runs_replaced += self.dry_run_iterations * 2 - 1
+        return metadata
+
+    def capture_exposure_cycle(self, exposures, request_scheduler, on_frame, stabilization_delay=0):
+        # Captures one frame for each exposure (in microseconds) of the list, in list order if possible
+        # on_frame(position, request, metadata) is called for each harvested request, and has to release it
+        # PiCamera2 only keeps the latest set_controls until the next request is queued, so exposures are issued
+        # one per delivered frame; camera pipeline then applies them in order, a fixed number of frames later
+        # stabilization_delay (seconds): Wait before the first capture, as frames already in the pipeline might have
+        # been exposed while the film was still moving (and would match the first exposure, same as the last one of
+        # the previous frame)
+        pending = dict(enumerate(exposures))
+        issued = 0
+        frames = 0
+        max_frames = len(exposures) * 2 + self.max_wait_frames
+        self.exposure_changes += len(exposures) - 1
+        self.dry_runs_replaced += (len(exposures) - 1) * (self.dry_run_iterations - 1)
+        if stabilization_delay > 0:
+            time.sleep(stabilization_delay)
+        while len(pending) > 0 and frames < max_frames:
+            if issued < len(exposures):
+                self.camera.set_controls({"ExposureTime": exposures[issued]})
+                self.last_exposure = exposures[issued]
+                issued += 1
+            request = request_scheduler.capture_request()
+            frames += 1
+            metadata = request.get_metadata()
+            position = next((pos for pos, exp in pending.items()
+                             if self.exposure_matches(metadata["ExposureTime"], exp)), None)
+            if position is None:
+                request_scheduler.release(request)     # Frame with an exposure in transition
+                self.frames_waited += 1
+                continue
+            del pending[position]
+            on_frame(position, request, metadata)
+        # Exposures not harvested (camera could not deliver them): Fall back to explicit wait for each one
+        for position, exposure in sorted(pending.items()):
+            self.timeouts += 1
+            logging.warning(f"HdrEngine: Exposure {exposure} not harvested in cycle, capturing it explicitly")
+            self.set_exposure(exposure)
+            request = request_scheduler.capture_request()
+            on_frame(position, request, request.get_metadata())
+
+    def start(self):
+        self.reference_thread = threading.Thread(target=self.reference_worker, daemon=True)
+        self.reference_thread.start()
+
+    def stop(self):
+        if self.reference_thread is not None:
+            self.reference_queue.put(None)
+            self.reference_thread.join()
+            self.reference_thread = None
+
+    def submit_reference(self, image, exposure_time, base_exposure=None):
+        # Image captured with the middle exposure (in microseconds), processed in background
+        # base_exposure: Same exposure without the bracket shift set by the user (if any), bracket center is
+        # calibrated for it, so that the shift is applied on top of the calibrated center instead of being cancelled
+        if base_exposure is None:
+            base_exposure = exposure_time
+        if self.reference_thread is None:
+            self.set_reference_image(image, exposure_time, base_exposure)
+            return
+        try:
+            self.reference_queue.put_nowait((image, exposure_time, base_exposure))
+        except queue.Full:
+            logging.debug("HdrEngine: Reference queue full, skipping reference image")
+
+    def reference_worker(self):
+        logging.debug("Started HdrEngine reference thread")
+        while True:
+            item = self.reference_queue.get()
+            if item is None:
+                break
+            try:
+                self.set_reference_image(*item)
+            except Exception as e:
+                logging.warning(f"HdrEngine: Error processing reference image: {e}")
+        logging.debug("Exiting HdrEngine reference thread")
+
+    def set_reference_image(self, image, exposure_time, base_exposure=None, downscale=8):
+        # Image (PIL or numpy array) captured with the middle exposure, used to select exposures of next frame
+        if isinstance(image, np.ndarray):
+            small = image[::downscale, ::downscale]
+            luminance = small.mean(axis=2).astype(np.uint8) if small.ndim == 3 else small.astype(np.uint8)
+        else:
+            luminance = np.asarray(image.reduce(downscale).convert('L'))
+        histogram = np.bincount(luminance.ravel(), minlength=256)
+        self.reference_histogram = histogram
+        self.calibrate(histogram, exposure_time, base_exposure if base_exposure is not None else exposure_time)
+
+    def calibrate(self, histogram, exposure_time, base_exposure):
+        # Sensor response is linear, so exposure is scaled by the ratio between target and actual linear luminance
+        # Luminance is estimated for the base exposure (without bracket shift), which is the one being calibrated
+        linear_levels = (np.arange(256) / 255) ** DISPLAY_GAMMA
+        mean_linear = (histogram * linear_levels).sum() / histogram.sum() * base_exposure / max(exposure_time, 1)
+        ratio = CALIBRATION_TARGET / max(mean_linear, 1e-4)
+        # Damped and limited correction: Avoids oscillation, and clipped images only give a bound, not a value
+        ratio = min(max(ratio ** 0.5, 1 / CALIBRATION_MAX_RATIO), CALIBRATION_MAX_RATIO)
+        self.calibrated_exposure = int(base_exposure * ratio)
+
+    def select_exposures(self, num_exposures):
+        # Returns sorted list of positions (0 = shortest exposure) to be captured for the next frame
+        all_positions = list(range(num_exposures))
+        if self.reference_histogram is None or num_exposures < 3:
+            return all_positions
+        total = self.reference_histogram.sum()
+        highlights = self.reference_histogram[CLIPPED_LEVEL_HIGH:].sum() / total
+        shadows = self.reference_histogram[:CLIPPED_LEVEL_LOW + 1].sum() / total
+        mid = num_exposures // 2
+        # Shortest exposure always kept: Its file (hdr index 1) is the one with the standard frame filename
+        positions = {0, mid}
+        # Shorter exposures recover highlights, longer ones recover shadows
+        if highlights > CLIPPED_FRACTION_HIGH:
+            positions.update(range(1, mid))
+        if shadows > CLIPPED_FRACTION_MIN:
+            positions.add(num_exposures - 1)
+            if shadows > CLIPPED_FRACTION_HIGH:
+                positions.update(range(mid + 1, num_exposures - 1))
+        self.exposures_skipped += num_exposures - len(positions)
+        return sorted(positions)
+
+    def frames_saved(self):
+        # Frames not waited for, compared to a fixed number of dry runs per exposure change
+        return self.dry_runs_replaced - self.frames_waited
+
+    def stats_str(self):
+        return (f"{self.exposure_changes} exposure changes, {self.frames_waited} frames waited "
+                f"({self.frames_saved()} frames saved vs. dry runs), {self.timeouts} timeouts, "
+                f"{self.exposures_skipped} exposures skipped by adaptive bracket")
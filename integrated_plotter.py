@@ -0,0 +1,135 @@
+"""
+****************************************************************************************************************
+Class IntegratedPlotter
+Plots PT level and threshold values reported by the controller, in the plotter area of the main window.
+Samples are stored in fixed size numpy ring buffers (one slot per horizontal step), and each series is drawn as a
+polyline whose coordinates are replaced in place on each refresh, so the number of canvas items is constant and
+the cost of a refresh does not depend on the history length. Refreshes are capped to a maximum rate: samples
+arriving in between are only stored, and a single deferred refresh is scheduled.
+Two modes are available: sweep (a cursor moves left to right, overwriting oldest samples) and scroll (newest
+sample always at the right edge).
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "IntegratedPlotter"
+__version__ = "1.0.0"
+__date__ = "2025-03-04"
+__version_highlight__ = "IntegratedPlotter - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import time
+import logging
+import numpy as np
+
+LABEL_HEIGHT = 15   # Pixels on top of the plot reserved for the max value label
+
+
+class IntegratedPlotter:
+    def __init__(self, canvas, width, height, step=5, max_refresh_rate=10):
+        self.canvas = canvas
+        self.step = step    # Horizontal pixels between samples
+        self.min_refresh_interval = 1 / max_refresh_rate
+        self.scroll = False
+        self.last_refresh = 0
+        self.refresh_pending = None
+        self.max_pt = 100
+        self.min_pt = 800
+        self.prev_threshold = 0
+        # Canvas items, created once
+        self.pt_lines = [canvas.create_line(0, 0, 0, 0, width=1, fill="blue") for i in range(2)]
+        self.threshold_lines = [canvas.create_line(0, 0, 0, 0, width=1, fill="red") for i in range(2)]
+        self.cursor = canvas.create_line(0, 0, 0, 0, fill="black")
+        self.labels = []
+        for i in range(2):
+            background = canvas.create_rectangle(0, 0, 0, 0, fill="white", outline="white")
+            label = canvas.create_text(10, 0, text="", anchor='nw', font=f"Helvetica {12}")
+            self.labels.append((label, background))
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        # History is cleared, as the number of samples displayed changes
+        self.width = width
+        self.height = height
+        self.slots = max(2, width // self.step + 1)
+        self.pt_values = np.zeros(self.slots, dtype=np.float32)
+        self.threshold_values = np.zeros(self.slots, dtype=np.float32)
+        self.position = -1  # Slot of the last sample
+        self.count = 0      # Valid samples in buffers
+        self.canvas.coords(self.labels[1][0], 10, height - LABEL_HEIGHT)
+        self.refresh()
+
+    def set_scroll(self, scroll):
+        self.scroll = scroll
+        self.position = -1
+        self.count = 0
+        self.refresh()
+
+    def add_sample(self, pt_value, threshold):
+        if pt_value > self.max_pt * 10:
+            logging.warning("PT level too high, ignoring it")
+            return
+        if threshold > max(self.max_pt, pt_value):
+            # Sometimes I2C loses second parameter, no idea why: Replace by previous value
+            logging.debug(f"ThresholdLevel value is wrong ({threshold}), replacing by previous ({self.prev_threshold})")
+            threshold = self.prev_threshold
+        self.prev_threshold = threshold
+        self.max_pt = max(self.max_pt, pt_value)
+        self.min_pt = min(self.min_pt, pt_value)
+        self.position = (self.position + 1) % self.slots
+        self.pt_values[self.position] = pt_value
+        self.threshold_values[self.position] = threshold
+        self.count = min(self.count + 1, self.slots)
+        # Capped refresh rate: Samples received in between are drawn by a single deferred refresh
+        if self.refresh_pending is None:
+            delay = self.min_refresh_interval - (time.time() - self.last_refresh)
+            if delay <= 0:
+                self.refresh()
+            else:
+                self.refresh_pending = self.canvas.after(int(delay * 1000), self.refresh)
+
+    def y_coords(self, values):
+        usable_height = self.height - LABEL_HEIGHT
+        return LABEL_HEIGHT + usable_height - values * (usable_height / self.max_pt)
+
+    def set_line(self, item, xs, values):
+        # Polyline through the given points, hidden if less than 2 points
+        if len(xs) < 2:
+            self.canvas.coords(item, -1, -1, -1, -1)
+        else:
+            self.canvas.coords(item, np.column_stack((xs, self.y_coords(values))).ravel().tolist())
+
+    def refresh(self):
+        self.refresh_pending = None
+        self.last_refresh = time.time()
+        if self.scroll:
+            # Chronological order, newest sample at right edge
+            order = np.roll(np.arange(self.slots), -(self.position + 1))[self.slots - self.count:]
+            xs = self.width - 1 - self.step * np.arange(self.count - 1, -1, -1)
+            for lines, values in ((self.pt_lines, self.pt_values), (self.threshold_lines, self.threshold_values)):
+                self.set_line(lines[0], xs, values[order])
+                self.set_line(lines[1], [], [])
+            self.canvas.coords(self.cursor, -1, -1, -1, -1)
+        else:
+            # Sweep: Current pass up to cursor, previous pass after it (if buffers already filled once)
+            current = np.arange(self.position + 1)
+            previous = np.arange(self.position + 2, self.slots) if self.count == self.slots else np.arange(0)
+            for lines, values in ((self.pt_lines, self.pt_values), (self.threshold_lines, self.threshold_values)):
+                self.set_line(lines[0], current * self.step, values[current])
+                self.set_line(lines[1], previous * self.step, values[previous])
+            cursor_x = (self.position + 1) * self.step
+            self.canvas.coords(self.cursor, cursor_x, 0, cursor_x, self.height)
+        for (label, background), value in zip(self.labels, (self.max_pt, self.min_pt)):
+            self.canvas.itemconfig(label, text=str(value))
+            bbox = self.canvas.bbox(label)
+            if bbox is not None:
+                self.canvas.coords(background, *bbox)
+
+    def close(self):
+        if self.refresh_pending is not None:
+            self.canvas.after_cancel(self.refresh_pending)
+            self.refresh_pending = None
@@ -0,0 +1,172 @@
+"""
+****************************************************************************************************************
+Class JpegEncoder (and subclasses)
+Pluggable JPEG encoders for frames saved as JPG: PIL (always available), OpenCV imencode, and simplejpeg or
+PyTurboJPEG if installed (both call libjpeg-turbo directly, without going through a PIL image).
+All encoders share the same settings (quality, chroma subsampling, optimized Huffman tables where supported),
+and take a PIL image or an RGB uint8 array.
+Speed of each encoder depends on the machine (libjpeg version, SIMD support, build options), so a short
+benchmark on a synthetic frame can be run at startup, to select the fastest encoder available.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "JpegEncoder"
+__version__ = "1.0.0"
+__date__ = "2025-03-03"
+__version_highlight__ = "JpegEncoder - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import io
+import time
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+from PIL import Image
+
+try:
+    import cv2
+    opencv_installed = True
+except ImportError:
+    opencv_installed = False
+
+try:
+    import simplejpeg
+    simplejpeg_installed = True
+except ImportError:
+    simplejpeg_installed = False
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_444, TJSAMP_422, TJSAMP_420
+    turbojpeg_installed = True
+except ImportError:
+    turbojpeg_installed = False
+
+SUBSAMPLING_MODES = ['4:4:4', '4:2:2', '4:2:0']
+
+
+class JpegEncoder(ABC):
+    name = None
+
+    def __init__(self, quality=95, subsampling='4:2:0', optimize=False):
+        self.quality = quality
+        self.subsampling = subsampling if subsampling in SUBSAMPLING_MODES else '4:2:0'
+        self.optimize = optimize
+
+    @abstractmethod
+    def encode(self, image):
+        # Returns JPEG data (bytes) for a PIL image or an RGB uint8 array
+        pass
+
+    def save(self, image, path):
+        data = self.encode(image)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    @staticmethod
+    def to_array(image):
+        return np.asarray(image) if isinstance(image, Image.Image) else image
+
+
+class PilJpegEncoder(JpegEncoder):
+    name = 'pil'
+
+    def encode(self, image):
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(image)
+        buffer = io.BytesIO()
+        self.save(image, buffer)
+        return buffer.getvalue()
+
+    def save(self, image, path):
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(image)
+        image.save(path, format='JPEG', quality=self.quality, optimize=self.optimize,
+                   subsampling=SUBSAMPLING_MODES.index(self.subsampling))
+
+
+class OpenCvJpegEncoder(JpegEncoder):
+    name = 'opencv'
+
+    def __init__(self, quality=95, subsampling='4:2:0', optimize=False):
+        super().__init__(quality, subsampling, optimize)
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, self.quality, cv2.IMWRITE_JPEG_OPTIMIZE, int(self.optimize)]
+        if hasattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR'):    # OpenCV 4.5.5 and later
+            self.params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR,
+                            {'4:4:4': 0x111111, '4:2:2': 0x211111, '4:2:0': 0x221111}[self.subsampling]]
+
+    def encode(self, image):
+        ok, data = cv2.imencode('.jpg', cv2.cvtColor(self.to_array(image), cv2.COLOR_RGB2BGR), self.params)
+        if not ok:
+            raise ValueError("OpenCV could not encode image")
+        return data.tobytes()
+
+
+class SimpleJpegEncoder(JpegEncoder):
+    name = 'simplejpeg'
+
+    def encode(self, image):
+        return simplejpeg.encode_jpeg(np.ascontiguousarray(self.to_array(image)), quality=self.quality,
+                                      colorspace='RGB', colorsubsampling=self.subsampling.replace(':', ''))
+
+
+class TurboJpegEncoder(JpegEncoder):
+    name = 'turbojpeg'
+    turbo_jpeg = None   # Shared library handle, loaded once
+
+    def __init__(self, quality=95, subsampling='4:2:0', optimize=False):
+        super().__init__(quality, subsampling, optimize)
+        if TurboJpegEncoder.turbo_jpeg is None:
+            TurboJpegEncoder.turbo_jpeg = TurboJPEG()
+        self.jpeg_subsample = {'4:4:4': TJSAMP_444, '4:2:2': TJSAMP_422, '4:2:0': TJSAMP_420}[self.subsampling]
+
+    def encode(self, image):
+        return self.turbo_jpeg.encode(np.ascontiguousarray(self.to_array(image)), quality=self.quality,
+                                      pixel_format=TJPF_RGB, jpeg_subsample=self.jpeg_subsample)
+
+
+def available_encoders():
+    # Encoder names, PIL first (default)
+    return (['pil'] + (['opencv'] if opencv_installed else []) + (['simplejpeg'] if simplejpeg_installed else []) +
+            (['turbojpeg'] if turbojpeg_installed else []))
+
+
+def create_encoder(name, quality=95, subsampling='4:2:0', optimize=False):
+    # Falls back to PIL if the requested encoder is not available (or its library cannot be loaded)
+    encoder_classes = {cls.name: cls for cls in (PilJpegEncoder, OpenCvJpegEncoder, SimpleJpegEncoder,
+                                                 TurboJpegEncoder)}
+    if name in available_encoders():
+        try:
+            return encoder_classes[name](quality, subsampling, optimize)
+        except Exception as e:
+            logging.warning(f"JpegEncoder: Cannot use {name} encoder ({e}), using PIL")
+    return PilJpegEncoder(quality, subsampling, optimize)
+
+
+def benchmark_encoders(quality=95, subsampling='4:2:0', optimize=False, width=2028, height=1520, iterations=3):
+    # Returns (name of fastest encoder, {name: ms per frame}), on a synthetic frame with film-like content
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[np.newaxis, :] * np.ones((height, 1), np.float32)
+    noise = np.random.default_rng(0).normal(0, 12, (height, width, 3)).astype(np.float32)
+    image = np.clip(gradient[:, :, np.newaxis] * (0.6, 0.8, 1.0) + noise, 0, 255).astype(np.uint8)
+    results = {}
+    for name in available_encoders():
+        encoder = create_encoder(name, quality, subsampling, optimize)
+        if encoder.name != name:
+            continue
+        try:
+            encoder.encode(image)   # Warm up (library load, first allocations)
+            best = None
+            for i in range(iterations):
+                curtime = time.time()
+                encoder.encode(image)
+                elapsed = time.time() - curtime
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = round(best * 1000, 1)
+        except Exception as e:
+            logging.warning(f"JpegEncoder: Benchmark of {name} encoder failed: {e}")
+    fastest = min(results, key=results.get) if len(results) > 0 else 'pil'
+    return fastest, results
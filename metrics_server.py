@@ -0,0 +1,163 @@
+"""
+****************************************************************************************************************
+Class MetricsServer
+Embedded HTTP server to monitor a scan remotely (e.g. overnight scans), without walking to the scanner:
+- /metrics: Metrics in Prometheus text format
+- /metrics.json: Same metrics, as JSON
+- /preview.jpg: Latest preview frame
+Metrics are served from a snapshot (flat dictionary of numeric values) pushed by the application, and the preview
+from JPEG data pushed by it, so requests never reach the UI or the capture loop. Snapshot and preview updates are
+throttled by the application itself (update_due/preview_due), so that the cost while scanning is negligible.
+Only the standard library is used. Bound to localhost by default, LAN access must be explicitly requested.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "MetricsServer"
+__version__ = "1.0.0"
+__date__ = "2025-03-09"
+__version_highlight__ = "MetricsServer - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import json
+import time
+import threading
+import logging
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+METRIC_PREFIX = "altscann8_"
+# Help text of known metrics (Prometheus format), metrics not listed get a generic one
+METRIC_HELP = {
+    'scan_ongoing': "1 while a scan is in progress",
+    'current_frame': "Last frame captured",
+    'session_frames': "Frames captured in current scan session",
+    'frames_per_minute': "Frames per minute, over the last minute (-1 until calculated)",
+    'scan_errors': "Scan errors (frame not detected by controller) in current scan session",
+    'misaligned_frames': "Misaligned frames detected in current reel",
+    'save_queue_depth': "Frames waiting to be saved",
+    'display_queue_depth': "Frames waiting to be displayed",
+    'time_save_image_ms': "Time to save a frame, rolling average (ms)",
+    'time_preview_display_ms': "Time to display a frame, rolling average (ms)",
+    'time_awb_ms': "Time waiting for auto white balance, rolling average (ms)",
+    'time_autoexp_ms': "Time waiting for auto exposure, rolling average (ms)",
+    'rpi_temperature_celsius': "Raspberry Pi CPU temperature",
+    'free_disk_mb': "Free space in target disk (MB)",
+    'snapshot_age_seconds': "Time since metrics were last updated (-1 if never)",
+}
+
+
+class MetricsServer:
+    def __init__(self, address='127.0.0.1', port=8088, update_interval=1, preview_interval=5):
+        self.address = address
+        self.port = port
+        self.update_interval = update_interval      # Min time (in sec) between snapshot updates
+        self.preview_interval = preview_interval    # Min time (in sec) between preview updates
+        self.lock = threading.Lock()
+        self.snapshot = {}
+        self.snapshot_time = 0
+        self.preview = None     # JPEG data
+        self.preview_time = 0
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        if self.server is not None:
+            return True
+        try:
+            self.server = ThreadingHTTPServer((self.address, self.port), self.handler_class())
+        except OSError as e:
+            logging.error(f"MetricsServer: Cannot start server on {self.address}:{self.port}: {e}")
+            return False
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logging.info(f"MetricsServer: Serving metrics on http://{self.address}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join(1)
+        self.server = None
+        self.thread = None
+
+    def is_running(self):
+        return self.server is not None
+
+    def update_due(self):
+        return time.time() - self.snapshot_time >= self.update_interval
+
+    def update(self, snapshot):
+        # snapshot: Dictionary of metric name -> numeric value (replaces the previous one)
+        with self.lock:
+            self.snapshot = snapshot
+            self.snapshot_time = time.time()
+
+    def preview_due(self):
+        return self.is_running() and time.time() - self.preview_time >= self.preview_interval
+
+    def set_preview(self, jpeg_data):
+        with self.lock:
+            self.preview = jpeg_data
+            self.preview_time = time.time()
+
+    def get_snapshot(self):
+        with self.lock:
+            snapshot = dict(self.snapshot)
+            snapshot_time = self.snapshot_time
+        snapshot['snapshot_age_seconds'] = round(time.time() - snapshot_time, 1) if snapshot_time > 0 else -1
+        return snapshot
+
+    def get_preview(self):
+        with self.lock:
+            return self.preview
+
+    def prometheus_text(self):
+        lines = []
+        for name, value in self.get_snapshot().items():
+            if isinstance(value, bool):
+                value = int(value)
+            elif not isinstance(value, (int, float)):
+                continue
+            lines.append(f"# HELP {METRIC_PREFIX}{name} {METRIC_HELP.get(name, name.replace('_', ' '))}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} gauge")
+            lines.append(f"{METRIC_PREFIX}{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def handler_class(self):
+        metrics_server = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path in ('/', '/metrics'):
+                    self.reply(200, "text/plain; version=0.0.4", metrics_server.prometheus_text().encode())
+                elif path == '/metrics.json':
+                    self.reply(200, "application/json", json.dumps(metrics_server.get_snapshot()).encode())
+                elif path == '/preview.jpg':
+                    preview = metrics_server.get_preview()
+                    if preview is None:
+                        self.reply(404, "text/plain", b"No preview available\n")
+                    else:
+                        self.reply(200, "image/jpeg", preview)
+                else:
+                    self.reply(404, "text/plain", b"Not found\n")
+
+            def reply(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(f"MetricsServer: {self.address_string()} {format % args}")
+
+        return MetricsRequestHandler
@@ -0,0 +1,96 @@
+"""
+****************************************************************************************************************
+Class NegativeProcessor
+Converts captured negative frames into positives using a lookup table, in a single pass.
+Without orange mask removal, the table is a plain inversion (255 - x, which for uint8 arrays is the same as
+XOR with 255, done in place). For color negatives, the orange mask of the film base can be removed as well:
+the color of the film base (the brightest part of the negative) is measured once per reel, on the first frame
+captured (the middle exposure for HDR, or the merged frame if merged in place: The darkest or brightest exposures
+would give a wrong base color), and each channel is scaled so that the base maps to black before inverting.
+The sprocket hole (and any other area where light does not go through the film) is brighter than the film base,
+so the left strip of the frame holding the hole is not measured, nor pixels white in all channels.
+Calibration is done under a lock, as frames are processed by several save threads.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "NegativeProcessor"
+__version__ = "1.0.0"
+__date__ = "2025-02-28"
+__version_highlight__ = "NegativeProcessor - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import logging
+import threading
+import numpy as np
+
+INVERT_LUT = [255 - i for i in range(256)]
+BASE_PERCENTILE = 99.5  # Percentile of each channel taken as film base color
+MIN_BASE_LEVEL = 64     # Lower values are not film base (frame too dark), would amplify noise too much
+HOLE_STRIP_RATIO = 0.2  # Left strip of the frame holding the sprocket hole (same as frame registration)
+DIRECT_LIGHT_LEVEL = 250    # Pixels above this in all channels are direct light (hole, beyond film edge)
+SAMPLE_STEP = 4         # Film base measured on one pixel out of SAMPLE_STEP in each direction
+
+
+class NegativeProcessor:
+    def __init__(self, orange_mask_removal=False):
+        self.orange_mask_removal = orange_mask_removal
+        self.base_color = None  # RGB color of film base, once measured
+        self.channel_luts = [INVERT_LUT] * 3
+        self.lock = threading.Lock()
+
+    def set_orange_mask_removal(self, enabled):
+        self.orange_mask_removal = enabled
+        self.reset()
+
+    def reset(self):
+        # New reel: Film base to be measured again
+        with self.lock:
+            self.base_color = None
+            self.channel_luts = [INVERT_LUT] * 3
+
+    def is_plain_inversion(self):
+        return self.base_color is None
+
+    def calibrate(self, image):
+        """
+        Measures film base color on a PIL RGB image or uint8 RGB array (done once per reel, on the first frame
+        received). Caller only passes frames with a representative exposure (not the darkest/brightest of HDR).
+        """
+        if not self.orange_mask_removal or self.base_color is not None:
+            return
+        with self.lock:
+            if self.base_color is not None:     # Measured by another thread meanwhile
+                return
+            array = np.asarray(image)
+            pixels = array[::SAMPLE_STEP, int(array.shape[1] * HOLE_STRIP_RATIO)::SAMPLE_STEP, :3].reshape(-1, 3)
+            film = pixels[pixels.min(axis=1) <= DIRECT_LIGHT_LEVEL]
+            if len(film) == 0:  # Blank frame, nothing better to measure
+                film = pixels
+            base_color = [max(int(np.percentile(film[:, channel], BASE_PERCENTILE)), MIN_BASE_LEVEL)
+                          for channel in range(3)]
+            # Scale each channel so that film base becomes 255 (then 0 once inverted)
+            self.channel_luts = [[max(0, 255 - min(255, round(i * 255 / base))) for i in range(256)]
+                                 for base in base_color]
+            self.base_color = tuple(base_color)
+        logging.info(f"NegativeProcessor: Film base color {self.base_color}, orange mask removal enabled")
+
+    def process(self, image):
+        # PIL RGB image: Single pass lookup for the 3 channels
+        luts = self.channel_luts
+        return image.point(luts[0] + luts[1] + luts[2])
+
+    def process_array(self, array):
+        # uint8 RGB array, processed in place
+        luts = self.channel_luts
+        if luts[0] is INVERT_LUT and luts[2] is INVERT_LUT:
+            np.bitwise_xor(array, 255, out=array)
+        else:
+            for channel in range(3):
+                lut = np.array(luts[channel], dtype=np.uint8)
+                array[:, :, channel] = lut[array[:, :, channel]]
+        return array
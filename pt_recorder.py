@@ -0,0 +1,119 @@
+"""
+****************************************************************************************************************
+Class PtRecorder
+Records the phototransistor (PT) signal reported by the controller during a scan, in a compact binary log stored
+in the reel folder (ALT-Scann8.pt.log), so that perforation detection can be analyzed and tuned offline (see
+PtSignalAnalyzer). Recorded events: PT level and threshold (RSP_REPORT_PLOTTER_INFO), frame detected with its
+steps and PT level (RSP_FRAME_AVAILABLE), auto levels (RSP_REPORT_AUTO_LEVELS) and scan errors (RSP_SCAN_ERROR).
+Each event is a fixed size record (event, timestamp, frame number, two parameters). Records are buffered in
+memory and written in blocks, as events arrive every 20 ms while scanning. Records are added from the controller
+listener thread, while the log is flushed/closed from the UI thread.
+Class PtLogReader
+Reads back the records of a log file.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "PtRecorder"
+__version__ = "1.0.0"
+__date__ = "2025-03-05"
+__version_highlight__ = "PtRecorder - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import os
+import time
+import struct
+import threading
+import logging
+
+PT_LOG_FILENAME = "ALT-Scann8.pt.log"
+PT_LOG_MAGIC = b"ALTSC8PT"
+# event, timestamp, frame, param1, param2
+PT_LOG_RECORD = struct.Struct('<BdIii')
+# Controller responses recorded (same codes as in controller and UI)
+EVENT_FRAME_AVAILABLE = 80
+EVENT_SCAN_ERROR = 81
+EVENT_REPORT_AUTO_LEVELS = 86
+EVENT_REPORT_PLOTTER_INFO = 87
+RECORDED_EVENTS = (EVENT_FRAME_AVAILABLE, EVENT_SCAN_ERROR, EVENT_REPORT_AUTO_LEVELS, EVENT_REPORT_PLOTTER_INFO)
+
+
+class PtRecorder:
+    def __init__(self, buffer_size=64 * 1024):
+        self.file = None
+        self.folder = None
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.records = 0
+        self.lock = threading.Lock()
+
+    def set_folder(self, folder):
+        if folder == self.folder:
+            return
+        self.close()
+        path = os.path.join(folder, PT_LOG_FILENAME)
+        try:
+            is_new = not os.path.isfile(path)
+            if not is_new:
+                # Drop incomplete record left by an interrupted session, so that new records stay aligned
+                excess = (os.path.getsize(path) - len(PT_LOG_MAGIC)) % PT_LOG_RECORD.size
+                if excess > 0:
+                    os.truncate(path, os.path.getsize(path) - excess)
+            self.file = open(path, 'ab')
+            if is_new:
+                self.file.write(PT_LOG_MAGIC)
+            self.folder = folder
+        except OSError as e:
+            logging.warning(f"PtRecorder: Cannot open {path}: {e}")
+
+    def record(self, event, frame, param1, param2):
+        if self.file is None or event not in RECORDED_EVENTS:
+            return
+        with self.lock:
+            if self.file is None:   # Closed in the meantime
+                return
+            self.buffer += PT_LOG_RECORD.pack(event, time.time(), frame, param1, param2)
+            self.records += 1
+            if len(self.buffer) >= self.buffer_size:
+                self._write()
+
+    def flush(self):
+        with self.lock:
+            self._write()
+
+    def _write(self):
+        if self.file is None or len(self.buffer) == 0:
+            return
+        try:
+            self.file.write(self.buffer)
+            self.file.flush()
+        except OSError as e:
+            logging.warning(f"PtRecorder: Error writing PT log: {e}")
+        self.buffer = bytearray()
+
+    def close(self):
+        with self.lock:
+            self._write()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.folder = None
+
+
+class PtLogReader:
+    def __init__(self, path):
+        # Log file, or reel folder containing it
+        self.path = os.path.join(path, PT_LOG_FILENAME) if os.path.isdir(path) else path
+
+    def records(self):
+        # Generator of (event, timestamp, frame, param1, param2), incomplete trailing record ignored
+        with open(self.path, 'rb') as f:
+            if f.read(len(PT_LOG_MAGIC)) != PT_LOG_MAGIC:
+                raise ValueError(f"{self.path} is not a PT log file")
+            data = f.read()
+        usable = len(data) - len(data) % PT_LOG_RECORD.size
+        yield from PT_LOG_RECORD.iter_unpack(data[:usable])
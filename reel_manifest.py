@@ -0,0 +1,123 @@
+"""
+****************************************************************************************************************
+Class ReelManifest
+Per-reel database (SQLite, stored in the reel folder) with one row per saved frame file: frame number, filename,
+size, CRC32, capture settings (exposure, colour gains), HDR index, alignment offset and the frame steps/PT level
+reported by the controller when the frame was captured.
+Allows querying a reel after the scan (e.g. list of misaligned frames, exposure used for a given frame) without
+opening any image file.
+Rows are inserted from the save threads, and committed in batches to keep the overhead low.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "ReelManifest"
+__version__ = "1.0.0"
+__date__ = "2025-02-21"
+__version_highlight__ = "ReelManifest - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import os
+import time
+import zlib
+import sqlite3
+import threading
+import logging
+
+REEL_MANIFEST_FILENAME = "ALT-Scann8.reel.sqlite"
+
+FRAME_COLUMNS = ("frame", "hdr_idx", "filename", "size", "crc32", "exposure_time", "gain_red", "gain_blue",
+                 "align_offset", "frame_steps", "pt_level", "timestamp")
+
+
+class ReelManifest:
+    def __init__(self, folder, commit_interval=25):
+        self.folder = folder
+        self.commit_interval = commit_interval  # Number of rows inserted between commits
+        self.uncommitted = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(folder, REEL_MANIFEST_FILENAME), check_same_thread=False)
+        # Manifest is rebuildable from files, durability is provided by the frame writer: Favour speed
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS frames ("
+                        "frame INTEGER NOT NULL, hdr_idx INTEGER NOT NULL, filename TEXT, size INTEGER, "
+                        "crc32 INTEGER, exposure_time INTEGER, gain_red REAL, gain_blue REAL, align_offset INTEGER, "
+                        "frame_steps INTEGER, pt_level INTEGER, timestamp REAL, "
+                        "PRIMARY KEY (frame, hdr_idx))")
+        self.db.commit()
+
+    @staticmethod
+    def file_crc32(fullpath):
+        # File has just been written, so reading it back comes from the page cache
+        crc = 0
+        with open(fullpath, 'rb') as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+        return crc
+
+    def add_frame(self, frame_idx, hdr_idx, fullpath, metadata=None, align_offset=None, frame_steps=None,
+                  pt_level=None, size=None, crc=None):
+        # size and crc are given for frames stored in a frame container (fullpath is then the chunk file)
+        exposure_time = gain_red = gain_blue = None
+        if metadata is not None:
+            exposure_time = metadata.get('ExposureTime')
+            if 'ColourGains' in metadata:
+                gain_red, gain_blue = metadata['ColourGains']
+        if size is None:
+            try:
+                size = os.path.getsize(fullpath)
+                crc = self.file_crc32(fullpath)
+            except OSError as e:
+                logging.warning(f"ReelManifest: Cannot read {fullpath}: {e}")
+                size = crc = None
+        row = (frame_idx, hdr_idx, os.path.relpath(fullpath, self.folder), size, crc, exposure_time, gain_red,
+               gain_blue, align_offset, frame_steps, pt_level, time.time())
+        with self.lock:
+            # Re-captured frames replace the previous entry
+            self.db.execute(f"INSERT OR REPLACE INTO frames ({', '.join(FRAME_COLUMNS)}) "
+                            f"VALUES ({', '.join('?' * len(FRAME_COLUMNS))})", row)
+            self.uncommitted += 1
+            if self.uncommitted >= self.commit_interval:
+                self.db.commit()
+                self.uncommitted = 0
+
+    def set_align_offset(self, frame_idx, hdr_idx, align_offset):
+        # Alignment is checked after the frame is saved, update the row once known
+        with self.lock:
+            self.db.execute("UPDATE frames SET align_offset=? WHERE frame=? AND hdr_idx=?",
+                            (align_offset, frame_idx, hdr_idx))
+
+    def flush(self):
+        with self.lock:
+            self.db.commit()
+            self.uncommitted = 0
+
+    def get_frame(self, frame_idx, hdr_idx=0):
+        # Returns dictionary with the manifest fields for a given frame, or None if not found
+        with self.lock:
+            row = self.db.execute(f"SELECT {', '.join(FRAME_COLUMNS)} FROM frames WHERE frame=? AND hdr_idx=?",
+                                  (frame_idx, hdr_idx)).fetchone()
+        return dict(zip(FRAME_COLUMNS, row)) if row is not None else None
+
+    def last_frame(self):
+        with self.lock:
+            row = self.db.execute("SELECT MAX(frame) FROM frames").fetchone()
+        return row[0] if row is not None else None
+
+    def frame_numbers(self):
+        # Sorted list of distinct frame numbers recorded in the manifest
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT DISTINCT frame FROM frames ORDER BY frame")]
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.db.close()
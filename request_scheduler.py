@@ -0,0 +1,68 @@
+"""
+****************************************************************************************************************
+Class RequestScheduler
+Keeps track of the PiCamera2 requests held by ALT-Scann8 (captured but not yet released, typically because they
+are waiting in the save queue to be written to disk as DNG/PNG).
+Each held request locks one of the camera buffers. If all buffers are held, the camera cannot deliver new frames,
+and any further capture (or metadata read) blocks. The scheduler caps the number of outstanding requests below
+the number of buffers, so that frames can keep being captured (HDR exposure changes, metadata reads) while
+previous requests are still being saved by the save threads.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "RequestScheduler"
+__version__ = "1.0.0"
+__date__ = "2025-02-25"
+__version_highlight__ = "RequestScheduler - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import time
+import threading
+import logging
+
+
+class RequestScheduler:
+    def __init__(self, camera, buffer_count, reserved_buffers=2):
+        self.camera = camera
+        # Buffers kept free: One being filled by the sensor, one for captures/metadata reads done in the meantime
+        self.max_outstanding = max(1, buffer_count - reserved_buffers)
+        self.slots = threading.Semaphore(self.max_outstanding)
+        self.lock = threading.Lock()
+        self.outstanding = 0
+        self.max_outstanding_reached = 0
+        self.total_wait_time = 0    # Time spent waiting for a free slot (saves not keeping up)
+
+    def capture_request(self):
+        # Blocks until one of the allowed slots is free, then captures a new request
+        curtime = time.time()
+        if not self.slots.acquire(blocking=False):
+            logging.debug(f"RequestScheduler: {self.max_outstanding} requests outstanding, waiting for release")
+            self.slots.acquire()
+        wait_time = time.time() - curtime
+        try:
+            request = self.camera.capture_request()
+        except Exception:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.outstanding += 1
+            self.max_outstanding_reached = max(self.max_outstanding_reached, self.outstanding)
+            self.total_wait_time += wait_time
+        return request
+
+    def release(self, request):
+        # Slot is freed even if the request cannot be released, otherwise capture_request would block forever
+        try:
+            request.release()
+        finally:
+            with self.lock:
+                self.outstanding -= 1
+            self.slots.release()
+
+    def get_outstanding(self):
+        return self.outstanding
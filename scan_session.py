@@ -0,0 +1,351 @@
+"""
+****************************************************************************************************************
+Class ScanSession
+Scan engine, independent of the user interface: Drives a scan from the controller events (frame available, scan
+error, end of reel), calling a capture function for each frame, and requesting the next frame to the controller.
+Runs in its own thread, state is kept in an explicit ScanState object, and progress is reported through listener
+callbacks ('started', 'frame', 'error', 'stopped'), so that it can be used from the UI (ALT-Scann8) or headless
+(HeadlessScanner, scripts, benchmarks).
+Class ScanState
+State of a scan session (frame counters, errors, frames per minute, timings).
+Class FpmCounter
+Frames per minute, calculated over the last minute.
+Class ControllerLink
+I2C link with the controller: Commands are sent from any thread (bus access is serialized), events are polled by
+a listener thread and passed to a callback.
+Class SimulatedController
+Same interface as ControllerLink, delivering frames at a fixed rate, to run scan sessions without a scanner.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "ScanSession"
+__version__ = "1.0.0"
+__date__ = "2025-03-08"
+__version_highlight__ = "ScanSession - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import time
+import queue
+import threading
+import logging
+
+# Controller commands and responses used by the scan engine (same codes as in controller and UI)
+CONTROLLER_ADDRESS = 16
+CMD_GET_CNT_STATUS = 2
+CMD_START_SCAN = 10
+CMD_GET_NEXT_FRAME = 12
+CMD_STOP_SCAN = 13
+RSP_FRAME_AVAILABLE = 80
+RSP_SCAN_ERROR = 81
+RSP_REPORT_AUTO_LEVELS = 86
+RSP_SCAN_ENDED = 88
+
+
+class FpmCounter:
+    def __init__(self):
+        self.frame_times = []
+        self.start_time = 0
+        self.value = -1     # -1 until enough frames have been captured
+
+    def add_frame(self, frame_time=None):
+        if frame_time is None:
+            frame_time = time.time()
+        # Determine if we should start new count (last capture older than 5 seconds)
+        if len(self.frame_times) == 0 or self.frame_times[-1] < frame_time - 5:
+            self.start_time = frame_time
+            self.frame_times = []
+            self.value = -1
+        self.frame_times.append(frame_time)
+        # Remove entries older than one minute
+        while self.frame_times[0] <= frame_time - 60:
+            self.frame_times.pop(0)
+        # Calculate current value, only if current count has been going for more than 10 seconds
+        if frame_time - self.start_time > 60:  # Frames in list are all in the last 60 seconds
+            self.value = len(self.frame_times)
+        elif frame_time - self.start_time > 10:
+            self.value = int((len(self.frame_times) * 60) / (frame_time - self.start_time))
+        return self.value
+
+
+class ScanState:
+    def __init__(self, current_frame=0):
+        self.current_frame = current_frame  # Last frame captured (frame numbers start at 1)
+        self.start_frame = current_frame
+        self.session_frames = 0
+        self.scan_errors = 0            # RSP_SCAN_ERROR received
+        self.forced_frames = 0          # Frames captured after controller inactivity
+        self.advance_overlap_time = 0   # Frame processing time overlapped with film movement (early advance)
+        self.frame_steps = 0            # Steps and PT level of current frame, as reported by controller with
+        self.pt_level = 0               # RSP_FRAME_AVAILABLE (0 if not reported, e.g. forced frames)
+        self.fpm_counter = FpmCounter()
+        self.start_time = 0
+        self.end_time = 0
+        self.running = False
+        self.stop_reason = None
+
+    @property
+    def fpm(self):
+        return self.fpm_counter.value
+
+    def elapsed(self):
+        return (self.end_time if not self.running else time.time()) - self.start_time
+
+    def snapshot(self):
+        return {'current_frame': self.current_frame, 'session_frames': self.session_frames,
+                'scan_errors': self.scan_errors, 'forced_frames': self.forced_frames, 'fpm': self.fpm,
+                'frame_steps': self.frame_steps, 'pt_level': self.pt_level, 'elapsed': round(self.elapsed(), 1),
+                'running': self.running, 'stop_reason': self.stop_reason}
+
+
+class ScanSession:
+    def __init__(self, controller, capture_frame, current_frame=0, frames=0, inactivity_delay=6,
+                 before_next_frame=None):
+        """
+        capture_frame(session) captures frame session.state.current_frame (called from the scan thread). It can
+        call session.request_next_frame() as soon as the frame is exposed (early frame advance), otherwise next
+        frame is requested once it returns. Exceptions raised by it stop the scan.
+        frames: Number of frames to capture (0 for no limit, scan stopped by end of reel or request_stop).
+        before_next_frame(): Optional, called before requesting each frame (e.g. to send framing corrections).
+        """
+        self.controller = controller
+        self.capture_frame = capture_frame
+        self.frames = frames
+        self.inactivity_delay = inactivity_delay    # Max time (in sec) between frames before forcing one
+        self.before_next_frame = before_next_frame
+        self.state = ScanState(current_frame)
+        self.events = queue.Queue()
+        self.listeners = []
+        self.thread = None
+        self.stop_requested = False
+        self.advance_pending = False    # Current frame captured, next one not yet requested
+        self.advance_time = 0
+        self.last_frame_time = 0
+        self.last_error_time = 0
+
+    def add_listener(self, listener):
+        # listener(event, session), called from the scan thread: 'started', 'frame', 'error', 'stopped'
+        self.listeners.append(listener)
+
+    def notify(self, event):
+        for listener in self.listeners:
+            try:
+                listener(event, self)
+            except Exception as e:
+                logging.error(f"ScanSession: Error in '{event}' listener: {e}")
+
+    def handle_controller_event(self, event, param1=0, param2=0):
+        # Called for every controller event (controller listener thread)
+        if event == RSP_FRAME_AVAILABLE:
+            # Delay shared with controller, 2 seconds less to avoid conflict with end reel
+            self.last_frame_time = time.time() + self.inactivity_delay - 2
+            self.events.put((event, param1, param2))
+        elif event == RSP_SCAN_ERROR:
+            self.events.put((event, param1, param2))
+        elif event == RSP_SCAN_ENDED:
+            self.request_stop("End of reel reached")
+
+    def start(self):
+        self.stop_requested = False
+        self.state.running = True
+        self.state.stop_reason = None
+        self.state.start_time = time.time()
+        self.last_frame_time = time.time() + 3
+        while not self.events.empty():  # Events left from a previous scan
+            self.events.get_nowait()
+        self.controller.scanning = True
+        self.controller.send(CMD_START_SCAN)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def request_stop(self, reason="Stop requested"):
+        if not self.stop_requested:
+            logging.info(f"ScanSession: {reason}, stopping scan")
+            self.state.stop_reason = reason
+        self.stop_requested = True
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+        return not self.state.running
+
+    def request_next_frame(self):
+        # Tells controller to move to next frame, once per frame (raises IOError if it cannot be reached)
+        if not self.advance_pending:
+            return
+        if self.before_next_frame is not None:
+            self.before_next_frame()
+        self.controller.send(CMD_GET_NEXT_FRAME)
+        self.advance_pending = False
+        self.advance_time = time.time()
+
+    def run(self):
+        logging.debug("ScanSession: Scan started")
+        self.notify('started')
+        try:
+            while not self.stop_requested:
+                try:
+                    event, param1, param2 = self.events.get(timeout=0.1)
+                except queue.Empty:
+                    if time.time() <= self.last_frame_time:
+                        continue
+                    # More than inactivity_delay/3 since last frame, maybe one command from/to controller (frame
+                    # received/go to next frame) has been lost: Force a new frame to allow process to continue
+                    # (a duplicate frame might be generated). 1/3rd less to avoid conflict with end reel
+                    self.last_frame_time = time.time() + int(self.inactivity_delay * 0.34)
+                    logging.warning(f"ScanSession: More than {int(self.inactivity_delay * 0.34)} sec. since last "
+                                    f"frame: Forcing new frame event (frame {self.state.current_frame})")
+                    self.state.forced_frames += 1
+                    event, param1, param2 = RSP_FRAME_AVAILABLE, 0, 0
+                if event == RSP_SCAN_ERROR:
+                    self.state.scan_errors += 1
+                    self.notify('error')
+                    if self.last_error_time != 0 and time.time() - self.last_error_time <= 5:
+                        self.request_stop("Too many errors during scan process")  # Second error in 5 seconds
+                    self.last_error_time = time.time()
+                    if self.stop_requested:
+                        break
+                    # Capture anyway to continue scan (maybe misaligned)
+                    logging.warning(f"ScanSession: Error during scan process, frame {self.state.current_frame}, "
+                                    f"simulating new frame")
+                    param1 = param2 = 0
+                # Values of the frame about to be captured (RSP_FRAME_AVAILABLE: Frame steps, PT level)
+                self.state.frame_steps = param1
+                self.state.pt_level = param2
+                self.scan_frame()
+                if 0 < self.frames <= self.state.session_frames:
+                    self.request_stop(f"{self.frames} frames captured")
+        except Exception as e:
+            logging.error(f"ScanSession: Scan stopped by error: {e}")
+            self.request_stop(f"Error: {e}")
+        try:
+            self.controller.send(CMD_STOP_SCAN)
+        except IOError as e:
+            logging.warning(f"ScanSession: Cannot send stop to controller: {e}")
+        self.controller.scanning = False
+        self.state.end_time = time.time()
+        self.state.running = False
+        logging.debug("ScanSession: Scan stopped")
+        self.notify('stopped')
+
+    def scan_frame(self):
+        state = self.state
+        state.current_frame += 1
+        state.session_frames += 1
+        state.fpm_counter.add_frame()
+        self.advance_pending = True
+        self.capture_frame(self)
+        if not self.advance_pending:
+            state.advance_overlap_time += time.time() - self.advance_time
+        else:     # Not requested yet (no early frame advance, or failed)
+            try:
+                self.request_next_frame()
+            except IOError:
+                state.current_frame -= 1
+                # Simulate new frame to repeat capture
+                self.events.put((RSP_FRAME_AVAILABLE, state.frame_steps, state.pt_level))
+                logging.warning(f"ScanSession: Error while telling controller to move to next frame, frame "
+                                f"{state.current_frame + 1} capture to be tried again")
+                return
+        self.notify('frame')
+
+
+class ControllerLink:
+    def __init__(self, bus, address=CONTROLLER_ADDRESS, poll_scan_interval=0.002, poll_idle_interval=0.01):
+        self.bus = bus      # smbus.SMBus
+        self.address = address
+        self.poll_scan_interval = poll_scan_interval    # Seconds between polls while scanning
+        self.poll_idle_interval = poll_idle_interval
+        self.scanning = False
+        self.lock = threading.Lock()
+        self.thread = None
+        self.active = False
+
+    def send(self, cmd, param=0):
+        # No response expected. Retried once on I/O error (IOError raised if it fails again)
+        time.sleep(0.0001)  # wait 100 µs, to avoid I/O errors
+        data = [int(param % 256), int(param >> 8)]
+        try:
+            with self.lock:
+                self.bus.write_i2c_block_data(self.address, cmd, data)
+        except IOError:
+            logging.warning(f"ControllerLink: Error while sending command {cmd} (param {param}). Retrying...")
+            time.sleep(0.2)
+            with self.lock:
+                self.bus.write_i2c_block_data(self.address, cmd, data)
+        time.sleep(0.0001)  # wait 100 µs, same
+
+    def poll(self):
+        # Returns (event, param1, param2), or None if no event pending
+        try:
+            with self.lock:
+                data = self.bus.read_i2c_block_data(self.address, CMD_GET_CNT_STATUS, 5)
+        except IOError as e:
+            # When error is 121, not really an error, means controller has no data available for us
+            if e.errno != 121:
+                logging.warning(f"ControllerLink: Non-critical IOError ({e}) while checking incoming event. "
+                                f"Will check again.")
+            return None
+        if data[0] == 0:
+            return None
+        # param2 sometimes arrives as 255, 255, no idea why
+        return data[0], data[1] * 256 + data[2], data[3] * 256 + data[4]
+
+    def start(self, listener):
+        # listener(event, param1, param2) is called for each event, from the listener thread
+        self.active = True
+        self.thread = threading.Thread(target=self.listen, args=(listener,), daemon=True)
+        self.thread.start()
+
+    def listen(self, listener):
+        logging.debug("ControllerLink: Started listener thread")
+        while self.active:
+            event = self.poll()
+            if event is None:
+                time.sleep(self.poll_scan_interval if self.scanning else self.poll_idle_interval)
+                continue
+            # Event received: Poll again right away, controller might have more events queued
+            listener(*event)
+
+    def stop(self):
+        self.active = False
+        if self.thread is not None:
+            self.thread.join(1)
+
+
+class SimulatedController:
+    def __init__(self, frame_time=0.1, reel_frames=0, frame_steps=300, pt_level=100):
+        self.frame_time = frame_time    # Time (seconds) taken to move the film to the next frame
+        self.reel_frames = reel_frames  # Frames in reel, end of reel reported after them (0: No end)
+        self.frame_steps = frame_steps
+        self.pt_level = pt_level
+        self.scanning = False
+        self.listener = None
+        self.frames_delivered = 0
+
+    def start(self, listener):
+        self.listener = listener
+
+    def stop(self):
+        self.listener = None
+
+    def send(self, cmd, param=0):
+        if cmd == CMD_START_SCAN or cmd == CMD_GET_NEXT_FRAME:
+            threading.Timer(self.frame_time, self.frame_reached).start()
+        elif cmd == CMD_STOP_SCAN:
+            self.scanning = False
+
+    def frame_reached(self):
+        listener = self.listener
+        if listener is None or not self.scanning:
+            return
+        if 0 < self.reel_frames <= self.frames_delivered:
+            listener(RSP_SCAN_ENDED, 0, 0)
+            return
+        self.frames_delivered += 1
+        listener(RSP_REPORT_AUTO_LEVELS, self.pt_level, self.frame_steps)
+        listener(RSP_FRAME_AVAILABLE, self.frame_steps, self.pt_level)
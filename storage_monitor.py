@@ -0,0 +1,141 @@
+"""
+****************************************************************************************************************
+Class StorageMonitor
+Keeps track of the disk space used by the frames of the current scan, and forecasts how many more frames (and
+how much scan time) fit in the target disk.
+Bytes written are accounted per capture profile (file type + number of HDR exposures), since a JPEG frame and a
+DNG HDR stack differ by two orders of magnitude.
+Free space is checked by a background thread, so the capture loop only reads the latest values. Scan needs to be
+stopped when free space, after reserving room for the frames still in the save queue, goes below a minimum.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "StorageMonitor"
+__version__ = "1.0.0"
+__date__ = "2025-02-24"
+__version_highlight__ = "StorageMonitor - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import os
+import shutil
+import threading
+import logging
+
+# Sizes used until actual ones are known (first frames of a profile), in bytes per file
+# ('raw': Uncompressed RGB frame at full sensor resolution, compressed frames are smaller)
+DEFAULT_FILE_SIZE = {'jpg': 2 * 1024 ** 2, 'png': 12 * 1024 ** 2, 'dng': 24 * 1024 ** 2, 'raw': 36 * 1024 ** 2}
+
+
+class StorageMonitor:
+    def __init__(self, min_free_mb=500, check_interval=2, queue_size_function=None):
+        self.min_free_bytes = min_free_mb * 1024 ** 2
+        self.check_interval = check_interval    # Time (in seconds) between two free space checks
+        self.queue_size_function = queue_size_function  # Returns number of files pending to be saved
+        self.folder = None
+        self.profile = None
+        self.profile_stats = {}     # profile -> [bytes, files, frames]
+        self.free_bytes = None
+        self.frames_left = None
+        self.exhausted = False
+        self.lock = threading.Lock()
+        self.wakeup_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.monitor_thread, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wakeup_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def set_target(self, folder, file_type, hdr_exposures=1):
+        # Called at scan start: Target folder and profile of frames to be written
+        with self.lock:
+            self.folder = folder
+            self.profile = (file_type, hdr_exposures)
+            if self.profile not in self.profile_stats:
+                self.profile_stats[self.profile] = [0, 0, 0]
+            self.exhausted = False
+        self.wakeup_event.set()     # Refresh values now
+
+    def add_file(self, hdr_idx, size):
+        # Called for each frame file written. HDR sub-frames (hdr_idx > 1) are part of the same frame
+        with self.lock:
+            if self.profile is None:
+                return
+            stats = self.profile_stats[self.profile]
+            stats[0] += size
+            stats[1] += 1
+            if hdr_idx <= 1:
+                stats[2] += 1
+
+    def bytes_per_file(self):
+        with self.lock:
+            return self._bytes_per_file()
+
+    def _bytes_per_file(self):
+        stats = self.profile_stats.get(self.profile)
+        if stats is not None and stats[1] > 0:
+            return stats[0] / stats[1]
+        return DEFAULT_FILE_SIZE.get(self.profile[0], DEFAULT_FILE_SIZE['dng']) if self.profile else 0
+
+    def _bytes_per_frame(self):
+        stats = self.profile_stats.get(self.profile)
+        if stats is not None and stats[2] > 0:
+            return stats[0] / stats[2]
+        return self._bytes_per_file() * (self.profile[1] if self.profile else 1)
+
+    def check(self):
+        with self.lock:
+            folder = self.folder
+        if folder is None or not os.path.isdir(folder):
+            return
+        try:
+            free_bytes = shutil.disk_usage(folder).free
+        except OSError as e:
+            logging.warning(f"StorageMonitor: Cannot get disk usage for {folder}: {e}")
+            return
+        queued_files = self.queue_size_function() if self.queue_size_function is not None else 0
+        with self.lock:
+            bytes_per_frame = self._bytes_per_frame()
+            # Files still in the save queue (plus the frame being captured) will be written anyway
+            headroom = queued_files * self._bytes_per_file() + bytes_per_frame
+            usable_bytes = free_bytes - self.min_free_bytes - headroom
+            self.free_bytes = free_bytes
+            self.frames_left = max(0, int(usable_bytes / bytes_per_frame)) if bytes_per_frame > 0 else None
+            if usable_bytes <= 0 and not self.exhausted:
+                logging.warning(f"StorageMonitor: Disk almost full, {int(free_bytes / 1024 ** 2)} MB free, "
+                                f"{queued_files} files pending to be saved")
+            self.exhausted = usable_bytes <= 0
+
+    def monitor_thread(self):
+        logging.debug("Started storage monitor thread")
+        while not self.stop_event.is_set():
+            self.check()
+            self.wakeup_event.wait(self.check_interval)
+            self.wakeup_event.clear()
+        logging.debug("Exiting storage monitor thread")
+
+    def space_exhausted(self):
+        return self.exhausted
+
+    def free_mb(self):
+        return self.free_bytes / 1024 ** 2 if self.free_bytes is not None else 0
+
+    def get_frames_left(self):
+        return self.frames_left
+
+    def get_minutes_left(self, frames_per_minute):
+        # Time to disk full at the current scan speed
+        if self.frames_left is None or frames_per_minute <= 0:
+            return None
+        return int(self.frames_left / frames_per_minute)
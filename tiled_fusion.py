@@ -0,0 +1,98 @@
+"""
+****************************************************************************************************************
+Class TiledFusion
+Mertens exposure fusion of large images, split in overlapping tiles processed in a thread pool.
+Fusing a full resolution HDR stack in a single MergeMertens call builds full size float32 pyramids for each
+exposure, which on a Raspberry Pi uses a lot of memory, and most of it runs on a single core. Here each tile
+is fused independently (OpenCV releases the GIL, so tiles run in parallel), and the fused tiles are blended
+back with linear ramps over the overlapping areas, so that no seams are visible. Only a limited number of
+tiles is in flight at any time, which bounds the memory used.
+Result has the same format as MergeMertens.process (float32, not normalized), so it can be used as a drop-in
+replacement. The coarsest pyramid levels of each tile only see the tile itself, so the result is not bit exact:
+Overlap must be large enough for the blending to absorb the differences (a quarter of the tile by default).
+'HdrFrameMerger.py -b' checks the max difference against a single MergeMertens call on real frames.
+****************************************************************************************************************
+"""
+__author__ = 'Juan Remirez de Esparza'
+__copyright__ = "Copyright 2025, Juan Remirez de Esparza"
+__credits__ = ["Juan Remirez de Esparza"]
+__license__ = "MIT"
+__module__ = "TiledFusion"
+__version__ = "1.0.0"
+__date__ = "2025-02-27"
+__version_highlight__ = "TiledFusion - First version"
+__maintainer__ = "Juan Remirez de Esparza"
+__email__ = "jremirez@hotmail.com"
+__status__ = "Development"
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+
+
+class TiledFusion:
+    def __init__(self, tile_size=1024, overlap=256, max_workers=None):
+        self.tile_size = tile_size
+        self.overlap = min(overlap, tile_size // 2)     # Pixels shared by neighbour tiles, blended with a linear ramp
+        self.max_workers = max_workers if max_workers is not None else min(4, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.thread_data = threading.local()    # MergeMertens objects are not shared between threads
+
+    def merger(self):
+        if not hasattr(self.thread_data, 'merge_mertens'):
+            self.thread_data.merge_mertens = cv2.createMergeMertens()
+        return self.thread_data.merge_mertens
+
+    def fuse_tile(self, images, y0, y1, x0, x1):
+        return self.merger().process([np.ascontiguousarray(img[y0:y1, x0:x1]) for img in images])
+
+    def tile_ranges(self, length):
+        # List of (start, end) covering 'length', consecutive ranges sharing 'overlap' pixels
+        if length <= self.tile_size:
+            return [(0, length)]
+        step = self.tile_size - self.overlap
+        ranges = []
+        start = 0
+        while start + self.tile_size < length:
+            ranges.append((start, start + self.tile_size))
+            start += step
+        ranges.append((max(0, length - self.tile_size), length))   # Last tile aligned with the image border
+        return ranges
+
+    @staticmethod
+    def ramp(start, end, length, overlap):
+        # Blend weights along one axis: Linear ramp on sides shared with a neighbour tile, flat elsewhere
+        weights = np.ones(end - start, dtype=np.float32)
+        size = min(overlap, end - start)
+        if size > 0 and start > 0:
+            weights[:size] = np.linspace(1 / (size + 1), 1, size, endpoint=False, dtype=np.float32)
+        if size > 0 and end < length:
+            weights[-size:] = np.minimum(weights[-size:],
+                                         np.linspace(1, 1 / (size + 1), size, endpoint=False, dtype=np.float32))
+        return weights
+
+    def process(self, images):
+        height, width = images[0].shape[:2]
+        if height <= self.tile_size and width <= self.tile_size:
+            return self.merger().process(images)
+        tiles = [(y0, y1, x0, x1) for y0, y1 in self.tile_ranges(height) for x0, x1 in self.tile_ranges(width)]
+        result = np.zeros(images[0].shape[:2] + (3,), dtype=np.float32)
+        total_weight = np.zeros((height, width, 1), dtype=np.float32)
+        # Submit tiles in batches, to limit the number of fused tiles held in memory at the same time
+        batch_size = self.max_workers * 2
+        for i in range(0, len(tiles), batch_size):
+            batch = tiles[i:i + batch_size]
+            futures = [self.executor.submit(self.fuse_tile, images, *tile) for tile in batch]
+            for (y0, y1, x0, x1), future in zip(batch, futures):
+                fused = future.result()
+                weight = np.outer(self.ramp(y0, y1, height, self.overlap),
+                                  self.ramp(x0, x1, width, self.overlap))[:, :, np.newaxis]
+                result[y0:y1, x0:x1] += fused * weight
+                total_weight[y0:y1, x0:x1] += weight
+        result /= total_weight
+        return result
+
+    def close(self):
+        self.executor.shutdown(wait=True)